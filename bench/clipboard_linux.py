@@ -0,0 +1,45 @@
+"""
+Compares the cost of setting the clipboard by spawning xclip against the persistent
+in-process selection owner. Needs an X server, e.g. `xvfb-run python bench/clipboard_linux.py`.
+"""
+
+from latex_input.clipboard_linux import XclipClipboard, XSelectionClipboard
+
+import argparse
+import statistics
+import time
+
+SAMPLE_TEXT = "∮𝑩⋅𝒅𝒍 = 𝜇₀𝐼"
+
+
+def measure(clipboard, iterations: int) -> list[float]:
+    timings = []
+
+    for i in range(iterations):
+        start = time.perf_counter()
+        clipboard.set_text(f"{SAMPLE_TEXT} {i}")
+        timings.append((time.perf_counter() - start) * 1e3)
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    owner = XSelectionClipboard()
+
+    for name, clipboard in [("xclip per write", XclipClipboard()), ("selection owner", owner)]:
+        timings = measure(clipboard, args.iterations)
+        quantiles = statistics.quantiles(timings, n=100)
+        print(f"{name:>16}: mean {statistics.fmean(timings):.3f} ms, "
+              f"p50 {quantiles[49]:.3f} ms, p99 {quantiles[98]:.3f} ms")
+
+    # Check that other clients actually receive the owner's contents
+    owner.set_text(SAMPLE_TEXT)
+    assert XclipClipboard().get_text() == SAMPLE_TEXT, "xclip did not read the owned selection"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Load test for `input_thread`, driven by synthetic activations instead of a keyboard.
+Reports throughput, per-stage latency percentiles, and with --trace-memory the memory
+retained across activations. With --key-interval, expressions are typed one key at a time
+and the speculative converter's hit rate and the conversion time it saved are reported.
+With --gui, the tray icon is updated from the input thread while Qt runs its event loop,
+as in the real application.
+"""
+
+from latex_input import app
+from latex_input.synthetic_client import Activation, SyntheticClient
+
+import argparse
+import sys
+import threading
+import time
+import tracemalloc
+
+EXPRESSIONS = [
+    "\\oint\\b{B}\\cdot\\b{dl} = \\mu_0I",
+    "P \\implies Q \\iff \\neg P \\lor Q",
+    "\\exists x \\in \\mathbb{R} | x^2 = x",
+    "x_1 + y_1",
+    "lambda",
+    "\\mathfrak{Hard}",
+    "\\notacommand",
+]
+
+STAGES = {
+    "wake (hotkey -> activated)": ("hotkey", "activated"),
+    "convert (captured -> output)": ("captured", "output_start"),
+    "output": ("output_start", "output_end"),
+    "total (hotkey -> output end)": ("hotkey", "output_end"),
+}
+
+
+def percentiles(values: list[float]) -> str:
+    if not values:
+        return "n/a"
+
+    values = sorted(values)
+    return ", ".join(
+        f"p{p} {values[min(len(values) - 1, len(values) * p // 100)] * 1e6:,.1f} µs" for p in (50, 90, 99)
+    ) + f", max {values[-1] * 1e6:,.1f} µs"
+
+
+def report_speculation():
+    converter = app.speculative_converter
+    if converter is None or converter.hit_rate() is None:
+        return
+
+    print(f"Speculative conversion: {converter.hits} hits, {converter.misses} misses "
+          f"({converter.hit_rate():.1%}), saved {converter.time_saved * 1e3:,.1f} ms in total")
+
+
+def report(activations: list[Activation], elapsed: float):
+    num_written = sum(a.output_end > 0 for a in activations)
+    num_retries = sum(a.num_retries for a in activations)
+
+    print(f"{len(activations)} activations in {elapsed:.3f} s, {len(activations) / elapsed:,.0f} activations/sec")
+    print(f"{num_written} written, {num_retries} failed translations")
+
+    for name, (start, end) in STAGES.items():
+        durations = [getattr(a, end) - getattr(a, start) for a in activations if getattr(a, end)]
+        print(f"  {name}: {percentiles(durations)}")
+
+
+def run_input_thread(client: SyntheticClient, gui: bool) -> float:
+    start = time.perf_counter()
+    thread = threading.Thread(target=app.input_thread, args=(client,), daemon=True)
+
+    if not gui:
+        thread.start()
+        thread.join()
+        return time.perf_counter() - start
+
+    from latex_input import gui
+    from PyQt6 import QtCore, QtWidgets
+
+    qt_app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    gui.show_tray_icon()
+
+    timer = QtCore.QTimer()
+    timer.timeout.connect(lambda: thread.is_alive() or qt_app.quit())
+    timer.start(10)
+
+    thread.start()
+    qt_app.exec()
+    elapsed = time.perf_counter() - start
+
+    gui.tray_icon = None
+    app.icon_state_handler = None
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--activations", type=int, default=20000)
+    parser.add_argument("-r", "--rate", type=float, default=0.0,
+                        help="Activations per second, 0 for back to back")
+    parser.add_argument("-k", "--key-interval", type=float, default=0.0,
+                        help="Seconds between simulated key presses, 0 captures expressions instantly")
+    parser.add_argument("-o", "--simulate-output-time", action="store_true",
+                        help="Output takes as long as typing it at the key press delay would")
+    parser.add_argument("--gui", action="store_true",
+                        help="Run the Qt event loop and update the tray icon "
+                             "(set QT_QPA_PLATFORM=offscreen if headless)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Report memory retained by `input_thread`, slows everything down")
+    args = parser.parse_args()
+
+    # Warm up the converter's caches, so that they don't count as growth
+    run_input_thread(SyntheticClient(EXPRESSIONS, len(EXPRESSIONS) * 10), args.gui)
+
+    if args.trace_memory:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+
+    if app.speculative_converter:
+        app.speculative_converter.hits = app.speculative_converter.misses = 0
+        app.speculative_converter.time_saved = 0.0
+
+    client = SyntheticClient(EXPRESSIONS, args.activations, args.rate, args.key_interval,
+                             args.simulate_output_time)
+    elapsed = run_input_thread(client, args.gui)
+    report(client.activations, elapsed)
+    report_speculation()
+
+    if args.trace_memory:
+        # The synthetic client's own records grow by design, drop them before measuring
+        client.activations.clear()
+        diff = tracemalloc.take_snapshot().compare_to(before, "lineno")
+        growth = sum(stat.size_diff for stat in diff)
+
+        print(f"Retained {growth / 1024:,.1f} KiB, {growth / args.activations:,.1f} bytes/activation")
+        for stat in diff[:5]:
+            print(f"  {stat}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measures the per-request round trip latency of the JSON-RPC stdio mode
+(`python -m latex_input --stdio`), reporting percentiles after a warmup.
+"""
+
+import argparse
+import json
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+
+EXPRESSIONS = [
+    "\\oint\\b{B}\\cdot\\b{dl} = \\mu_0I",
+    "P \\implies Q \\iff \\neg P \\lor Q",
+    "\\exists x \\in \\mathbb{R} | x^2 = x",
+    "x_1 + y_1",
+    "lambda",
+    "\\mathfrak{Hard}",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--requests", type=int, default=10000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument(
+        "--command",
+        default=shlex.join([sys.executable, "-m", "latex_input", "--stdio"]),
+        help="Command starting the JSON-RPC server"
+    )
+    args = parser.parse_args()
+
+    proc = subprocess.Popen(shlex.split(args.command), stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                            encoding="utf-8", bufsize=1)
+    assert proc.stdin and proc.stdout
+
+    latencies = []
+
+    for i in range(args.warmup + args.requests):
+        request = {"jsonrpc": "2.0", "id": i, "method": "convert",
+                   "params": {"text": EXPRESSIONS[i % len(EXPRESSIONS)]}}
+
+        start = time.perf_counter()
+        proc.stdin.write(json.dumps(request) + "\n")
+        response = json.loads(proc.stdout.readline())
+        elapsed = time.perf_counter() - start
+
+        assert response["id"] == i
+        if i >= args.warmup:
+            latencies.append(elapsed * 1e6)
+
+    proc.stdin.close()
+    proc.wait()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{args.requests} requests: "
+          f"p50 {quantiles[49]:.0f} µs, p90 {quantiles[89]:.0f} µs, p99 {quantiles[98]:.0f} µs, "
+          f"max {max(latencies):.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Measures characters/sec typed by remapping keysyms onto spare keycodes against pynput's
+Controller.type, which remaps and syncs with the X server for every character.
+Needs an X server, e.g. `xvfb-run python bench/keysym_remap.py`.
+"""
+
+from latex_input.xtest_linux import KeysymRemapWriter, XTestKeyboard
+
+import argparse
+import itertools
+import time
+
+SAMPLE_TEXT = "α→β ∑ᵢ xᵢ² ≤ ∫₀^∞ ℝ ∀ε∃δ ⊗ ∮ 𝔽 "
+
+
+def measure(write, text: str) -> float:
+    start = time.perf_counter()
+    write(text)
+    elapsed = time.perf_counter() - start
+
+    return len(text) / elapsed
+
+
+def main():
+    from pynput import keyboard as pkeyboard
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--chars", type=int, default=500)
+    parser.add_argument("--delay", type=float, default=0.0, help="Server-side pacing between XTEST key presses")
+    args = parser.parse_args()
+
+    text = "".join(itertools.islice(itertools.cycle(SAMPLE_TEXT), args.chars))
+    controller = pkeyboard.Controller()
+    writer = KeysymRemapWriter(XTestKeyboard())
+
+    print(f"Remapping {writer.num_keycodes} keycodes from {writer.first_keycode}, "
+          f"{len(set(text))} distinct characters")
+    print(f"pynput controller: {measure(controller.type, text):,.0f} chars/sec")
+    print(f"   keysym remap: {measure(lambda t: writer.write(t, args.delay), text):,.0f} chars/sec")
+
+
+if __name__ == "__main__":
+    main()
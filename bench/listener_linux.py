@@ -0,0 +1,61 @@
+"""
+Presses the activation hotkey and immediately types a word through XTEST, then checks
+what `InputClient.listen` captured. Reports lost keystrokes and activation latency.
+Needs an X server, e.g. `xvfb-run python bench/listener_linux.py`.
+"""
+
+from latex_input.input_client_linux import CaptureState, InputClient
+from latex_input.xtest_linux import XTestKeyboard
+
+import argparse
+import threading
+import time
+
+WORD = "abc123xyz"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--activations", type=int, default=200)
+    args = parser.parse_args()
+
+    client = InputClient()
+    keyboard = XTestKeyboard()
+    results = []
+
+    def input_thread():
+        for _ in range(args.activations):
+            client.wait_for_hotkey()
+            results.append(client.listen(""))
+
+    thread = threading.Thread(target=input_thread, daemon=True)
+    thread.start()
+
+    for i in range(args.activations):
+        while client.state is not CaptureState.IDLE:
+            time.sleep(0.001)
+
+        # The word follows the hotkey without any pause
+        keyboard.chord("Control_L", "Shift_L", "i")
+        for c in WORD:
+            keyboard.tap(c)
+        keyboard.tap("space")
+        keyboard.flush()
+
+        while len(results) <= i:
+            time.sleep(0.001)
+
+    thread.join()
+
+    num_lost = sum(
+        sum(a != b for a, b in zip(text or "", WORD)) + abs(len(WORD) - len(text or ""))
+        for text in results
+    )
+
+    percentiles = client.activation_latency_percentiles() or {}
+    print(f"{args.activations} activations, {num_lost} of {args.activations * len(WORD)} keystrokes lost")
+    print("Activation latency: " + ", ".join(f"p{p} {v * 1e3:.3f} ms" for p, v in percentiles.items()))
+
+
+if __name__ == "__main__":
+    main()
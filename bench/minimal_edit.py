@@ -0,0 +1,51 @@
+"""
+Reports the keystrokes saved by only retyping the part of a translation that differs
+from the typed text, over a corpus of typical inputs.
+"""
+
+from latex_input.latex_converter import latex_to_unicode
+from latex_input.minimal_edit import minimal_edit
+
+CORPUS = [
+    "\\oint\\b{B}\\cdot\\b{dl} = \\mu_0I",
+    "\\oiint\\b{D}\\cdot\\b{dS} = \\Phi_e = Q_{en}^{free}",
+    "P \\implies Q \\iff \\neg P \\lor Q",
+    "\\exists x \\in \\mathbb{R} | x^2 = x",
+    "x_1 + y_1",
+    "x^2 + y^2 = z^2",
+    "a_n = a_{n-1} + a_{n-2}",
+    "f(x) = x^3 - 2x + 1",
+    "e^{i\\pi} + 1 = 0",
+    "E = mc^2",
+    "H_2O",
+    "CO_2",
+    "10^{-3}",
+    "v_0 t + \\frac12",
+    "\\alpha",
+    "lambda",
+    "\\sum_{i=1}^n i",
+    "T_{max} - T_{min}",
+    "O(n^2)",
+    "x' = -x",
+]
+
+
+def main():
+    num_full = 0
+    num_minimal = 0
+
+    for text in CORPUS:
+        translation = latex_to_unicode(text, is_easy_mode=True)
+        if translation is None:
+            continue
+
+        typed = text + " "
+        num_full += len(typed) + len(translation)
+        num_minimal += minimal_edit(typed, translation).num_keystrokes
+
+    print(f"Full rewrite: {num_full} keystrokes, minimal edit: {num_minimal} keystrokes, "
+          f"saved {num_full - num_minimal} ({(num_full - num_minimal) / num_full:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compares converting every input in upright and math-italic, with easy mode on and off, using
+one `latex_to_unicode` call per variant against a single `latex_to_unicode_variants` call.
+"""
+
+from latex_input.latex_converter import ConversionVariant, FontContext, latex_to_unicode, latex_to_unicode_variants
+from latex_input.unicode_structs import FontVariantType
+
+from minimal_edit import CORPUS
+
+import argparse
+import time
+
+VARIANTS = [
+    ConversionVariant(FontContext(formatting=formatting), is_easy_mode)
+    for formatting in (FontVariantType.NONE, FontVariantType.ITALIC) for is_easy_mode in (False, True)
+]
+
+
+def run_repeated():
+    for text in CORPUS:
+        for context, is_easy_mode in VARIANTS:
+            latex_to_unicode(text, context, is_easy_mode)
+
+
+def run_variants():
+    for text in CORPUS:
+        latex_to_unicode_variants(text, VARIANTS)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--repeat", type=int, default=200, help="Passes over the corpus")
+    args = parser.parse_args()
+
+    num_inputs = len(CORPUS) * args.repeat
+
+    for name, run in [("repeated calls", run_repeated), ("one parse", run_variants)]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            run()
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:>14}: {num_inputs / elapsed:,.0f} inputs/sec with {len(VARIANTS)} variants each, "
+              f"{elapsed / num_inputs * 1e6:.1f} µs per input")
+
+
+if __name__ == "__main__":
+    main()
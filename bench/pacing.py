@@ -0,0 +1,63 @@
+"""
+Compares busy-waiting for every keystroke delay against the hybrid sleep/spin scheduler,
+reporting the CPU time used per simulated output and the distribution of interval errors.
+"""
+
+from latex_input.pacing import PacingScheduler
+
+import argparse
+import statistics
+import time
+
+
+def busy_wait(delay: float):
+    target_time = time.perf_counter() + delay
+    while time.perf_counter() < target_time:
+        pass
+
+
+def run_busy_wait(num_keys: int, delay: float) -> list[float]:
+    timestamps = []
+    for _ in range(num_keys):
+        timestamps.append(time.perf_counter())
+        busy_wait(delay)
+
+    return timestamps
+
+
+def run_scheduler(num_keys: int, delay: float) -> list[float]:
+    timestamps = []
+    pacer = PacingScheduler(delay)
+    for _ in range(num_keys):
+        timestamps.append(time.perf_counter())
+        pacer.wait()
+
+    return timestamps
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--keys", type=int, default=40, help="Keystrokes per output")
+    parser.add_argument("-r", "--repeat", type=int, default=50, help="Number of outputs")
+    parser.add_argument("--delay", type=float, default=0.002)
+    args = parser.parse_args()
+
+    for name, run in [("busy-wait", run_busy_wait), ("sleep/spin", run_scheduler)]:
+        cpu_times = []
+        errors = []
+
+        for _ in range(args.repeat):
+            cpu_start = time.thread_time()
+            timestamps = run(args.keys, args.delay)
+            cpu_times.append(time.thread_time() - cpu_start)
+
+            errors += [(b - a - args.delay) * 1e6 for a, b in zip(timestamps, timestamps[1:])]
+
+        q = statistics.quantiles(errors, n=100)
+        print(f"{name:>10}: CPU {statistics.fmean(cpu_times) * 1e3:.2f} ms per output "
+              f"of {args.keys * args.delay * 1e3:.0f} ms, interval error "
+              f"p50 {q[49]:.1f} µs, p90 {q[89]:.1f} µs, p99 {q[98]:.1f} µs, max {max(errors):.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Load-test client for the conversion server (`python -m latex_input --serve PATH`).
+Opens several connections and pipelines requests on each, then reports requests/sec.
+"""
+
+from latex_input.server import ConversionClient
+
+import argparse
+import asyncio
+import time
+
+EXPRESSIONS = [
+    "\\oint\\b{B}\\cdot\\b{dl} = \\mu_0I",
+    "P \\implies Q \\iff \\neg P \\lor Q",
+    "\\exists x \\in \\mathbb{R} | x^2 = x",
+    "x_1 + y_1",
+    "lambda",
+    "\\mathfrak{Hard}",
+]
+
+
+async def run_connection(socket_path: str, num_requests: int, pipeline_depth: int) -> int:
+    client = await ConversionClient.connect(socket_path)
+    num_failed = 0
+
+    try:
+        for start in range(0, num_requests, pipeline_depth):
+            batch = range(start, min(start + pipeline_depth, num_requests))
+
+            for i in batch:
+                client.send(EXPRESSIONS[i % len(EXPRESSIONS)])
+            await client.writer.drain()
+
+            for _ in batch:
+                num_failed += await client.receive() is None
+    finally:
+        await client.close()
+
+    return num_failed
+
+
+async def run(args: argparse.Namespace):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        run_connection(args.socket_path, args.requests, args.pipeline)
+        for _ in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - start
+
+    total = args.connections * args.requests
+    print(f"{total} requests over {args.connections} connection(s), pipeline depth {args.pipeline}")
+    print(f"{elapsed:.3f} s, {total / elapsed:,.0f} requests/sec, {sum(results)} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("socket_path")
+    parser.add_argument("-c", "--connections", type=int, default=16)
+    parser.add_argument("-n", "--requests", type=int, default=10000, help="Requests per connection")
+    parser.add_argument("-p", "--pipeline", type=int, default=64, help="Requests in flight per connection")
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Measures key events/sec injected with pynput's Controller against batched XTEST events.
+Needs an X server, e.g. `xvfb-run python bench/xtest_linux.py`.
+"""
+
+from latex_input.xtest_linux import XTestKeyboard, PynputKeyboard
+
+import argparse
+import time
+
+
+def measure(keyboard, num_keys: int, delay: float) -> float:
+    start = time.perf_counter()
+    keyboard.tap("BackSpace", num_keys, delay)
+    keyboard.flush()
+    elapsed = time.perf_counter() - start
+
+    return 2 * num_keys / elapsed  # A press and a release per key
+
+
+def main():
+    from pynput import keyboard as pkeyboard
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--keys", type=int, default=2000)
+    parser.add_argument("--delay", type=float, default=0.0, help="Server-side pacing between XTEST key presses")
+    args = parser.parse_args()
+
+    print(f"pynput controller: {measure(PynputKeyboard(pkeyboard.Controller()), args.keys, 0.0):,.0f} events/sec")
+    print(f"   batched XTEST: {measure(XTestKeyboard(), args.keys, args.delay):,.0f} events/sec")
+
+
+if __name__ == "__main__":
+    main()
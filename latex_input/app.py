@@ -0,0 +1,427 @@
+from latex_input import metrics
+from latex_input.conversion_cache import conversion_cache
+from latex_input.flight_recorder import flight_recorder
+from latex_input.latex_converter import FontContext
+from latex_input.minimal_edit import minimal_edit
+from latex_input.output_writer import OutputResult, OutputWriter
+from latex_input.pacing_profiles import PacingProfiles, is_terminal, probe_delay, tune_delay
+from latex_input.speculative import SpeculativeConverter
+from latex_input.trace import RecordingClient, ReplayClient, TraceWriter
+from latex_input.unicode_structs import FontVariantType
+
+import argparse
+import logging
+import signal
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, Final, TYPE_CHECKING
+import os
+from pathlib import Path
+
+# PyQt6 and the keyboard hooking libraries take hundreds of milliseconds to import, they're only
+# imported once it's clear they are needed, so the server modes and replays start quickly
+if TYPE_CHECKING:
+    from latex_input.input_client_linux import InputClient
+
+ACTIVATION_HOTKEY = "CapsLock+S"
+if os.name == "posix":
+    ACTIVATION_HOTKEY = "Ctrl+Alt+I"
+elif os.name != "nt":
+    raise NotImplementedError("Unsupported OS: "+os.name)
+
+logger = logging.getLogger(__name__)
+
+APP_NAME: Final[str] = "LaTeX Input"
+
+# Necessary, as some applications will process keystrokes out
+# of order if they arrive too quickly, or they won't process
+# them at all.
+KEYPRESS_DELAY: Final[float] = 0.002
+
+# Set by the GUI, called with whether input is being captured
+icon_state_handler: Callable[[bool], None] | None = None
+use_key_delay = True
+is_math_mode = False
+is_easy_mode = True
+tune_pacing = False
+pacing_profiles: PacingProfiles | None = None
+record_trace_path: str | None = None
+use_uinput: bool | None = None  # Linux input backend, None picks X11 unless in a Wayland session
+speculative_converter: SpeculativeConverter | None = None
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--no-gui", "--daemon",
+        action="store_true",
+        help="Launch without a visible GUI"
+    )
+
+    parser.add_argument(
+        "--faster-keypresses",
+        action="store_true",
+        help="Barely faster keypresses, can cause applications to misbehave"
+    )
+
+    parser.add_argument(
+        "--tune-pacing",
+        action="store_true",
+        help="On the first activation in each application, find the fastest key press delay it handles reliably. "
+             "Types and erases a probe in the focused text field, reading it back by copying with Ctrl+C. "
+             "Known terminals are skipped, as Ctrl+C interrupts the program running in them, but make sure "
+             "no other terminal is focused on the first activation"
+    )
+
+    # --math-mode and --no-math-mode
+    parser.add_argument(
+        "--math-mode",
+        action=argparse.BooleanOptionalAction,
+        help="Italic text by default"
+    )
+
+    # --easy-mode and --no-easy-mode
+    parser.add_argument(
+        "--easy-mode",
+        action=argparse.BooleanOptionalAction,
+        help="Accepts `lambda` in place of `\\lambda`. Only works for single symbols"
+    )
+
+    # --uinput and --no-uinput
+    parser.add_argument(
+        "--uinput",
+        action=argparse.BooleanOptionalAction,
+        help="Linux only: read keys through evdev and type through uinput instead of X11. The default on Wayland. "
+             "Assumes a US keyboard layout, and needs access to /dev/uinput and /dev/input"
+    )
+
+    parser.add_argument(
+        "--serve",
+        metavar="SOCKET_PATH",
+        help="Run as a conversion server on a Unix domain socket instead of listening for keyboard input"
+    )
+
+    parser.add_argument(
+        "--stdio",
+        action="store_true",
+        help="Serve JSON-RPC conversion and completion requests on stdin/stdout, for editor integrations"
+    )
+
+    parser.add_argument(
+        "--record-trace",
+        metavar="FILE",
+        help="Record the activations and the keys typed during them to FILE, for reproducing problems with "
+             "--replay-trace. Other typing isn't recorded, but anything typed after the hotkey is, in plain text"
+    )
+
+    parser.add_argument(
+        "--replay-trace",
+        metavar="FILE",
+        help="Replay a trace recorded with --record-trace instead of listening for keyboard input, "
+             "logging what would have been typed"
+    )
+
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        metavar="FACTOR",
+        help="Speed of --replay-trace relative to the recording, 0 replays as fast as possible"
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="Serve conversion and input metrics in the Prometheus text format on http://127.0.0.1:PORT/metrics"
+    )
+
+    parser.add_argument(
+        "--metrics-socket",
+        metavar="SOCKET_PATH",
+        help="Serve the metrics over HTTP on a Unix domain socket"
+    )
+
+    # --persistent-cache and --no-persistent-cache
+    parser.add_argument(
+        "--persistent-cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Remember conversions and how often they are used across runs, to warm up the conversion cache "
+             "and rank completions. Stores what is converted in the user cache directory"
+    )
+
+    parser.add_argument(
+        "--log-level",
+        action="append",
+        default=[],
+        metavar="[MODULE=]LEVEL",
+        help="Logging level, optionally for a single module, e.g. `latex_input.latex_converter=DEBUG`. "
+             "Can be repeated. Only warnings are logged by default"
+    )
+
+    return parser
+
+
+def configure_logging(level_specs: list[str]):
+    logging.basicConfig(format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+
+    for spec in level_specs:
+        module, _, level = spec.rpartition("=")
+        logging.getLogger(module or None).setLevel(level.upper())
+
+
+def main():
+    args = get_parser().parse_args()
+    configure_logging(args.log_level)
+
+    if args.metrics_port is not None or args.metrics_socket:
+        metrics.start_exporter(args.metrics_port, args.metrics_socket)
+
+    if args.persistent_cache:
+        from latex_input.persistent_cache import enable_persistent_cache
+        enable_persistent_cache()
+
+    if args.serve:
+        from latex_input.server import run_server
+        run_server(args.serve)
+        return
+
+    if args.stdio:
+        from latex_input.jsonrpc import run_stdio
+        run_stdio()
+        return
+
+    if args.faster_keypresses:
+        global use_key_delay
+        use_key_delay = False
+
+    global pacing_profiles, tune_pacing
+    pacing_profiles = PacingProfiles()
+    tune_pacing = args.tune_pacing
+
+    if args.math_mode is None:
+        # TODO: Load from preferences file
+        pass
+
+    elif args.math_mode:
+        global is_math_mode
+        is_math_mode = True
+
+    if args.easy_mode is None:
+        # TODO: Load from preferences file
+        pass
+
+    elif not args.easy_mode:
+        global is_easy_mode
+        is_easy_mode = False
+
+    global record_trace_path, use_uinput
+    record_trace_path = args.record_trace
+    use_uinput = args.uinput
+
+    if args.replay_trace:
+        replay_trace(args.replay_trace, args.replay_speed)
+        return
+
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: dump_flight_recorder())
+
+    thread = threading.Thread(target=input_thread, daemon=True)
+    thread.start()
+
+    if os.name == "nt":
+        # The first call to `send` is slow on Windows
+        # We send a generally unused key to avoid this slowdown
+        import keyboard
+        keyboard.send('f24')  # 'reserved '
+
+    logger.info("%s started", APP_NAME)
+
+    if args.no_gui:
+        thread.join()
+    else:
+        from latex_input.gui import run_gui
+        run_gui()
+
+    logger.info("%s stopped", APP_NAME)
+
+
+def dump_flight_recorder() -> Path | None:
+    try:
+        return flight_recorder.dump_to_file()
+    except OSError as e:
+        logger.warning("Failed to save recent activations: %s", e)
+        return None
+
+
+def create_input_client() -> "InputClient | RecordingClient":
+    if os.name == "nt":
+        from latex_input.input_client_win import InputClient
+        client = InputClient()
+    else:
+        from latex_input.input_client_linux import InputClient
+        client = InputClient(use_uinput)
+
+    if record_trace_path is None:
+        return client
+
+    writer = TraceWriter.open(record_trace_path)
+    logger.info("Recording keys to %s", record_trace_path)
+
+    if hasattr(client, "trace_writer"):
+        # Records individual key presses with their timing
+        client.trace_writer = writer
+        return client
+
+    return RecordingClient(client, writer)
+
+
+def replay_trace(path: str, speed: float):
+    client = ReplayClient.open(path, speed)
+    logger.info("Replaying %d events from %s", len(client.events), path)
+
+    # Writing in the background would make the order of output and replayed keys vary between runs
+    input_thread(client, pipeline_output=False)
+
+    num_keystrokes = sum(event.count for event in client.output)
+    logger.info("Replay typed %d keystrokes in %d writes", num_keystrokes, len(client.output))
+    print(client.screen)
+
+
+def input_thread(client: "InputClient | ReplayClient | None" = None, pipeline_output: bool = True):
+    if client is None:
+        client = create_input_client()
+
+    # Converts while the user types, so the translation is usually ready when they press Space
+    global speculative_converter
+    if speculative_converter is None:
+        speculative_converter = SpeculativeConverter()
+
+    client_output_done = getattr(client, "output_done", None)
+
+    def on_output(result: OutputResult):
+        # The strategy, e.g. pasting or typing, is chosen per job for clients that have several
+        flight_recorder.record_output(result, getattr(getattr(client, "output", None), "last_used", None))
+
+        if client_output_done:
+            client_output_done(result)
+
+    # Writes on its own thread, so the hotkey is watched while a previous translation is being typed
+    output_writer = OutputWriter(client, on_result=on_output)
+
+    # Esc or a new activation stop the output being written
+    if set_interrupt_handler := getattr(client, "set_interrupt_handler", None):
+        set_interrupt_handler(output_writer.cancel)
+    # Clients that can't tell our own output apart from the user's typing must not capture while writing
+    filters_own_output = getattr(client, "filters_own_output", False)
+
+    while True:
+        try:
+            client.wait_for_hotkey()
+        except EOFError:  # Input source exhausted, e.g. the end of a replayed trace
+            output_writer.wait_until_idle()
+            break
+
+        set_icon_state(True)  # We are now listening
+        metrics.activations.inc()
+
+        text = ""
+        translated_text = ""
+
+        # Continue until valid translation is made or user cancels
+        while True:
+            context = FontContext(formatting=FontVariantType.ITALIC if is_math_mode else FontVariantType.NONE)
+            easy_mode = is_easy_mode
+            speculative_converter.begin(lambda tex: conversion_cache.convert(tex, context, easy_mode, count_use=False))
+
+            if not filters_own_output:
+                output_writer.wait_until_idle()
+
+            text = client.listen(text, on_change=speculative_converter.update)
+
+            # User cancelled the input
+            if text is None:
+                logger.debug("User cancelled the input")
+                text = ""
+                break
+
+            record = flight_recorder.begin(text, context.formatting == FontVariantType.ITALIC, easy_mode)
+
+            convert_start = time.perf_counter()
+            translation = speculative_converter.take(text)
+            record.convert_time = time.perf_counter() - convert_start
+            record.translation = translation
+            metrics.stage_seconds.observe(record.convert_time, "convert")
+
+            if translation:
+                translated_text = translation
+                conversion_cache.count_use(text, context, easy_mode, translation)
+                break
+            else:
+                logger.debug("Failed translation, re-listening...")
+                metrics.translation_retries.inc()
+                text += " "  # Re-add the otherwise-ignored space
+
+        if translated_text:
+            # Looked up once the input is complete, so that tuning doesn't type into the captured text
+            delay = get_keypress_delay(client, output_writer)
+
+            # Only erase and retype what differs from the typed text, +1 for space character
+            typed = text + " "
+            output_writer.submit(typed, minimal_edit(typed, translated_text), delay, record.sequence)
+
+            if not pipeline_output:
+                output_writer.wait_until_idle()
+
+        # No longer listening
+        set_icon_state(False)
+
+
+def get_keypress_delay(client: "InputClient", output_writer: OutputWriter) -> float:
+    """
+    Delay between key presses for the active application, from its pacing profile if it has one
+    """
+    if not use_key_delay:
+        return 0.0
+
+    if pacing_profiles is None:
+        return KEYPRESS_DELAY
+
+    window_class = client.active_window_class()
+
+    if tune_pacing and window_class is not None and window_class not in pacing_profiles:
+        if is_terminal(window_class):
+            logger.info("Not tuning the key press delay for %s, Ctrl+C would interrupt the terminal", window_class)
+        else:
+            tune_keypress_delay(client, output_writer, window_class)
+
+    return pacing_profiles.delay_for(window_class, KEYPRESS_DELAY)
+
+
+def tune_keypress_delay(client: "InputClient", output_writer: OutputWriter, window_class: str):
+    assert pacing_profiles
+    logger.info("Tuning key press delay for %s", window_class)
+    output_writer.wait_until_idle()  # The probe is read back, nothing else may be typed meanwhile
+
+    # Clients with several output strategies type the probes, and keep the clipboard free for reading back
+    probing = getattr(client, "probing", nullcontext)
+
+    try:
+        with probing():
+            delay = tune_delay(lambda d: probe_delay(client, d))
+    except RuntimeError as e:
+        logger.warning("Unable to tune the key press delay: %s", e)
+        return
+
+    if delay is None:
+        logger.warning("%s is unreliable with every delay, using the default", window_class)
+    else:
+        logger.info("Using a %.1f ms key press delay for %s", delay * 1e3, window_class)
+        pacing_profiles.set_delay(window_class, delay)
+
+
+def set_icon_state(activated: bool):
+    if icon_state_handler:
+        icon_state_handler(activated)
@@ -0,0 +1,132 @@
+"""
+Text captured from key presses while listening, with a cursor that follows the arrow keys,
+so that expressions can be edited in the middle and the captured text still matches what was
+typed into the application. Keys that would move the application's cursor out of the captured
+text cancel the capture, since what is typed there can't be replaced afterwards.
+"""
+
+from enum import Enum, auto
+from typing import Final
+
+
+class CaptureAction(Enum):
+    INSERT = auto()
+    BACKSPACE = auto()
+    DELETE = auto()
+    LEFT = auto()
+    RIGHT = auto()
+    HOME = auto()
+    END = auto()
+    LEAVE = auto()  # Moves to another line or page
+    FINISH = auto()  # Space at the end of the text, converts it
+    CANCEL = auto()
+    IGNORE = auto()
+
+
+# Actions for key names, any other single character is inserted and the remaining keys are ignored.
+# The names are the same for pynput, evdev and the keyboard module, except for the page keys.
+KEY_ACTIONS: Final[dict[str, CaptureAction]] = {
+    "space": CaptureAction.FINISH,
+    "backspace": CaptureAction.BACKSPACE,
+    "delete": CaptureAction.DELETE,
+    "left": CaptureAction.LEFT,
+    "right": CaptureAction.RIGHT,
+    "home": CaptureAction.HOME,
+    "end": CaptureAction.END,
+    "up": CaptureAction.LEAVE,
+    "down": CaptureAction.LEAVE,
+    "page_up": CaptureAction.LEAVE,
+    "page_down": CaptureAction.LEAVE,
+    "page up": CaptureAction.LEAVE,
+    "page down": CaptureAction.LEAVE,
+    "esc": CaptureAction.CANCEL,
+}
+
+# Actions that change the captured text, rather than only the cursor
+EDIT_ACTIONS: Final[frozenset[CaptureAction]] = frozenset(
+    (CaptureAction.INSERT, CaptureAction.BACKSPACE, CaptureAction.DELETE))
+
+
+def action_for(key: str) -> CaptureAction:
+    action = KEY_ACTIONS.get(key)
+    if action is not None:
+        return action
+
+    return CaptureAction.INSERT if len(key) == 1 else CaptureAction.IGNORE
+
+
+class CaptureBuffer:
+    """
+    Gap buffer, the characters before the cursor are kept in order and the ones after it in
+    reverse order, so typing, deleting and moving the cursor by one are all O(1).
+    The text before the activation point or after the end of the captured text isn't known,
+    so a key moving the cursor or deleting outside the captured text cancels, as do Home and End.
+    With `clamp_cursor`, for a buffer simulating a whole text field, the cursor is kept within
+    the text instead and Home and End move to its start and end.
+    """
+    def __init__(self, text: str = "", clamp_cursor: bool = False):
+        self.before = list(text)
+        self.after = list[str]()
+        self.clamp_cursor = clamp_cursor
+
+    def __len__(self) -> int:
+        return len(self.before) + len(self.after)
+
+    @property
+    def cursor(self) -> int:
+        return len(self.before)
+
+    @property
+    def at_end(self) -> bool:
+        return not self.after
+
+    @property
+    def text(self) -> str:
+        return self.text_before_cursor + "".join(reversed(self.after))
+
+    @property
+    def text_before_cursor(self) -> str:
+        return "".join(self.before)
+
+    def insert(self, text: str):
+        self.before.extend(text)
+
+    def backspace(self, count: int = 1):
+        del self.before[max(len(self.before) - count, 0):]
+
+    def apply(self, key: str) -> CaptureAction:
+        """
+        Applies a key press to the text and cursor, returning what it did.
+        Space in the middle of the text is typed like any other character, conversion only
+        happens at the end, where the output replaces everything before the cursor.
+        """
+        action = action_for(key)
+
+        match action:
+            case CaptureAction.INSERT:
+                self.before.append(key)
+            case CaptureAction.FINISH if self.after:
+                self.before.append(" ")
+                action = CaptureAction.INSERT
+            case CaptureAction.BACKSPACE if self.before:
+                self.before.pop()
+            case CaptureAction.DELETE if self.after:
+                self.after.pop()
+            case CaptureAction.LEFT if self.before:
+                self.after.append(self.before.pop())
+            case CaptureAction.RIGHT if self.after:
+                self.before.append(self.after.pop())
+            case CaptureAction.HOME if self.clamp_cursor:
+                self.after.extend(reversed(self.before))
+                self.before.clear()
+            case CaptureAction.END if self.clamp_cursor:
+                self.before.extend(reversed(self.after))
+                self.after.clear()
+            case CaptureAction.FINISH | CaptureAction.CANCEL | CaptureAction.IGNORE:
+                pass
+            case _ if self.clamp_cursor:
+                action = CaptureAction.IGNORE  # Nothing to delete or move past
+            case _:
+                action = CaptureAction.CANCEL  # Leaves the captured text
+
+        return action
@@ -0,0 +1,289 @@
+"""
+Clipboard backends used by the Linux input client to paste translations.
+The X11 backend owns the CLIPBOARD selection from a long-lived in-process window, so setting
+the clipboard is a single request to the X server instead of spawning xclip on every write.
+"""
+
+from contextlib import contextmanager
+import logging
+import os
+import threading
+from subprocess import Popen, PIPE, DEVNULL, run, SubprocessError, TimeoutExpired
+from typing import Final, Iterator, Protocol
+
+logger = logging.getLogger(__name__)
+
+# Time allowed for the previous clipboard owner to hand over its contents
+CLIPBOARD_READ_TIMEOUT: Final[float] = 0.2
+# The pasting application requests the clipboard contents some time after receiving Ctrl+V,
+# so the previous contents can only be restored once it had time to do so
+CLIPBOARD_RESTORE_DELAY: Final[float] = 0.5
+
+
+class Clipboard(Protocol):
+    def set_text(self, text: str): ...
+
+    def get_text(self) -> str | None: ...
+
+
+class XclipClipboard:
+    """
+    Spawns `xclip` for every operation, requires xclip to be installed
+    """
+    def set_text(self, text: str):
+        p = Popen(['xclip', '-selection', 'clipboard'], stdin=PIPE)
+        p.communicate(input=text.encode('utf-8'))
+        p.wait()
+
+    def get_text(self) -> str | None:
+        try:
+            p = run(['xclip', '-selection', 'clipboard', '-o'], capture_output=True,
+                    timeout=CLIPBOARD_READ_TIMEOUT)
+        except (OSError, SubprocessError):
+            return None
+
+        return p.stdout.decode('utf-8', errors='replace') if p.returncode == 0 else None
+
+
+class WaylandClipboard:
+    """
+    Uses `wl-copy` and `wl-paste` from wl-clipboard. Wayland only allows the focused client to
+    own the clipboard, so wl-copy stays the owner in the background after returning
+    """
+    def set_text(self, text: str):
+        p = Popen(['wl-copy', '--type', 'text/plain;charset=utf-8'], stdin=PIPE, stdout=DEVNULL)
+        p.communicate(input=text.encode('utf-8'))
+
+    def get_text(self) -> str | None:
+        try:
+            p = run(['wl-paste', '--no-newline', '--type', 'text/plain'], capture_output=True,
+                    timeout=CLIPBOARD_READ_TIMEOUT)
+        except (OSError, SubprocessError):
+            return None
+
+        return p.stdout.decode('utf-8', errors='replace') if p.returncode == 0 else None
+
+
+class XSelectionClipboard:
+    """
+    Owns the X11 CLIPBOARD selection from an unmapped window, answering paste requests
+    on a background thread for as long as the process runs
+    """
+    def __init__(self):
+        import Xlib.threaded  # noqa: F401 Makes the display connection safe to share with the event thread
+        from Xlib import X, display
+
+        self.X = X
+        self.display = display.Display()
+        self.window = self.display.screen().root.create_window(0, 0, 1, 1, 0, X.CopyFromParent)
+
+        self.CLIPBOARD = self.display.intern_atom("CLIPBOARD")
+        self.TARGETS = self.display.intern_atom("TARGETS")
+        self.UTF8_STRING = self.display.intern_atom("UTF8_STRING")
+        self.TEXT = self.display.intern_atom("TEXT")
+        self.STRING = self.display.intern_atom("STRING")
+        self.ATOM = self.display.intern_atom("ATOM")
+        # Property on our window that other owners write the clipboard contents to
+        self.TRANSFER = self.display.intern_atom("LATEX_INPUT_CLIPBOARD")
+
+        self.text: str | None = None
+        self.read_result: str | None = None
+        self.read_finished = threading.Event()
+        self.read_lock = threading.Lock()
+
+        threading.Thread(target=self._event_thread, daemon=True).start()
+
+    def set_text(self, text: str):
+        self.text = text
+        self.window.set_selection_owner(self.CLIPBOARD, self.X.CurrentTime)
+        self.display.flush()
+
+    def get_text(self) -> str | None:
+        if self.text is not None:
+            return self.text  # We are still the owner
+
+        if self.display.get_selection_owner(self.CLIPBOARD) == self.X.NONE:
+            return None
+
+        with self.read_lock:
+            self.read_result = None
+            self.read_finished.clear()
+
+            self.window.convert_selection(self.CLIPBOARD, self.UTF8_STRING, self.TRANSFER, self.X.CurrentTime)
+            self.display.flush()
+
+            if not self.read_finished.wait(CLIPBOARD_READ_TIMEOUT):
+                logger.debug("Timed out reading the clipboard")
+
+            return self.read_result
+
+    def _event_thread(self):
+        while True:
+            e = self.display.next_event()
+
+            if e.type == self.X.SelectionRequest:
+                self._handle_selection_request(e)
+
+            elif e.type == self.X.SelectionClear:
+                self.text = None  # Another application took ownership
+
+            elif e.type == self.X.SelectionNotify:
+                if e.property != self.X.NONE:
+                    prop = self.window.get_full_property(self.TRANSFER, self.X.AnyPropertyType)
+                    self.window.delete_property(self.TRANSFER)
+                    if prop is not None:
+                        value = prop.value
+                        self.read_result = value.decode('utf-8', errors='replace') \
+                            if isinstance(value, bytes) else None
+
+                self.read_finished.set()
+
+    def _handle_selection_request(self, e):
+        from Xlib.protocol import event
+
+        # Obsolete clients don't specify a property, the target is used instead
+        prop = e.property if e.property != self.X.NONE else e.target
+        text = self.text
+
+        if e.selection != self.CLIPBOARD or text is None:
+            prop = self.X.NONE
+
+        elif e.target == self.TARGETS:
+            e.requestor.change_property(
+                prop, self.ATOM, 32, [self.TARGETS, self.UTF8_STRING, self.TEXT, self.STRING])
+
+        elif e.target in (self.UTF8_STRING, self.TEXT):
+            e.requestor.change_property(prop, self.UTF8_STRING, 8, text.encode('utf-8'))
+
+        elif e.target == self.STRING:
+            e.requestor.change_property(prop, self.STRING, 8, text.encode('latin-1', errors='replace'))
+
+        else:
+            prop = self.X.NONE  # Unsupported target
+
+        e.requestor.send_event(event.SelectionNotify(
+            time=e.time,
+            requestor=e.requestor,
+            selection=e.selection,
+            target=e.target,
+            property=prop
+        ))
+        self.display.flush()
+
+
+def make_clipboard() -> Clipboard:
+    if os.environ.get("WAYLAND_DISPLAY"):
+        return WaylandClipboard()
+
+    try:
+        return XSelectionClipboard()
+    except Exception as e:  # python-xlib missing or no X display
+        logger.warning("Falling back to xclip, unable to own the X11 clipboard: %s", e)
+        return XclipClipboard()
+
+
+class PreservingClipboard:
+    """
+    Wraps a clipboard backend to put the user's clipboard contents back after pasting.
+    The previous contents are read in the background while the user is typing, and
+    restored on a timer once the paste has been handled.
+    Saving may overlap with a previous paste that hasn't been restored yet, the contents saved
+    before that paste are kept then, rather than reading back our own text.
+    """
+    def __init__(self, clipboard: Clipboard):
+        self.clipboard = clipboard
+        self.saved_text: str | None = None
+        self.save_thread: threading.Thread | None = None
+        self.restore_timer: threading.Timer | None = None
+        self.lock = threading.Lock()
+
+        # Our text is on the clipboard and the user's is in `saved_text`, until restored
+        self.owns_clipboard = False
+        # Incremented by every paste, so a restore never overwrites a newer paste
+        self.generation = 0
+        # Serializes setting the clipboard for a paste with restoring it
+        self.paste_lock = threading.Lock()
+
+    def save_async(self):
+        with self.lock:
+            if self.owns_clipboard:
+                # Contents from before a previous paste are still waiting to be restored, keep those
+                return
+
+            self.saved_text = None
+            self.save_thread = threading.Thread(target=self._save, daemon=True)
+            self.save_thread.start()
+
+    def _save(self):
+        self.saved_text = self.clipboard.get_text()
+
+    def set_text(self, text: str):
+        with self.lock:
+            save_thread, self.save_thread = self.save_thread, None
+
+        if save_thread:
+            save_thread.join(CLIPBOARD_READ_TIMEOUT)
+
+        with self.paste_lock:
+            with self.lock:
+                self.owns_clipboard = True
+                self.generation += 1
+
+            self.clipboard.set_text(text)
+
+    def restore_later(self, delay: float = CLIPBOARD_RESTORE_DELAY):
+        with self.lock:
+            if self.restore_timer:
+                self.restore_timer.cancel()
+
+            self.restore_timer = threading.Timer(delay, self._restore, args=(self.generation,))
+            self.restore_timer.daemon = True
+            self.restore_timer.start()
+
+    @contextmanager
+    def borrowed(self) -> Iterator[Clipboard]:
+        """
+        The backend, for using the clipboard directly, e.g. to read text back. A pending restore
+        doesn't run meanwhile, the user's contents are put back afterwards instead.
+        """
+        with self.lock:
+            save_thread, self.save_thread = self.save_thread, None
+
+        if save_thread:
+            save_thread.join(CLIPBOARD_READ_TIMEOUT)
+
+        with self.lock:
+            if self.restore_timer:
+                self.restore_timer.cancel()
+                self.restore_timer = None
+
+            needs_saving = not self.owns_clipboard and save_thread is None
+            # Our contents until restored, a restore that is already running finds it outdated
+            self.owns_clipboard = True
+            self.generation += 1
+
+        if needs_saving:
+            self.saved_text = self.clipboard.get_text()
+
+        try:
+            yield self.clipboard
+        finally:
+            self.restore_later()
+
+    def _restore(self, generation: int):
+        with self.paste_lock:
+            with self.lock:
+                if generation != self.generation:
+                    return  # Pasted again since, that paste restores the contents instead
+
+                self.restore_timer = None
+                text = self.saved_text
+
+            if text is not None:
+                try:
+                    self.clipboard.set_text(text)
+                except (OSError, TimeoutExpired) as e:
+                    logger.warning("Failed to restore the clipboard: %s", e)
+
+            with self.lock:
+                self.owns_clipboard = False
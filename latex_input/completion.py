@@ -0,0 +1,40 @@
+from latex_input.unicode_data import latex_symbols
+
+import bisect
+import heapq
+from typing import Final
+
+DEFAULT_COMPLETION_LIMIT: Final[int] = 20
+
+
+class SymbolCompleter:
+    """
+    Prefix completion of symbol names, e.g. `alp` -> `alpha`, using a sorted name list
+    Matches are ranked by usage count, then by length so that the closest match comes first
+    """
+    def __init__(self, symbols: dict[str, str] = latex_symbols):
+        self.symbols = symbols
+        self.names = sorted(symbols)
+        self.usage_counts = dict[str, int]()
+
+    def complete(self, prefix: str, limit: int = DEFAULT_COMPLETION_LIMIT) -> list[tuple[str, str]]:
+        prefix = prefix.removeprefix("\\")
+
+        start = bisect.bisect_left(self.names, prefix)
+        # Every name starting with the prefix sorts before the prefix followed by the highest code point
+        end = bisect.bisect_left(self.names, prefix + "\U0010ffff", lo=start)
+
+        matches = heapq.nsmallest(
+            limit,
+            self.names[start:end],
+            key=lambda name: (-self.usage_counts.get(name, 0), len(name), name)
+        )
+
+        return [(name, self.symbols[name]) for name in matches]
+
+    def record_usage(self, name: str, count: int = 1):
+        if name in self.symbols:
+            self.usage_counts[name] = self.usage_counts.get(name, 0) + count
+
+
+symbol_completer = SymbolCompleter()
@@ -0,0 +1,125 @@
+from latex_input import metrics
+from latex_input.latex_converter import latex_to_unicode, latex_to_unicode_variants, ConversionVariant, FontContext
+
+from collections import OrderedDict
+import threading
+from typing import Final, TypeAlias, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from latex_input.persistent_cache import PersistentCache
+
+DEFAULT_CACHE_SIZE: Final[int] = 4096
+
+CacheKey: TypeAlias = tuple[str, int, bool, bool, bool]
+
+_MISSING: Final = object()
+
+
+class ConversionCache:
+    """
+    Thread-safe LRU cache in front of `latex_to_unicode`
+    Failed conversions (None) are cached as well, as conversion is deterministic
+    With a persistent `store`, the uses of successful conversions are counted there
+    """
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.store: "PersistentCache | None" = None
+        self._entries = OrderedDict[CacheKey, str | None]()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(tex: str, context: FontContext, is_easy_mode: bool) -> CacheKey:
+        return (tex, int(context.formatting), context.is_subscript, context.is_superscript, is_easy_mode)
+
+    def convert(self, tex: str, context: FontContext = FontContext(), is_easy_mode: bool = False,
+                count_use: bool = True) -> str | None:
+        """
+        `count_use` is False for conversions that may not be used, e.g. speculative ones
+        """
+        key = self.make_key(tex, context, is_easy_mode)
+
+        with self._lock:
+            translation = self._entries.get(key, _MISSING)
+
+            if translation is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if translation is _MISSING:
+            # Convert outside of the lock, concurrent misses on the same key are harmless
+            translation = latex_to_unicode(tex, context, is_easy_mode)
+            self.put(key, translation)
+
+        if count_use and translation is not None and self.store:
+            self.store.record_use(key, translation)
+
+        return translation
+
+    def convert_variants(self, tex: str, variants: list[ConversionVariant]) -> list[str | None]:
+        """
+        Like `convert` for each variant, the ones that missed are converted together with a single parse.
+        Uses aren't counted, showing several variants doesn't mean any of them was used.
+        """
+        keys = [self.make_key(tex, context, is_easy_mode) for context, is_easy_mode in variants]
+
+        with self._lock:
+            translations = [self._entries.get(key, _MISSING) for key in keys]
+
+            for key, translation in zip(keys, translations):
+                if translation is not _MISSING:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        missing = [i for i, translation in enumerate(translations) if translation is _MISSING]
+
+        if missing:
+            converted = latex_to_unicode_variants(tex, [variants[i] for i in missing])
+
+            for i, translation in zip(missing, converted):
+                translations[i] = translation
+                self.put(keys[i], translation)
+
+        return translations
+
+    def count_use(self, tex: str, context: FontContext, is_easy_mode: bool, translation: str):
+        """
+        Counts a translation that was used, when it was converted with `count_use` False
+        """
+        if self.store:
+            self.store.record_use(self.make_key(tex, context, is_easy_mode), translation)
+
+    def put(self, key: CacheKey, translation: str | None):
+        with self._lock:
+            self._entries[key] = translation
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def hit_ratio(self) -> float | None:
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+
+# Process-wide cache shared by every front end (input thread, server, editor integrations)
+conversion_cache = ConversionCache()
+
+metrics.Gauge("latex_input_conversion_cache_hit_ratio", "Hit ratio of the shared conversion cache",
+              conversion_cache.hit_ratio)
+metrics.Gauge("latex_input_conversion_cache_entries", "Entries in the shared conversion cache",
+              conversion_cache.__len__)
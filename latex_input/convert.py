@@ -0,0 +1,123 @@
+"""
+Implements `python -m latex_input convert`, which converts one expression per line
+read from stdin or files, for use in shell pipelines.
+Only the converter is imported, so this works on headless machines.
+"""
+
+from latex_input.latex_converter import latex_to_unicode, FontContext
+from latex_input.unicode_structs import FontVariantType
+
+import argparse
+import fileinput
+import functools
+import io
+import logging
+import multiprocessing
+import os
+import sys
+from typing import Final, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_BUFFER_SIZE: Final[int] = 1 << 16
+# Lines are handed to worker processes in chunks to amortize the IPC overhead
+WORKER_CHUNK_SIZE: Final[int] = 256
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m latex_input convert",
+        description="Convert LaTeX expressions to unicode, one expression per line. "
+                    "Lines that fail to convert are written unchanged."
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        metavar="FILE",
+        help="Files to read expressions from, `-` or no files reads stdin"
+    )
+
+    # --math-mode and --no-math-mode
+    parser.add_argument(
+        "--math-mode",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Italic text by default"
+    )
+
+    # --easy-mode and --no-easy-mode
+    parser.add_argument(
+        "--easy-mode",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Accepts `lambda` in place of `\\lambda`. Only works for single symbols"
+    )
+
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of worker processes used for conversion"
+    )
+
+    return parser
+
+
+def convert_line(line: str, context: FontContext, is_easy_mode: bool) -> tuple[str, str | None]:
+    return line, latex_to_unicode(line, context, is_easy_mode)
+
+
+def convert_lines(lines: Iterable[str], context: FontContext, is_easy_mode: bool,
+                  jobs: int = 1) -> Iterator[tuple[str, str | None]]:
+    """
+    Yields (line, translation) pairs in input order, translation is None on failure
+    """
+    convert = functools.partial(convert_line, context=context, is_easy_mode=is_easy_mode)
+
+    if jobs <= 1:
+        yield from map(convert, lines)
+        return
+
+    with multiprocessing.Pool(jobs) as pool:
+        yield from pool.imap(convert, lines, chunksize=WORKER_CHUNK_SIZE)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = get_parser().parse_args(argv)
+
+    context = FontContext(formatting=FontVariantType.ITALIC if args.math_mode else FontVariantType.NONE)
+
+    # Block-buffer the output when writing into a pipe or file, but keep results
+    # appearing as they are entered when used interactively
+    out = io.TextIOWrapper(
+        io.BufferedWriter(io.FileIO(sys.stdout.fileno(), "w", closefd=False), OUTPUT_BUFFER_SIZE),
+        encoding="utf-8",
+        line_buffering=sys.stdout.isatty()
+    )
+
+    num_failed = 0
+
+    try:
+        with fileinput.input(args.files or ["-"], encoding="utf-8") as lines:
+            stripped_lines = (line.rstrip("\r\n") for line in lines)
+
+            for line, translation in convert_lines(stripped_lines, context, args.easy_mode, args.jobs):
+                if translation is None:
+                    num_failed += 1
+                    translation = line
+
+                out.write(translation)
+                out.write("\n")
+
+        out.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`), silence the flush at interpreter exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+    if num_failed:
+        logger.warning("%d line(s) failed to convert", num_failed)
+        return 1
+
+    return 0
@@ -0,0 +1,156 @@
+"""
+Keeps the last few activations in memory, so that when something is typed wrong the details of what
+happened can be dumped after the fact: the captured text, its translation, how it was written and
+how long each stage took.
+The records are allocated once and overwritten in turn, so memory stays bounded however long the
+application runs, and recording an activation only assigns fields.
+"""
+
+from latex_input.output_writer import OutputResult
+from latex_input.paths import user_cache_dir
+
+from dataclasses import asdict, dataclass, fields
+import json
+import logging
+from pathlib import Path
+import threading
+import time
+from typing import Final, TextIO
+
+logger = logging.getLogger(__name__)
+
+FLIGHT_RECORDER_SIZE: Final[int] = 256
+# Longer ASTs are cut off in dumps
+AST_SUMMARY_LENGTH: Final[int] = 500
+
+
+@dataclass(slots=True)
+class ActivationRecord:
+    sequence: int = -1          # Increasing with every record, -1 while the slot is unused
+    time: float = 0.0           # `time.time` when the input was captured
+    text: str = ""              # Captured input
+    is_math_mode: bool = False
+    is_easy_mode: bool = False
+    translation: str | None = None
+    convert_time: float = 0.0   # Seconds to translate, short when speculative conversion was ready
+    output_wait: float = 0.0    # Seconds queued behind earlier output
+    output_time: float = 0.0    # Seconds spent writing
+    num_backspace: int = 0      # Backspaces sent
+    written: str = ""           # Text written, shorter than the translation's edit when cancelled
+    backend: str | None = None  # Output strategy that wrote last, e.g. `clipboard`
+    cancelled: bool = False
+    error: str | None = None    # Exception that stopped the output
+
+    def reset(self):
+        for name, default in _RECORD_DEFAULTS:
+            setattr(self, name, default)
+
+
+_RECORD_DEFAULTS: Final[tuple[tuple[str, object], ...]] = tuple((f.name, f.default) for f in fields(ActivationRecord))
+
+
+def describe_conversion(record: ActivationRecord) -> tuple[str | None, str | None]:
+    """
+    Summary of the parsed AST and the conversion error, if any.
+    Found by converting the text again when dumping, conversion is deterministic.
+    """
+    from latex_input.latex_converter import FontContext, LatexRDescentParser
+    from latex_input.unicode_structs import FontVariantType
+
+    try:
+        ast = LatexRDescentParser().parse(record.text)
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+    summary = repr(ast)
+    if len(summary) > AST_SUMMARY_LENGTH:
+        summary = summary[:AST_SUMMARY_LENGTH] + "…"
+
+    if record.translation is not None:
+        return summary, None
+
+    context = FontContext(formatting=FontVariantType.ITALIC if record.is_math_mode else FontVariantType.NONE)
+
+    try:
+        ast.convert(context)
+    except Exception as e:
+        return summary, f"{type(e).__name__}: {e}"
+
+    return summary, None
+
+
+class FlightRecorder:
+    """
+    Ring buffer of the last `capacity` activations. Records are filled in from the input thread and
+    the output writer's thread, and may be read from any thread while they are.
+    """
+    def __init__(self, capacity: int = FLIGHT_RECORDER_SIZE):
+        self.slots = [ActivationRecord() for _ in range(capacity)]
+        self.next_sequence = 0
+        self.lock = threading.Lock()
+
+    def begin(self, text: str, is_math_mode: bool, is_easy_mode: bool) -> ActivationRecord:
+        """
+        Overwrites the oldest record with a new activation, the caller fills in the rest
+        """
+        with self.lock:
+            sequence = self.next_sequence
+            self.next_sequence += 1
+
+        record = self.slots[sequence % len(self.slots)]
+        record.reset()
+        record.time = time.time()
+        record.text = text
+        record.is_math_mode = is_math_mode
+        record.is_easy_mode = is_easy_mode
+        record.sequence = sequence
+
+        return record
+
+    def record_output(self, result: OutputResult, backend: str | None = None):
+        """
+        Fills in how the activation's translation was written, unless its record was overwritten since
+        """
+        sequence = result.job.record_sequence
+        record = self.slots[sequence % len(self.slots)]
+
+        if sequence < 0 or record.sequence != sequence:
+            return
+
+        record.output_wait = result.start - result.job.submitted
+        record.output_time = result.end - result.start
+        record.num_backspace = result.num_backspace
+        record.written = result.job.edit.text[:result.num_written]
+        record.backend = backend
+        record.cancelled = result.cancelled
+        record.error = result.error
+
+    def records(self) -> list[ActivationRecord]:
+        """
+        Copies of the records, oldest first
+        """
+        records = [ActivationRecord(**asdict(record)) for record in self.slots if record.sequence >= 0]
+        return sorted(records, key=lambda record: record.sequence)
+
+    def dump(self, file: TextIO):
+        """
+        Writes the records as JSON lines, oldest first
+        """
+        for record in self.records():
+            ast, conversion_error = describe_conversion(record)
+            file.write(json.dumps(
+                {**asdict(record), "ast": ast, "conversion_error": conversion_error}, ensure_ascii=False) + "\n")
+
+    def dump_to_file(self, directory: Path | None = None) -> Path:
+        path = (directory or user_cache_dir()) / time.strftime("flight_recorder-%Y%m%d-%H%M%S.jsonl")
+
+        with open(path, "w", encoding="utf-8") as f:
+            self.dump(f)
+
+        # Shown at the default log level, the dump was asked for
+        logger.warning("Saved %d recent activations to %s", min(self.next_sequence, len(self.slots)), path)
+        return path
+
+
+# Process-wide recorder, dumped from the tray menu or with SIGUSR1
+flight_recorder = FlightRecorder()
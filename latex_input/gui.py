@@ -0,0 +1,170 @@
+"""
+Configuration window and tray icon, only imported when running with a GUI as PyQt6 is slow to import.
+"""
+
+from latex_input import app
+
+from importlib.resources import files
+from PyQt6 import QtGui, QtWidgets, QtCore
+import sys
+from typing import Final
+
+APP_ICON_FILE: Final[str] = str(files('latex_input.data').joinpath('icon.ico'))
+APP_ACTIVATED_ICON_FILE: Final[str] = str(files('latex_input.data').joinpath('icon_activated.ico'))
+TEXT_EDIT_FONTSIZE: Final[int] = 12
+SIGNAL_CHECK_INTERVAL_MS: Final[int] = 250
+
+tray_icon: QtWidgets.QSystemTrayIcon | None = None
+
+
+def set_icon_state(activated: bool):
+    if tray_icon:
+        tray_icon.set_activated(activated)
+
+
+class SystemTrayIcon(QtWidgets.QSystemTrayIcon):
+    """
+    `set_activated` may be called from any thread. It never blocks, the icon is updated on the
+    GUI thread, and changes made faster than the GUI thread handles them are coalesced so only
+    the latest state is shown.
+    """
+    show_clicked = QtCore.pyqtSignal()
+    clicked = QtCore.pyqtSignal()
+    _state_changed = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None):
+        # Both icons are loaded once, switching between them doesn't touch the disk
+        self.icons = {False: QtGui.QIcon(APP_ICON_FILE), True: QtGui.QIcon(APP_ACTIVATED_ICON_FILE)}
+        self.shown_state = False
+        self.latest_state = False
+        self.update_pending = False
+
+        QtWidgets.QSystemTrayIcon.__init__(self, self.icons[False], parent)
+        self._state_changed.connect(self._update_icon, QtCore.Qt.ConnectionType.QueuedConnection)
+        menu = QtWidgets.QMenu(parent)
+        showAction = menu.addAction("Show")
+        dumpAction = menu.addAction("Save recent activations")
+        exitAction = menu.addAction("Exit")
+        self.setContextMenu(menu)
+
+        exitAction.triggered.connect(self.exit)
+        showAction.triggered.connect(self.show_clicked)
+        dumpAction.triggered.connect(self.dump_flight_recorder)
+        self.activated.connect(self._handle_activated)
+
+    def dump_flight_recorder(self):
+        if path := app.dump_flight_recorder():
+            self.showMessage(app.APP_NAME, f"Saved recent activations to {path}")
+
+    def exit(self):
+        QtCore.QCoreApplication.exit()
+
+    def set_activated(self, activated: bool):
+        self.latest_state = activated
+
+        # At most one update is queued, it shows whichever state is the latest when it runs
+        if not self.update_pending:
+            self.update_pending = True
+            self._state_changed.emit()
+
+    def _update_icon(self):
+        # Cleared before reading the state, so a change made meanwhile queues another update
+        self.update_pending = False
+        activated = self.latest_state
+
+        if activated != self.shown_state:
+            self.shown_state = activated
+            self.setIcon(self.icons[activated])
+
+    def _handle_activated(self, reason):
+        if reason == QtWidgets.QSystemTrayIcon.ActivationReason.Trigger:
+            self.clicked.emit()
+
+
+def show_tray_icon() -> SystemTrayIcon:
+    """
+    Shows the tray icon and has it follow whether input is being captured
+    """
+    global tray_icon
+
+    tray_icon = SystemTrayIcon()
+    tray_icon.show()
+    app.icon_state_handler = set_icon_state
+
+    return tray_icon
+
+
+def run_gui():
+    qt_app = QtWidgets.QApplication(sys.argv)
+    window = QtWidgets.QWidget()
+    window.setWindowIcon(QtGui.QIcon(APP_ICON_FILE))
+    window.setWindowTitle(app.APP_NAME)
+    layout = QtWidgets.QVBoxLayout(window)
+    layout.addWidget(QtWidgets.QLabel(
+        "How to use:"
+        "<ol>"
+        f"<li>Press <b>{app.ACTIVATION_HOTKEY}</b> to enter input mode</li>"
+        "<li>Enter your desired LaTeX</li>"
+        "<li>Press <b>Space</b> to translate the text</li>"
+        "<li>Press <b>Esc</b> to exit input mode</li>"
+        "</ol>"
+        "Try it in the text box below:"))
+    text_edit = QtWidgets.QTextEdit(window)
+    text_edit_font = text_edit.font()
+    text_edit_font.setPointSize(TEXT_EDIT_FONTSIZE)
+    text_edit.setFont(text_edit_font)
+    layout.addWidget(text_edit)
+
+    easy_mode_checkbox = QtWidgets.QCheckBox(
+        "Easy mode — don't require backslash for single symbols"
+    )
+    easy_mode_checkbox.setChecked(app.is_easy_mode)
+
+    math_mode_checkbox = QtWidgets.QCheckBox(
+        "Math mode — italic text by default"
+    )
+    math_mode_checkbox.setChecked(app.is_math_mode)
+
+    key_delay_checkbox = QtWidgets.QCheckBox(
+        "Slower key presses (some applications need this to work properly — including this window)"
+    )
+    key_delay_checkbox.setChecked(app.use_key_delay)
+
+    def on_easymode_checked(state: bool):
+        app.is_easy_mode = state
+
+    def on_mathmode_checked(state: bool):
+        app.is_math_mode = state
+
+    def on_keydelay_checked(state: bool):
+        app.use_key_delay = state
+
+    easy_mode_checkbox.clicked.connect(on_easymode_checked)
+    math_mode_checkbox.clicked.connect(on_mathmode_checked)
+    key_delay_checkbox.clicked.connect(on_keydelay_checked)
+
+    layout.addWidget(easy_mode_checkbox)
+    layout.addWidget(math_mode_checkbox)
+    layout.addWidget(key_delay_checkbox)
+
+    icon = show_tray_icon()
+
+    def trigger_window(show: bool):
+        if show:
+            window.show()
+            window.raise_()
+            window.activateWindow()
+        else:
+            window.hide()
+
+    icon.clicked.connect(lambda: trigger_window(not window.isVisible()))
+    icon.show_clicked.connect(lambda: trigger_window(True))
+
+    # Qt's event loop doesn't run Python code by itself, this lets signal handlers run, e.g. for SIGUSR1
+    signal_timer = QtCore.QTimer()
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(SIGNAL_CHECK_INTERVAL_MS)
+
+    # Don't close application if the configuration window is closed
+    qt_app.setQuitOnLastWindowClosed(False)
+    qt_app.exec()
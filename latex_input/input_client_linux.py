@@ -1,87 +1,364 @@
-from pynput import keyboard as pkeyboard  # Differentiate from keyboard module
+from latex_input import uinput_linux
+from latex_input.capture_buffer import CaptureAction, CaptureBuffer, EDIT_ACTIONS
+from latex_input.clipboard_linux import make_clipboard, PreservingClipboard
+from latex_input.output_strategy import CostModel, OutputStrategy, StrategySelector
+from latex_input.pacing import PacingScheduler
+from latex_input.pacing_profiles import READ_BACK_SETTLE_TIME
+from latex_input.trace import TraceEventKind, TraceWriter
+from latex_input.uinput_linux import EvdevKeyReader, UinputKeyboard
+from latex_input.xtest_linux import InjectedKeys, KeysymRemapWriter, XTestKeyboard, PynputKeyboard
+
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum, auto
+import logging
+import os
 from queue import Queue
-from subprocess import Popen, PIPE
+import threading
 import time
+from typing import Callable, Final, Iterator
+import unicodedata
+
+try:
+    from pynput import keyboard as pkeyboard  # Differentiate from keyboard module
+except ImportError:  # pynput needs an X display, which pure Wayland sessions don't have
+    pkeyboard = None
+
+logger = logging.getLogger(__name__)
+
+# Rough initial costs of the output strategies, in seconds, refined from observed timings
+CLIPBOARD_PRIOR_COST: Final[float] = 0.005
+PYNPUT_PRIOR_COST_PER_CHAR: Final[float] = 0.002
+# One mapping request per batch of up to 32 distinct characters, the key events are batched too
+KEYSYM_REMAP_PRIOR_COST: Final[float] = 0.001
+KEYSYM_REMAP_PRIOR_COST_PER_CHAR: Final[float] = 0.0002
+# Strategies typing the output key by key, most preferred first
+TYPING_STRATEGIES: Final[tuple[str, ...]] = ("keysym_remap", "pynput")
+
+
+def is_wayland_session() -> bool:
+    """
+    X11 clients, including ours through Xwayland, don't see the keys typed into native Wayland windows
+    """
+    return bool(os.environ.get("WAYLAND_DISPLAY")) or os.environ.get("XDG_SESSION_TYPE") == "wayland" \
+        or not os.environ.get("DISPLAY")
+
+
+if pkeyboard is not None:
+    class KeycodeListener(pkeyboard.Listener):
+        """
+        Keeps the X keycode of the event being handled in `keycode`, pynput only passes on the key.
+        Extends the X11 backend's `_handle_message`, which every event goes through.
+        """
+        keycode = 0
+
+        def _handle_message(self, display, event, *args):
+            self.keycode = event.detail
+            super()._handle_message(display, event, *args)
+
+
+class CaptureState(Enum):
+    IDLE = auto()        # Waiting for the hotkey
+    CAPTURING = auto()   # Recording key presses for `listen`
+    CONVERTING = auto()  # Converting and writing, our own injected keys must be ignored
 
 
 class InputClient:
-    def __init__(self):
-        self.key_log = ""
-        self.queue = Queue(1)
-        self.controller = pkeyboard.Controller()
+    """
+    A single keyboard listener runs for the lifetime of the client, so hotkey detection and
+    capture share one event stream and keys typed right after the hotkey are never lost.
+    Uses X11 through pynput and XTEST, or uinput and evdev on Wayland or when `use_uinput` is True.
+    X11 is preferred, its capture follows the keyboard layout where uinput and evdev assume a US layout.
+    Keys are passed around as characters or pynput-style key names such as `space` or `esc`.
+    Output may be written from another thread while the next input is being captured, keys
+    injected by the client itself are never captured, except with the pynput output fallback.
+    """
+    filters_own_output = True
 
-    def wait_for_hotkey(self):
-        def on_activate():
-            # Stop the listener thread once the hotkey is pressed
-            l.stop()
+    def __init__(self, use_uinput: bool | None = None):
+        self.clipboard = PreservingClipboard(make_clipboard())
+
+        self.state = CaptureState.IDLE
+        self.state_lock = threading.Lock()
+        self.activated = threading.Event()
+        self.key_events = Queue[str]()
+
+        # Statistics, see `activation_latency_percentiles` and `num_ignored_keys`
+        self.activation_time = 0.0
+        self.activation_latencies = deque[float](maxlen=1000)
+        self.num_ignored_keys = 0
+
+        # Records the activations and the keys captured for them when set, never other typing
+        self.trace_writer: TraceWriter | None = None
+
+        # The X11 listener sees our own XTEST key presses, they're told apart from the user's one by one
+        self.injected_keys = InjectedKeys()
+        self.sees_own_output = False
+
+        # Called on Esc and on the hotkey, to stop output that is being written
+        self.interrupt_handler: Callable[[], None] | None = None
+
+        self.keyboard: UinputKeyboard | XTestKeyboard | PynputKeyboard
+        self.controller = pkeyboard.Controller() if pkeyboard else None
+        self.remap_writer: KeysymRemapWriter | None = None
+
+        if use_uinput is None:
+            use_uinput = is_wayland_session()
+
+        if not (use_uinput and self._init_uinput()):
+            self._init_x11()
 
-        def for_canonical(f):
-            return lambda k: f(l.canonical(k))
+        self.output = StrategySelector(self._output_strategies())
 
-        hotkey = pkeyboard.HotKey(
+    def _init_uinput(self) -> bool:
+        if not uinput_linux.is_available():
+            logger.warning("Falling back to X11, /dev/uinput or /dev/input aren't accessible")
+            return False
+
+        try:
+            self.keyboard = UinputKeyboard()
+            self.key_reader = EvdevKeyReader(self._on_key, self._on_hotkey)
+        except OSError as e:
+            logger.warning("Falling back to X11, unable to use uinput and evdev: %s", e)
+            return False
+
+        logger.info("Using uinput for output and evdev for input")
+        return True
+
+    def _init_x11(self):
+        if pkeyboard is None:
+            raise RuntimeError("Requires either access to /dev/uinput and /dev/input, or an X display")
+
+        try:
+            self.keyboard = XTestKeyboard()
+        except Exception as e:  # No X connection or XTEST extension
+            logger.warning("Falling back to pynput for output, XTEST is unavailable: %s", e)
+            self.keyboard = PynputKeyboard(self.controller)
+            # pynput sends special keys such as BackSpace without marking them as injected,
+            # so the next input is only captured once the output is written
+            self.filters_own_output = False
+
+        if isinstance(self.keyboard, XTestKeyboard):
+            self.keyboard.on_press_keycode = self.injected_keys.expect
+
+            try:
+                self.remap_writer = KeysymRemapWriter(self.keyboard)
+            except Exception as e:
+                logger.warning("Unable to type by remapping keysyms: %s", e)
+
+        self.sees_own_output = True
+        self.hotkey = pkeyboard.HotKey(
             pkeyboard.HotKey.parse("<ctrl>+<shift>+i"),
-            on_activate)
-        with pkeyboard.Listener(
-                on_press=for_canonical(hotkey.press),
-                on_release=for_canonical(hotkey.release)) as l:
-            l.join()
-
-    def listen(self, starting_text: str) -> str | None:
-        self.key_log = starting_text
-
-        with pkeyboard.Events() as events:
-            for e in events:
-                if isinstance(e, pkeyboard.Events.Release):
-                    continue
-
-                if e.key == pkeyboard.Key.space:
-                    self.queue.put(self.key_log)
-                    break
-                elif e.key == pkeyboard.Key.backspace:
-                    if self.key_log:
-                        self.key_log = self.key_log[:-1]
-                elif e.key == pkeyboard.Key.esc:
-                    self.queue.put(None)
-                    break
-                else:
-                    try:
-                        self.key_log += e.key.char
-                    except AttributeError:
-                        pass
-
-        text = self.queue.get()
-        self.key_log = ""
-
-        return text
+            self._on_hotkey)
+        self.listener = KeycodeListener(on_press=self._on_pynput_press, on_release=self._on_pynput_release)
+        self.listener.start()
+        self.listener.wait()
+
+    def _output_strategies(self) -> list[OutputStrategy]:
+        strategies = [OutputStrategy(
+            "clipboard", lambda text, delay: self._write_clipboard(text), CostModel(CLIPBOARD_PRIOR_COST, 0.0),
+            interruptible=False)]
+
+        if self.sees_own_output:  # Typing through pynput needs X11
+            strategies.append(OutputStrategy(
+                "pynput", self._write_pynput, CostModel(0.0, PYNPUT_PRIOR_COST_PER_CHAR, keys_per_char=1),
+                # Combining characters can't be typed on their own
+                supports=lambda text: not any(unicodedata.combining(c) for c in text)))
+
+        if self.remap_writer:
+            strategies.append(OutputStrategy(
+                "keysym_remap", self._write_keysym_remap,
+                CostModel(KEYSYM_REMAP_PRIOR_COST, KEYSYM_REMAP_PRIOR_COST_PER_CHAR, keys_per_char=1)))
+
+        return strategies
+
+    def _on_pynput_press(self, key, injected: bool = False):
+        # Keys typed by pynput's controller are passed with `injected` set, ours sent through XTEST aren't
+        if injected or self.injected_keys.take(self.listener.keycode):
+            self.num_ignored_keys += 1
+            return
+
+        was_idle = self.state is CaptureState.IDLE
+
+        self.hotkey.press(self.listener.canonical(key))
+
+        if key is None or (was_idle and self.state is CaptureState.CAPTURING):
+            return  # The key completed the hotkey
+
+        if isinstance(key, pkeyboard.Key):
+            self._on_key(key.name)
+        elif key.char:
+            self._on_key(key.char)
+
+    def _on_pynput_release(self, key, injected: bool = False):
+        self.hotkey.release(self.listener.canonical(key))
+
+    def _on_key(self, key: str):
+        if key == "esc" and self.interrupt_handler:
+            self.interrupt_handler()  # Never injected by us
+
+        if self.state is CaptureState.CONVERTING:
+            self.num_ignored_keys += 1
+            return
+
+        if self.state is CaptureState.CAPTURING:
+            if self.trace_writer:
+                self.trace_writer.record(TraceEventKind.KEY, key)
+
+            self.key_events.put(key)
+
+    def _on_hotkey(self):
+        if self.interrupt_handler:
+            self.interrupt_handler()
+
+        with self.state_lock:
+            if self.state is not CaptureState.IDLE:
+                return
+
+            self.activation_time = time.perf_counter()
+            self.state = CaptureState.CAPTURING
+
+        if self.trace_writer:
+            self.trace_writer.record(TraceEventKind.HOTKEY)
+
+        self.activated.set()
+
+    def set_interrupt_handler(self, handler: Callable[[], None]):
+        self.interrupt_handler = handler
+
+    def _set_state(self, state: CaptureState):
+        with self.state_lock:
+            self.state = state
+
+    def wait_for_hotkey(self):
+        with self.state_lock:
+            if self.state is CaptureState.CONVERTING:
+                # Drop anything left over from the previous activation
+                while not self.key_events.empty():
+                    self.key_events.get_nowait()
+
+                self.activated.clear()
+                self.state = CaptureState.IDLE
+
+        self.activated.wait()
+
+        latency = time.perf_counter() - self.activation_time
+        self.activation_latencies.append(latency)
+        logger.debug("Activated after %.3f ms", latency * 1e3)
+
+        # Read the user's clipboard while they type, so it can be restored after pasting
+        self.clipboard.save_async()
+
+    def listen(self, starting_text: str, on_change: Callable[[str], None] | None = None) -> str | None:
+        """
+        `on_change` is called with the captured text whenever it changes
+        """
+        buffer = CaptureBuffer(starting_text)
+        # Also resumes capturing when re-listening after a failed translation
+        self._set_state(CaptureState.CAPTURING)
+
+        while True:
+            action = buffer.apply(self.key_events.get())
+
+            if action is CaptureAction.FINISH:
+                break
+            elif action is CaptureAction.CANCEL:
+                self._set_state(CaptureState.CONVERTING)
+                return None
+            elif on_change and action in EDIT_ACTIONS:
+                on_change(buffer.text)
+
+        self._set_state(CaptureState.CONVERTING)
+
+        return buffer.text
+
+    def activation_latency_percentiles(self) -> dict[int, float] | None:
+        """
+        Time in seconds from the hotkey press to `wait_for_hotkey` returning
+        """
+        if len(self.activation_latencies) < 2:
+            return None
+
+        latencies = sorted(self.activation_latencies)
+        return {p: latencies[min(len(latencies) - 1, len(latencies) * p // 100)] for p in (50, 90, 99)}
 
     def write(self, text: str, delay: float = 0.0):
-        # self._write_pynput(char)
-        # self._write_ctrlshiftu(char)
-        self._write_clipboard(text)
+        # Pastes or types, whichever is expected to be faster for this text
+        self.output.write(text, delay)
 
-    def send_backspace(self, num_backspace: int, delay: float = 0.0):
-        for _ in range(num_backspace):
-            self.controller.press(pkeyboard.Key.backspace)
-            self.controller.release(pkeyboard.Key.backspace)
+    def active_window_class(self) -> str | None:
+        """
+        Class from the focused window's WM_CLASS, None when it can't be determined (e.g. Wayland)
+        """
+        display = getattr(self.keyboard, "display", None)
+        if display is None:
+            return None
+
+        from Xlib import X, error
 
-            # self._accurate_delay(delay)
+        try:
+            active = display.screen().root.get_full_property(
+                display.intern_atom("_NET_ACTIVE_WINDOW"), X.AnyPropertyType)
+            if not active or not active.value[0]:
+                return None
 
-    def _accurate_delay(self, delay):
+            wm_class = display.create_resource_object("window", active.value[0]).get_wm_class()
+        except error.XError:
+            return None
+
+        return wm_class[1] if wm_class else None
+
+    @contextmanager
+    def probing(self) -> Iterator[None]:
         """
-        Function to provide accurate time delay
-        From https://stackoverflow.com/a/50899124
+        Set while tuning the key press delay, see `pacing_profiles.probe_delay`. Probes are typed,
+        a paste would ignore the delay, and the user's clipboard is only restored afterwards, so
+        that the restore doesn't overwrite a probe being read back.
         """
-        target_time = time.perf_counter() + delay
-        while time.perf_counter() < target_time:
-            pass
+        typing = next((name for name in TYPING_STRATEGIES if name in self.output.strategies), None)
+        if typing is None:
+            raise RuntimeError("Output can only be pasted, which doesn't use a key press delay")
+
+        with self.output.forcing(typing), self.clipboard.borrowed():
+            yield
 
-    def _write_pynput(self, char: str):
+    def read_line_before_cursor(self) -> str | None:
         """
-        Write a character to the active window using pynput
+        Reads back the text between the start of the line and the cursor through the clipboard
+        """
+        # An empty selection may not be copied, make sure stale contents aren't read instead
+        self.clipboard.clipboard.set_text("")
+
+        self.keyboard.chord("Shift_L", "Home")
+        self.keyboard.chord("Control_L", "c")
+        self.keyboard.tap("Right")  # Deselect, leaving the cursor where it was
+        self.keyboard.flush()
+
+        time.sleep(READ_BACK_SETTLE_TIME)
+        return self.clipboard.clipboard.get_text()
+
+    def send_backspace(self, num_backspace: int, delay: float = 0.0):
+        # The whole burst is sent at once, with `delay` between key presses paced by the X server
+        self.keyboard.tap("BackSpace", num_backspace, delay)
+        self.keyboard.flush()
+
+    def _write_pynput(self, text: str, delay: float = 0.0):
+        """
+        Write text to the active window using pynput, which temporarily maps characters
+        missing from the keyboard layout onto a spare key
         Note: This doesn't always work, for example \\bigodot
         - See https://github.com/moses-palmer/pynput/issues/465
         """
-        self.controller.type(char)
+        pacer = PacingScheduler(delay)
+
+        for c in text:
+            self.controller.type(c)
+            pacer.wait()
+
+    def _write_keysym_remap(self, text: str, delay: float = 0.0):
+        assert self.remap_writer
+
+        self.remap_writer.write(text, delay)
 
     # TODO: Add Ctrl-shift-u method of typing unicode characters
     # in case the pynput method fails for some cases.
@@ -118,19 +395,13 @@ class InputClient:
         """
         Writes the character to the clipboard and pastes it. This seems to work in most cases
         unlike the other methods.
+        The previous clipboard contents are restored shortly after pasting.
         Disadvantages:
-        - Requires xclip to be installed
-        - Overwrites the clipboard contents
+        - Requires python-xlib (installed with pynput) or xclip, or wl-clipboard on Wayland
         - Only works if Ctrl-v is the paste shortcut (not true for terminals)
         """
-        def copy_to_clipboard(text: str):
-            # TODO: Wayland support with wclip
-            p = Popen(['xclip', '-selection', 'clipboard'], stdin=PIPE)
-            p.communicate(input=text.encode('utf-8'))
-            p.wait()
+        self.clipboard.set_text(text)
+        self.keyboard.chord("Control_L", "v")
+        self.keyboard.flush()
 
-        copy_to_clipboard(text)
-        self.controller.press(pkeyboard.Key.ctrl)
-        self.controller.press("v")
-        self.controller.release("v")
-        self.controller.release(pkeyboard.Key.ctrl)
+        self.clipboard.restore_later()
@@ -1,7 +1,25 @@
+from latex_input.output_strategy import CostModel, OutputStrategy, StrategySelector
+from latex_input.pacing import PacingScheduler
+from latex_input.pacing_profiles import READ_BACK_SETTLE_TIME
+
 import ahk
 import atexit
+from contextlib import contextmanager
+import ctypes
 import keyboard
+import threading
 import time
+from typing import Callable, Final, Iterator
+
+CF_UNICODETEXT = 13
+GMEM_MOVEABLE = 0x0002
+
+# The application reads the clipboard some time after receiving Ctrl+V
+CLIPBOARD_RESTORE_DELAY: Final[float] = 0.5
+
+# Rough initial costs of the output strategies, in seconds, refined from observed timings
+KEYSTROKE_PRIOR_COST_PER_CHAR: Final[float] = 0.0003
+CLIPBOARD_PRIOR_COST: Final[float] = 0.03
 
 ahk_wait_activation = r"""
 #NoEnv
@@ -63,6 +81,22 @@ class InputClient:
     def __init__(self):
         self.ahk = ahk.AHK()
         self.proc = None
+        self.interrupt_handler: Callable[[], None] | None = None
+
+        # The user's clipboard contents, restored after pasting
+        self.saved_clipboard: str | None = None
+        self.restore_timer: threading.Timer | None = None
+        # Incremented by every paste, so a restore that was already waiting for the lock never
+        # overwrites a newer paste
+        self.clipboard_generation = 0
+        self.clipboard_lock = threading.Lock()
+
+        self.output = StrategySelector([
+            OutputStrategy("keystrokes", self._write_keystrokes,
+                           CostModel(0.0, KEYSTROKE_PRIOR_COST_PER_CHAR, keys_per_char=1)),
+            OutputStrategy("clipboard", lambda text, delay: self._write_clipboard(text),
+                           CostModel(CLIPBOARD_PRIOR_COST, 0.0), interruptible=False),
+        ])
 
         atexit.register(self._kill_proc)
 
@@ -70,10 +104,24 @@ class InputClient:
         if self.proc:
             self.proc.kill()
 
+    def set_interrupt_handler(self, handler: Callable[[], None]):
+        """
+        `handler` is called on Esc and on the hotkey, to stop output that is being written
+        """
+        self.interrupt_handler = handler
+        keyboard.on_press_key("esc", lambda _: handler())
+
     def wait_for_hotkey(self):
         self._do_script(ahk_wait_activation)
 
-    def listen(self, starting_text: str) -> str | None:
+        if self.interrupt_handler:
+            self.interrupt_handler()
+
+    def listen(self, starting_text: str, on_change: Callable[[str], None] | None = None) -> str | None:
+        """
+        `on_change` is called with the captured text whenever it changes.
+        AutoHotkey only reports the text on backspace and at the end, so that's when it is called.
+        """
         result = starting_text
 
         while True:
@@ -86,6 +134,8 @@ class InputClient:
             result = self._add_characters(result, data)
 
             if data.endswith("\b"):
+                if on_change:
+                    on_change(result)
                 continue
 
             break
@@ -93,28 +143,163 @@ class InputClient:
         return result
 
     def write(self, text: str, delay: float = 0.0):
+        # Types or pastes, whichever is expected to be faster for this text
+        self.output.write(text, delay)
+
+    def _write_keystrokes(self, text: str, delay: float = 0.0):
         # self._do_script(f"Send, {char}")
 
-        # FIXME: Can use keyboard.write(text, delay=...) after Python 3.11
+        # Don't use keyboard.write's delay parameter as it sleeps with time.sleep,
+        # which doesn't have good time accuracy until Python 3.11
+        pacer = PacingScheduler(delay)
         for c in text:
-            # Don't use built-in delay parameter as it uses time.sleep
-            # which doesn't have good time accurancy until Python 3.11
             keyboard.write(c)
-            self._accurate_delay(delay)
+            pacer.wait()
 
     def send_backspace(self, num_backspace: int, delay: float = 0.0):
+        pacer = PacingScheduler(delay)
         for _ in range(num_backspace):
             keyboard.send("backspace")
-            self._accurate_delay(delay)
+            pacer.wait()
+
+    def active_window_class(self) -> str | None:
+        hwnd = ctypes.windll.user32.GetForegroundWindow()
+        if not hwnd:
+            return None
+
+        buffer = ctypes.create_unicode_buffer(256)
+        if not ctypes.windll.user32.GetClassNameW(hwnd, buffer, len(buffer)):
+            return None
+
+        return buffer.value
+
+    @contextmanager
+    def probing(self) -> Iterator[None]:
+        """
+        Set while tuning the key press delay, see `pacing_profiles.probe_delay`. Probes are typed,
+        a paste would ignore the delay, and the user's clipboard is only restored afterwards, so
+        that the restore doesn't overwrite a probe being read back.
+        """
+        with self.output.forcing("keystrokes"), self.clipboard_lock:
+            if self.restore_timer:
+                # Contents from before a previous paste are still waiting to be restored, keep those
+                self.restore_timer.cancel()
+                self.restore_timer = None
+            else:
+                self.saved_clipboard = self._read_clipboard()
+            self.clipboard_generation += 1
+
+            try:
+                yield
+            finally:
+                if self.saved_clipboard is not None:
+                    self._set_clipboard(self.saved_clipboard)
 
-    def _accurate_delay(self, delay):
+    def read_line_before_cursor(self) -> str | None:
         """
-        Function to provide accurate time delay
-        From https://stackoverflow.com/a/50899124
+        Reads back the text between the start of the line and the cursor through the clipboard
         """
-        target_time = time.perf_counter() + delay
-        while time.perf_counter() < target_time:
-            pass
+        # An empty selection may not be copied, make sure stale contents aren't read instead
+        self._clear_clipboard()
+
+        keyboard.send("shift+home")
+        keyboard.send("ctrl+c")
+        keyboard.send("right")  # Deselect, leaving the cursor where it was
+
+        time.sleep(READ_BACK_SETTLE_TIME)
+        return self._read_clipboard()
+
+    def _write_clipboard(self, text: str):
+        """
+        Pastes the text, restoring the previous clipboard contents shortly after
+        """
+        with self.clipboard_lock:
+            if self.restore_timer:
+                # Contents from before a previous paste are still waiting to be restored, keep those
+                self.restore_timer.cancel()
+            else:
+                self.saved_clipboard = self._read_clipboard()
+
+            self.clipboard_generation += 1
+            self._set_clipboard(text)
+            keyboard.send("ctrl+v")
+
+            self.restore_timer = threading.Timer(CLIPBOARD_RESTORE_DELAY, self._restore_clipboard,
+                                                 args=(self.clipboard_generation,))
+            self.restore_timer.daemon = True
+            self.restore_timer.start()
+
+    def _restore_clipboard(self, generation: int):
+        with self.clipboard_lock:
+            if generation != self.clipboard_generation:
+                return  # Pasted again since, that paste restores the contents instead
+
+            self.restore_timer = None
+
+            if self.saved_clipboard is not None:
+                self._set_clipboard(self.saved_clipboard)
+
+    def _set_clipboard(self, text: str):
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GlobalAlloc.argtypes = [ctypes.c_uint, ctypes.c_size_t]
+        kernel32.GlobalAlloc.restype = ctypes.c_void_p
+        kernel32.GlobalLock.argtypes = [ctypes.c_void_p]
+        kernel32.GlobalLock.restype = ctypes.c_void_p
+        kernel32.GlobalUnlock.argtypes = [ctypes.c_void_p]
+        kernel32.GlobalFree.argtypes = [ctypes.c_void_p]
+        user32.SetClipboardData.argtypes = [ctypes.c_uint, ctypes.c_void_p]
+        user32.SetClipboardData.restype = ctypes.c_void_p
+
+        data = ctypes.create_unicode_buffer(text)  # Null terminated
+        handle = kernel32.GlobalAlloc(GMEM_MOVEABLE, ctypes.sizeof(data))
+        if not handle:
+            return
+
+        pointer = kernel32.GlobalLock(handle)
+        ctypes.memmove(pointer, data, ctypes.sizeof(data))
+        kernel32.GlobalUnlock(handle)
+
+        if not user32.OpenClipboard(None):
+            kernel32.GlobalFree(handle)
+            return
+
+        try:
+            user32.EmptyClipboard()
+            # The clipboard owns the memory from now on
+            if not user32.SetClipboardData(CF_UNICODETEXT, handle):
+                kernel32.GlobalFree(handle)
+        finally:
+            user32.CloseClipboard()
+
+    def _clear_clipboard(self):
+        if ctypes.windll.user32.OpenClipboard(None):
+            ctypes.windll.user32.EmptyClipboard()
+            ctypes.windll.user32.CloseClipboard()
+
+    def _read_clipboard(self) -> str | None:
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        user32.GetClipboardData.restype = ctypes.c_void_p
+        kernel32.GlobalLock.argtypes = [ctypes.c_void_p]
+        kernel32.GlobalLock.restype = ctypes.c_void_p
+        kernel32.GlobalUnlock.argtypes = [ctypes.c_void_p]
+
+        if not user32.OpenClipboard(None):
+            return None
+
+        try:
+            handle = user32.GetClipboardData(CF_UNICODETEXT)
+            if not handle:
+                return ""
+
+            pointer = kernel32.GlobalLock(handle)
+            try:
+                return ctypes.wstring_at(pointer)
+            finally:
+                kernel32.GlobalUnlock(handle)
+        finally:
+            user32.CloseClipboard()
 
     def _do_script(self, script: str) -> str:
         # We choose blocking=False to get a Popen instance, then block
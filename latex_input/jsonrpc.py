@@ -0,0 +1,233 @@
+"""
+JSON-RPC 2.0 over stdin/stdout for editor integrations, one JSON message per line.
+Methods:
+- convert(text, mathMode=false, easyMode=true) -> string | null
+- convertVariants(text) -> [{mathMode, easyMode, result}], every combination of modes from one parse
+- complete(prefix, limit=20) -> [{name, symbol}]
+- $/cancelRequest(id), a notification cancelling a request that hasn't been answered yet
+Batches (JSON arrays) are supported as per the specification.
+"""
+
+from latex_input.completion import symbol_completer, DEFAULT_COMPLETION_LIMIT
+from latex_input.conversion_cache import conversion_cache
+from latex_input.latex_converter import ConversionVariant, FontContext
+from latex_input.unicode_structs import FontVariantType
+
+import io
+import json
+import logging
+import queue
+import sys
+import threading
+from typing import Any, Final
+
+logger = logging.getLogger(__name__)
+
+PARSE_ERROR: Final[int] = -32700
+INVALID_REQUEST: Final[int] = -32600
+METHOD_NOT_FOUND: Final[int] = -32601
+INVALID_PARAMS: Final[int] = -32602
+INTERNAL_ERROR: Final[int] = -32603
+REQUEST_CANCELLED: Final[int] = -32800  # As used by the Language Server Protocol
+
+CANCEL_METHOD: Final[str] = "$/cancelRequest"
+
+
+class JsonRpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _math_mode_context(math_mode: bool) -> FontContext:
+    return FontContext(formatting=FontVariantType.ITALIC if math_mode else FontVariantType.NONE)
+
+
+def _convert(text: str, mathMode: bool = False, easyMode: bool = True) -> str | None:
+    if not isinstance(text, str):
+        raise JsonRpcError(INVALID_PARAMS, "`text` must be a string")
+
+    # Editors convert while the text is typed, so only conversions accepted in the app count as uses
+    return conversion_cache.convert(text, _math_mode_context(bool(mathMode)), bool(easyMode), count_use=False)
+
+
+def _convert_variants(text: str) -> list[dict[str, Any]]:
+    if not isinstance(text, str):
+        raise JsonRpcError(INVALID_PARAMS, "`text` must be a string")
+
+    modes = [(math_mode, easy_mode) for math_mode in (False, True) for easy_mode in (False, True)]
+    variants = [ConversionVariant(_math_mode_context(math_mode), easy_mode) for math_mode, easy_mode in modes]
+    results = conversion_cache.convert_variants(text, variants)
+
+    return [{"mathMode": math_mode, "easyMode": easy_mode, "result": result}
+            for (math_mode, easy_mode), result in zip(modes, results)]
+
+
+def _complete(prefix: str, limit: int = DEFAULT_COMPLETION_LIMIT) -> list[dict[str, str]]:
+    if not isinstance(prefix, str) or not isinstance(limit, int):
+        raise JsonRpcError(INVALID_PARAMS, "`prefix` must be a string and `limit` an integer")
+
+    return [{"name": name, "symbol": symbol} for name, symbol in symbol_completer.complete(prefix, limit)]
+
+
+METHODS = {
+    "convert": _convert,
+    "convertVariants": _convert_variants,
+    "complete": _complete,
+}
+
+
+def _is_valid_id(id: Any) -> bool:
+    # Any JSON number, bool is a subclass of int but not a number in JSON
+    return isinstance(id, (str, int, float, type(None))) and not isinstance(id, bool)
+
+
+def _error(id: Any, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": id, "error": {"code": code, "message": message}}
+
+
+def _is_cancellation(message: Any) -> bool:
+    return isinstance(message, dict) and message.get("method") == CANCEL_METHOD
+
+
+def cancelled_ids(messages: list[Any]) -> set:
+    """
+    Collects the ids cancelled by `$/cancelRequest` notifications, including those inside batches
+    """
+    ids = set()
+
+    for message in messages:
+        for m in message if isinstance(message, list) else [message]:
+            if _is_cancellation(m) and isinstance(m.get("params"), dict):
+                id = m["params"].get("id")
+                if id is not None and _is_valid_id(id):
+                    ids.add(id)
+
+    return ids
+
+
+def handle_request(request: Any, cancelled: set = frozenset()) -> dict | None:
+    """
+    Handles a single request object, returning its response or None for notifications
+    """
+    if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" \
+            or not isinstance(request.get("method"), str):
+        return _error(None, INVALID_REQUEST, "Invalid Request")
+
+    id = request.get("id")
+    is_notification = "id" not in request
+
+    if not _is_valid_id(id):
+        return _error(None, INVALID_REQUEST, "Invalid Request")
+    method = request["method"]
+
+    if method == CANCEL_METHOD:
+        return None  # Already applied by the caller before any request was handled
+
+    if not is_notification and id in cancelled:
+        return _error(id, REQUEST_CANCELLED, "Request cancelled")
+
+    try:
+        if method not in METHODS:
+            raise JsonRpcError(METHOD_NOT_FOUND, f"Method not found: {method}")
+
+        params = request.get("params", {})
+        try:
+            if isinstance(params, dict):
+                result = METHODS[method](**params)
+            elif isinstance(params, list):
+                result = METHODS[method](*params)
+            else:
+                raise TypeError("`params` must be an object or array")
+        except TypeError as e:
+            raise JsonRpcError(INVALID_PARAMS, str(e))
+
+    except JsonRpcError as e:
+        return None if is_notification else _error(id, e.code, e.message)
+    except Exception as e:
+        # A bug in one method mustn't end the session of the editor
+        logger.exception("Error handling %s", method)
+        return None if is_notification else _error(id, INTERNAL_ERROR, f"Internal error: {type(e).__name__}")
+
+    return None if is_notification else {"jsonrpc": "2.0", "id": id, "result": result}
+
+
+def handle_message(message: Any, cancelled: set = frozenset()) -> dict | list | None:
+    """
+    Handles a decoded message, which is either a single request or a batch
+    """
+    if not isinstance(message, list):
+        return handle_request(message, cancelled)
+
+    if not message:
+        return _error(None, INVALID_REQUEST, "Invalid Request")
+
+    responses = [r for r in (handle_request(m, cancelled) for m in message) if r is not None]
+    return responses or None
+
+
+def _decode(line: str) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return JsonRpcError(PARSE_ERROR, f"Parse error: {e}")
+
+
+class JsonRpcServer:
+    """
+    Reads messages on a background thread, so that every message received while the previous
+    ones were handled is available at once. Cancellations within that backlog are applied
+    before any of its requests are handled, which skips requests the user has already typed past.
+    """
+    def __init__(self, input: io.TextIOBase, output: io.TextIOBase):
+        self.input = input
+        self.output = output
+        self.messages = queue.SimpleQueue[Any]()
+
+    def _read_thread(self):
+        for line in self.input:
+            if line.strip():
+                self.messages.put(_decode(line))
+
+        self.messages.put(None)  # End of input
+
+    def serve(self):
+        threading.Thread(target=self._read_thread, daemon=True).start()
+
+        while True:
+            backlog = [self.messages.get()]
+            while not self.messages.empty():
+                backlog.append(self.messages.get_nowait())
+
+            is_finished = backlog[-1] is None
+            if is_finished:
+                backlog.pop()
+
+            cancelled = cancelled_ids(backlog)
+
+            for message in backlog:
+                if isinstance(message, JsonRpcError):
+                    response: Any = _error(None, message.code, message.message)
+                else:
+                    response = handle_message(message, cancelled)
+
+                if response is not None:
+                    self.output.write(json.dumps(response, ensure_ascii=False))
+                    self.output.write("\n")
+
+            self.output.flush()
+
+            if is_finished:
+                return
+
+
+def run_stdio():
+    stdin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+    stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="\n")
+
+    # Anything printed to stdout would corrupt the protocol stream
+    sys.stdout = sys.stderr
+
+    logger.info("Serving JSON-RPC on stdio")
+    JsonRpcServer(stdin, stdout).serve()
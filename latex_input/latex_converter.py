@@ -1,13 +1,18 @@
 import copy
 from dataclasses import dataclass
+import logging
 import re
+from typing import NamedTuple, Sequence
 
+from latex_input import metrics
 from latex_input.unicode_structs import FontVariantType
 
 from latex_input.unicode_data import (
     superscript_mapping, subscript_mapping, character_font_variants, latex_symbols
 )
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class FontContext:
@@ -20,31 +25,92 @@ class FontContext:
                     self.is_subscript or self.is_superscript)
 
 
-# HACK: Global font context stack used for AST conversions
-font_context_stack = list[FontContext]()
+class ConversionVariant(NamedTuple):
+    context: FontContext
+    is_easy_mode: bool = False
 
 
 def latex_to_unicode(tex, context=FontContext(), is_easy_mode=False) -> str | None:
-    parser = LatexRDescentParser()
+    return latex_to_unicode_variants(tex, [ConversionVariant(context, is_easy_mode)])[0]
+
 
-    font_context_stack.append(context)
+def latex_to_unicode_variants(tex: str, variants: Sequence[ConversionVariant]) -> list[str | None]:
+    """
+    Converts `tex` once for every variant, e.g. upright and math-italic with easy mode on and off.
+    The text is parsed once and each distinct AST converted in a single traversal for all of its
+    contexts. A variant that fails to convert is None.
+    """
+    metrics.conversions.inc(amount=len(variants))
+    translations: list[str | None] = [None] * len(variants)
 
     try:
-        result = parser.parse(tex)
-        print(result)
+        result = LatexRDescentParser().parse(tex)
+    except Exception as e:
+        logger.debug("Failed to parse %r, Error = %s", tex, e)
+        metrics.conversion_failures.inc(type(e).__name__, amount=len(variants))
+        return translations
 
-        if is_easy_mode:
-            match result:
-                case ASTLatex([ASTLiteral(text)]):
-                    if text in latex_symbols:
-                        result = ASTLatex([ASTSymbol(text)])
+    logger.debug("Parsed %r as %s", tex, result)
 
-        return result.convert()
-    except Exception as e:
-        print(f"Failed to convert '{tex}', Error = {e}")
-        return None
-    finally:
-        font_context_stack.pop()
+    # Easy mode only changes the AST of a lone symbol name, otherwise all variants share one
+    easy_result = _easy_mode_ast(result)
+    if easy_result is result:
+        groups = [(result, list(range(len(variants))))]
+    else:
+        groups = [(result, [i for i, v in enumerate(variants) if not v.is_easy_mode]),
+                  (easy_result, [i for i, v in enumerate(variants) if v.is_easy_mode])]
+
+    for ast, indices in groups:
+        if not indices:
+            continue
+
+        if ast is not result:
+            metrics.easy_mode_hits.inc(amount=len(indices))
+
+        try:
+            converted = ast.convert_variants([variants[i].context for i in indices])
+        except Exception as e:
+            logger.debug("Failed to convert %r, Error = %s", tex, e)
+            metrics.conversion_failures.inc(type(e).__name__, amount=len(indices))
+            continue
+
+        for i, translation in zip(indices, converted):
+            translations[i] = translation
+
+    return translations
+
+
+def _easy_mode_ast(result: "ASTLatex") -> "ASTLatex":
+    """
+    Lets a symbol be typed without its backslash, when it's all the text
+    """
+    match result:
+        case ASTLatex([ASTLiteral(text)]):
+            if text in latex_symbols:
+                return ASTLatex([ASTSymbol(text)])
+
+    return result
+
+
+def _convert_sequence(nodes: "list[ASTNode]", contexts: list[FontContext]) -> list[str]:
+    """
+    Concatenated conversions of `nodes` in each context, converting once per distinct context
+    """
+    if len(contexts) == 1:
+        return ["".join([node.convert_variants(contexts)[0] for node in nodes])]
+
+    unique_contexts = list[FontContext]()
+    for context in contexts:
+        if context not in unique_contexts:
+            unique_contexts.append(context)
+
+    columns = [node.convert_variants(unique_contexts) for node in nodes]
+    converted = ["".join(column[i] for column in columns) for i in range(len(unique_contexts))]
+
+    if len(unique_contexts) == len(contexts):
+        return converted
+
+    return [converted[unique_contexts.index(context)] for context in contexts]
 
 
 def _map_text(mapping: dict[str, str], text: str) -> str:
@@ -66,7 +132,13 @@ def intersperse_characters(subject: str, intersperse: str) -> str:
 
 @dataclass
 class ASTNode:
-    def convert(self) -> str:
+    def convert(self, context: FontContext = FontContext()) -> str:
+        return self.convert_variants([context])[0]
+
+    def convert_variants(self, contexts: list[FontContext]) -> list[str]:
+        """
+        Conversions in each of `contexts`, in a single traversal
+        """
         assert False, "Not implemented"
 
 
@@ -74,19 +146,21 @@ class ASTNode:
 class ASTLatex(ASTNode):
     nodes: list[ASTNode]
 
-    def convert(self) -> str:
-        return "".join(n.convert() for n in self.nodes)
+    def convert_variants(self, contexts: list[FontContext]) -> list[str]:
+        return _convert_sequence(self.nodes, contexts)
 
 
 @dataclass
 class ASTLiteral(ASTNode):
     text: str
 
-    def convert(self) -> str:
-        context = font_context_stack[-1]
-
+    def convert_variants(self, contexts: list[FontContext]) -> list[str]:
         text = self.perform_character_replacements()
 
+        return [self.format_text(text, context) for context in contexts]
+
+    @staticmethod
+    def format_text(text: str, context: FontContext) -> str:
         if context.is_trivial():
             return text
 
@@ -108,7 +182,7 @@ class ASTLiteral(ASTNode):
             )]
 
             if not variant_candidates:
-                print(f"No conversion found for '{basechar}' with context {context}")
+                logger.debug("No conversion found for %r with context %s", basechar, context)
                 conversion = basechar
             else:
                 # Prefer mathematical variants, if they exist. Otherwise just choose the first
@@ -262,11 +336,11 @@ class LatexRDescentParser:
 class ASTSymbol(ASTNode):
     name: str
 
-    def convert(self) -> str:
+    def convert_variants(self, contexts: list[FontContext]) -> list[str]:
         assert self.name in latex_symbols, "Unsupported symbol"
         basechar = latex_symbols[self.name]
 
-        return ASTLiteral(basechar).convert()
+        return ASTLiteral(basechar).convert_variants(contexts)
 
 
 @dataclass
@@ -274,18 +348,17 @@ class ASTFunction(ASTNode):
     name: str
     operands: list[ASTNode]
 
-    def convert(self) -> str:
-        operand = "".join(x.convert() for x in self.operands)
-        current_context = font_context_stack[-1]
-        new_context = copy.copy(current_context)
+    def convert_variants(self, contexts: list[FontContext]) -> list[str]:
+        if self.name in ["vec", "sqrt"] or self.name.startswith("sqrt["):
+            return [self._decorate(operand) for operand in _convert_sequence(self.operands, contexts)]
 
-        if self.name == "^":
-            new_context = FontContext(is_superscript=True)
-
-        elif self.name == "_":
-            new_context = FontContext(is_subscript=True)
+        return _convert_sequence(self.operands, [self._operand_context(context) for context in contexts])
 
-        elif self.name == "vec":
+    def _decorate(self, operand: str) -> str:
+        """
+        Functions that mark their operand, converted in the current context
+        """
+        if self.name == "vec":
             return operand + u'\u20d7'
 
         elif self.name == "sqrt":
@@ -306,6 +379,20 @@ class ASTFunction(ASTNode):
 
             return prefix + symbol + intersperse_characters(operand, "\u0305")
 
+        assert False, "Function not implemented"
+
+    def _operand_context(self, current_context: FontContext) -> FontContext:
+        """
+        Context of the operand for functions that change the font
+        """
+        new_context = copy.copy(current_context)
+
+        if self.name == "^":
+            new_context = FontContext(is_superscript=True)
+
+        elif self.name == "_":
+            new_context = FontContext(is_subscript=True)
+
         # TODO: More scalable approach to fixing conflicts
         elif self.name == "mathbb":
             new_context.formatting |= FontVariantType.DOUBLE_STRUCK
@@ -350,9 +437,4 @@ class ASTFunction(ASTNode):
         else:
             assert False, "Function not implemented"
 
-        font_context_stack.append(new_context)
-        # TODO: Find alternative to running this twice
-        new_operand = "".join(x.convert() for x in self.operands)
-        font_context_stack.pop()
-
-        return new_operand
+        return new_context
@@ -1,34 +1,29 @@
+from latex_input.capture_buffer import CaptureAction, CaptureBuffer
+
 import keyboard
 
 
 class KeyListener:
-    is_listening = False
-    key_log = ""
+    def __init__(self):
+        self.is_listening = False
+        self.buffer = CaptureBuffer()
+
+    @property
+    def key_log(self) -> str:
+        return self.buffer.text
 
     def _hook_callback(self, event: keyboard.KeyboardEvent):
         if event.event_type != keyboard.KEY_DOWN:
             return
 
-        if any(substring in event.name
-                for substring in ["alt", "ctrl", "shift", "esc", "enter",
-                                  "left", "right", "up", "down"]):
-            return
-
-        if event.name == "space":
-            self.key_log += " "
-            return
-
-        if event.name == "backspace":
-            if self.key_log:
-                self.key_log = self.key_log[:-1]
-        else:
-            self.key_log += event.name
+        if self.buffer.apply(event.name) is CaptureAction.FINISH:
+            self.buffer.insert(" ")
 
     def start_listening(self, starting_text=""):
         if self.is_listening:
             self._clear()
 
-        self.key_log = starting_text
+        self.buffer = CaptureBuffer(starting_text)
 
         keyboard.hook(self._hook_callback)
         self.is_listening = True
@@ -46,5 +41,5 @@ class KeyListener:
         if self.is_listening:
             keyboard.unhook(self._hook_callback)
 
-        self.key_log = ""
+        self.buffer = CaptureBuffer()
         self.is_listening = False
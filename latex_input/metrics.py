@@ -0,0 +1,262 @@
+"""
+Counters, gauges and histograms exported in the Prometheus text format, over HTTP on a local
+port or a Unix domain socket.
+Updating a metric doesn't take a lock: every thread adds to its own cells, and the cells of all
+threads are only summed when the metrics are scraped.
+"""
+
+import atexit
+from bisect import bisect_left
+import logging
+import os
+import threading
+from typing import Callable, ClassVar, Final, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import socketserver
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE: Final[str] = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds, from sub-millisecond conversions to slowly typed output
+LATENCY_BUCKETS: Final[tuple[float, ...]] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+Labels = tuple[str, ...]
+
+
+def _format_labels(names: tuple[str, ...], values: Labels) -> str:
+    if not names:
+        return ""
+
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    type: ClassVar[str]
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), registry: "MetricsRegistry | None" = None):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+
+        (registry or default_registry).register(self)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        """
+        Name suffix, formatted labels and value of every sample
+        """
+        assert False, "Not implemented"
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines += [f"{self.name}{suffix}{labels} {value!r}" for suffix, labels, value in self.samples()]
+
+        return "\n".join(lines) + "\n"
+
+
+class _ThreadCells(Metric):
+    """
+    Values kept per thread, in a dict from label values to a list of floats
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+        self._cells = list[dict[Labels, list[float]]]()
+        self._cells_lock = threading.Lock()  # Only taken on a thread's first update and when scraping
+
+    def _cell(self) -> dict[Labels, list[float]]:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = dict[Labels, list[float]]()
+            with self._cells_lock:
+                self._cells.append(cell)
+            return cell
+
+    def _totals(self) -> dict[Labels, list[float]]:
+        with self._cells_lock:
+            cells = list(self._cells)
+
+        totals = dict[Labels, list[float]]()
+        for cell in cells:
+            # Copying a dict or a list is atomic, the owning thread may update it meanwhile
+            for labels, values in cell.copy().items():
+                total = totals.setdefault(labels, [0.0] * len(values))
+                for i, value in enumerate(values.copy()):
+                    total[i] += value
+
+        return dict(sorted(totals.items()))
+
+
+class Counter(_ThreadCells):
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        cell = self._cell()
+        values = cell.get(labels)
+
+        if values is None:
+            cell[labels] = [amount]
+        else:
+            values[0] += amount
+
+    def value(self, *labels: str) -> float:
+        return self._totals().get(labels, [0.0])[0]
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        for labels, (value,) in self._totals().items():
+            yield "", _format_labels(self.label_names, labels), value
+
+
+class Histogram(_ThreadCells):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS, registry: "MetricsRegistry | None" = None):
+        self.buckets = buckets
+        super().__init__(name, help, labels, registry)
+
+    def observe(self, value: float, *labels: str):
+        cell = self._cell()
+        values = cell.get(labels)
+
+        if values is None:
+            # A count per bucket, then the count above the last bucket and the sum
+            values = cell[labels] = [0.0] * (len(self.buckets) + 2)
+
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        for labels, values in self._totals().items():
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield "_bucket", _format_labels(self.label_names + ("le",), labels + (le,)), cumulative
+
+            yield "_count", _format_labels(self.label_names, labels), cumulative
+            yield "_sum", _format_labels(self.label_names, labels), values[-1]
+
+
+class Gauge(Metric):
+    """
+    Reads its value when scraped, the sample is left out while `function` returns None
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, function: Callable[[], float | None],
+                 registry: "MetricsRegistry | None" = None):
+        self.function = function
+        super().__init__(name, help, (), registry)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        value = self.function()
+        if value is not None:
+            yield "", "", float(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = dict[str, Metric]()
+        self.lock = threading.Lock()
+
+    def register(self, metric: Metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+
+            self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+
+        return "".join(metric.render() for metric in metrics)
+
+
+default_registry = MetricsRegistry()
+
+# Metrics updated by several modules
+conversions = Counter("latex_input_conversions_total", "LaTeX conversions, including speculative ones")
+conversion_failures = Counter(
+    "latex_input_conversion_failures_total", "Failed conversions by exception type", labels=("kind",))
+easy_mode_hits = Counter("latex_input_easy_mode_hits_total", "Symbols converted without a backslash in easy mode")
+activations = Counter("latex_input_activations_total", "Hotkey activations")
+translation_retries = Counter(
+    "latex_input_translation_retries_total", "Failed translations that went back to listening")
+backspaces_sent = Counter("latex_input_backspaces_sent_total", "Backspaces sent to erase typed text")
+characters_written = Counter("latex_input_characters_written_total", "Characters of translations written")
+speculations = Counter(
+    "latex_input_speculations_total", "Final texts whose speculative conversion was ready (hit) or not (miss)",
+    labels=("result",))
+outputs_cancelled = Counter("latex_input_outputs_cancelled_total", "Translations whose output was interrupted")
+stage_seconds = Histogram(
+    "latex_input_stage_seconds",
+    "Latency of each stage of an activation: convert, output_wait (queued behind earlier output) and output",
+    labels=("stage",))
+
+
+def start_exporter(port: int | None = None, socket_path: str | None = None,
+                   registry: MetricsRegistry = default_registry) -> "list[socketserver.BaseServer]":
+    """
+    Serves the metrics on localhost:`port` and/or `socket_path` from background threads
+    """
+    # Imported here, http.server alone would double the application's import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import socketserver
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render().encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args):
+            logger.debug(format, *args)
+
+    class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def get_request(self):
+            request, _ = super().get_request()
+            return request, ("local", 0)  # BaseHTTPRequestHandler expects a host and port
+
+        def server_close(self):
+            super().server_close()
+            if os.path.exists(self.server_address):
+                os.unlink(self.server_address)
+
+    servers = list["socketserver.BaseServer"]()
+
+    if port is not None:
+        http_server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        http_server.daemon_threads = True
+        servers.append(http_server)
+        logger.info("Serving metrics on http://127.0.0.1:%d/metrics", http_server.server_address[1])
+
+    if socket_path is not None:
+        # Remove a stale socket left behind by a previous run
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        unix_server = UnixHTTPServer(socket_path, MetricsHandler)
+        servers.append(unix_server)
+        os.chmod(socket_path, 0o600)
+        # Like the conversion server, don't leave the socket behind on shutdown
+        atexit.register(unix_server.server_close)
+        logger.info("Serving metrics on %s", socket_path)
+
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return servers
@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+import unicodedata
+
+
+@dataclass
+class Edit:
+    num_backspace: int
+    text: str
+
+    @property
+    def num_keystrokes(self) -> int:
+        return self.num_backspace + len(self.text)
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+
+    return length
+
+
+def minimal_edit(typed: str, translation: str) -> Edit:
+    """
+    Keystrokes to turn `typed`, the text left of the cursor, into `translation`
+    by only erasing and retyping what comes after their common prefix
+    """
+    keep = common_prefix_length(typed, translation)
+
+    # Don't split a character from the combining marks following it,
+    # as some applications don't attach a mark typed on its own
+    while 0 < keep < len(translation) and unicodedata.combining(translation[keep]):
+        keep -= 1
+
+    return Edit(len(typed) - keep, translation[keep:])
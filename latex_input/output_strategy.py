@@ -0,0 +1,173 @@
+"""
+Chooses how each piece of output is written, e.g. by pasting it or by typing it, from a model of
+what each way costs: a fixed overhead plus a cost per character. Models start from rough priors
+and are fitted to the observed timings as output is written. They are saved to disk, so each run
+starts out calibrated by the previous ones.
+"""
+
+from latex_input.paths import user_cache_dir
+
+from contextlib import contextmanager
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Callable, Final, Iterator, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_COSTS_FILE: Final[str] = "output_costs.json"
+
+# Weight of previous observations after each new one, so that the models follow changes
+COST_MODEL_DECAY: Final[float] = 0.98
+# The prior counts as this many observations, at 1 and PRIOR_LENGTH characters
+PRIOR_WEIGHT: Final[float] = 2.0
+PRIOR_LENGTH: Final[int] = 16
+# Saved after this many observations, so writes don't touch the disk every time
+SAVE_INTERVAL: Final[int] = 16
+
+
+class CostModel:
+    """
+    Weighted least squares fit of `seconds = fixed + per_char * num_chars`.
+    Known pacing delays aren't part of the fit, see `keys_per_char`.
+    """
+    def __init__(self, fixed: float, per_char: float, keys_per_char: float = 0.0,
+                 decay: float = COST_MODEL_DECAY):
+        self.prior_per_char = per_char
+        self.keys_per_char = keys_per_char  # Key presses paced by the delay, per character
+        self.decay = decay
+        # Sums of weights, x, y, x² and xy
+        self.w = self.sx = self.sy = self.sxx = self.sxy = 0.0
+
+        for x in (1, PRIOR_LENGTH):
+            self._add(x, fixed + per_char * x, PRIOR_WEIGHT / 2)
+
+    def _add(self, x: float, y: float, weight: float):
+        self.w = self.w * self.decay + weight
+        self.sx = self.sx * self.decay + weight * x
+        self.sy = self.sy * self.decay + weight * y
+        self.sxx = self.sxx * self.decay + weight * x * x
+        self.sxy = self.sxy * self.decay + weight * x * y
+
+    def observe(self, num_chars: int, seconds: float, delay: float = 0.0):
+        self._add(num_chars, seconds - num_chars * self.keys_per_char * delay, 1.0)
+
+    def coefficients(self) -> tuple[float, float]:
+        """
+        Fixed and per character cost, in seconds
+        """
+        mean_x = self.sx / self.w
+        mean_y = self.sy / self.w
+        variance = self.sxx / self.w - mean_x * mean_x
+
+        if variance > 1e-6:
+            per_char = (self.sxy / self.w - mean_x * mean_y) / variance
+        else:  # Every observation had the same length, the slope can't be fitted
+            per_char = self.prior_per_char
+
+        per_char = max(per_char, 0.0)
+        return max(mean_y - per_char * mean_x, 0.0), per_char
+
+    def estimate(self, num_chars: int, delay: float = 0.0) -> float:
+        fixed, per_char = self.coefficients()
+        return fixed + num_chars * (per_char + self.keys_per_char * delay)
+
+    def to_json(self) -> list[float]:
+        return [self.w, self.sx, self.sy, self.sxx, self.sxy]
+
+    def load_json(self, sums: list[float]):
+        w, sx, sy, sxx, sxy = map(float, sums)
+        if w > 0:
+            self.w, self.sx, self.sy, self.sxx, self.sxy = w, sx, sy, sxx, sxy
+
+
+class OutputStrategy(NamedTuple):
+    name: str
+    write: Callable[[str, float], None]
+    model: CostModel
+    # Whether the strategy can write the text at all, e.g. characters the keyboard layout lacks
+    supports: Callable[[str], bool] = lambda text: True
+    # Typed text is written in chunks that can be interrupted, pasted text in one go
+    interruptible: bool = True
+
+
+class StrategySelector:
+    """
+    Writes each text with the strategy estimated to be fastest, and refines that strategy's
+    model with how long it actually took
+    """
+    def __init__(self, strategies: list[OutputStrategy], path: Path | None = None):
+        self.strategies = {s.name: s for s in strategies}
+        self.path = path or user_cache_dir() / OUTPUT_COSTS_FILE
+        self.lock = threading.Lock()
+        self.num_unsaved = 0
+        self.last_used: str | None = None  # Name of the strategy that wrote last
+        self.forced: str | None = None  # Name of the strategy writing everything, see `forcing`
+
+        # Statistics, number of writes and total seconds per strategy
+        self.uses = dict.fromkeys(self.strategies, 0)
+        self.total_time = dict.fromkeys(self.strategies, 0.0)
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for name, sums in json.load(f).items():
+                    if name in self.strategies:
+                        self.strategies[name].model.load_json(sums)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning("Ignoring unreadable output costs in %s: %s", self.path, e)
+
+    @contextmanager
+    def forcing(self, name: str) -> Iterator[None]:
+        """
+        Writes everything with the named strategy meanwhile, e.g. to type probes at a given delay
+        """
+        previous, self.forced = self.forced, name
+        try:
+            yield
+        finally:
+            self.forced = previous
+
+    def choose(self, text: str, delay: float = 0.0) -> OutputStrategy:
+        if self.forced:
+            return self.strategies[self.forced]
+
+        candidates = [s for s in self.strategies.values() if s.supports(text)] or list(self.strategies.values())
+        return min(candidates, key=lambda s: s.model.estimate(len(text), delay))
+
+    def write(self, text: str, delay: float = 0.0):
+        strategy = self.choose(text, delay)
+        self.last_used = strategy.name
+        estimate = strategy.model.estimate(len(text), delay)
+
+        start = time.perf_counter()
+        strategy.write(text, delay)
+        elapsed = time.perf_counter() - start
+
+        logger.debug("Wrote %d characters with %s in %.2f ms, estimated %.2f ms",
+                     len(text), strategy.name, elapsed * 1e3, estimate * 1e3)
+
+        with self.lock:
+            strategy.model.observe(len(text), elapsed, delay)
+            self.uses[strategy.name] += 1
+            self.total_time[strategy.name] += elapsed
+            self.num_unsaved += 1
+
+            if self.num_unsaved >= SAVE_INTERVAL:
+                self._save()
+
+    def _save(self):
+        self.num_unsaved = 0
+
+        try:
+            # Write atomically, so a crash never leaves a truncated file behind
+            temp_path = self.path.with_suffix(".tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({name: s.model.to_json() for name, s in self.strategies.items()}, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning("Failed to save output costs to %s: %s", self.path, e)
@@ -0,0 +1,173 @@
+"""
+Writes translations on a dedicated thread, so that the input thread can go back to watching
+for the hotkey while a long translation is still being typed.
+Output is sent in small chunks, so that it can be cancelled part way through.
+"""
+
+from latex_input import metrics
+from latex_input.minimal_edit import Edit
+from latex_input.output_strategy import OutputStrategy, StrategySelector
+
+from contextlib import nullcontext
+from dataclasses import dataclass
+import logging
+from queue import Queue
+import threading
+import time
+from typing import Callable, Final, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Key presses sent between checks for cancellation
+OUTPUT_CHUNK_SIZE: Final[int] = 8
+
+
+class OutputJob(NamedTuple):
+    sequence: int
+    typed: str  # The text being replaced, as typed by the user
+    edit: Edit
+    delay: float
+    submitted: float = 0.0  # `time.perf_counter` value
+    record_sequence: int = -1  # The activation's flight recorder record, if any
+
+
+@dataclass
+class OutputResult:
+    """
+    How much of a job was written, times are `time.perf_counter` values
+    """
+    job: OutputJob
+    start: float
+    end: float = 0.0
+    num_backspace: int = 0  # Backspaces sent
+    num_written: int = 0    # Characters written
+    cancelled: bool = False
+    error: str | None = None  # Exception that stopped the output
+
+    def undo_edit(self) -> Edit:
+        """
+        Edit putting back the typed text, erasing whatever was written
+        """
+        erased = self.job.typed[len(self.job.typed) - self.num_backspace:]
+        return Edit(self.num_written, erased)
+
+
+class OutputWriter:
+    """
+    Jobs are written one at a time in the order they were submitted, so the output
+    of consecutive activations never interleaves.
+    Clients that write the whole text in one go, e.g. by pasting, set `write_chunk_size` to None.
+    Clients with several output strategies in a StrategySelector `output` write each job with the one
+    strategy estimated to be fastest for all of its text, in one go unless it's interruptible.
+    """
+    def __init__(self, client, on_result: Callable[[OutputResult], None] | None = None):
+        self.client = client
+        self.on_result = on_result
+        self.write_chunk_size: int | None = getattr(client, "write_chunk_size", OUTPUT_CHUNK_SIZE)
+        self.jobs = Queue[OutputJob]()
+        self.last_result: OutputResult | None = None
+
+        # Jobs with a lower sequence number are cancelled
+        self.next_sequence = 0
+        self.cancel_before = 0
+        self.lock = threading.Lock()
+
+        threading.Thread(target=self._writer_thread, daemon=True).start()
+
+    def submit(self, typed: str, edit: Edit, delay: float = 0.0, record_sequence: int = -1):
+        with self.lock:
+            sequence = self.next_sequence
+            self.next_sequence += 1
+
+        self.jobs.put(OutputJob(sequence, typed, edit, delay, time.perf_counter(), record_sequence))
+
+    def cancel(self):
+        """
+        Stops the job being written after its current chunk, and drops every job submitted so far
+        """
+        with self.lock:
+            self.cancel_before = self.next_sequence
+
+    def wait_until_idle(self):
+        """
+        Blocks until every submitted job has been written or cancelled
+        """
+        self.jobs.join()
+
+    def _is_cancelled(self, job: OutputJob) -> bool:
+        return job.sequence < self.cancel_before
+
+    def _choose_strategy(self, job: OutputJob) -> OutputStrategy | None:
+        output = getattr(self.client, "output", None)
+        if not isinstance(output, StrategySelector) or not job.edit.text:
+            return None
+
+        return output.choose(job.edit.text, job.delay)
+
+    def _write(self, job: OutputJob, result: OutputResult):
+        chunk_size = self.write_chunk_size or len(job.edit.text)
+
+        # Chosen for the whole text, a chunk alone would always look cheaper to type
+        strategy = self._choose_strategy(job)
+        if strategy and not strategy.interruptible:
+            chunk_size = len(job.edit.text)
+
+        while result.num_backspace < job.edit.num_backspace:
+            if self._is_cancelled(job):
+                result.cancelled = True
+                return
+
+            count = min(OUTPUT_CHUNK_SIZE, job.edit.num_backspace - result.num_backspace)
+            self.client.send_backspace(count, delay=job.delay)
+            result.num_backspace += count
+
+        if job.edit.text:
+            logger.debug("Writing: %r", job.edit.text)
+
+        with self.client.output.forcing(strategy.name) if strategy else nullcontext():
+            while result.num_written < len(job.edit.text):
+                if self._is_cancelled(job):
+                    result.cancelled = True
+                    return
+
+                chunk = job.edit.text[result.num_written:result.num_written + chunk_size]
+                self.client.write(chunk, delay=job.delay)
+                result.num_written += len(chunk)
+
+    def _report(self, result: OutputResult):
+        job = result.job
+
+        metrics.stage_seconds.observe(result.start - job.submitted, "output_wait")
+        metrics.stage_seconds.observe(result.end - result.start, "output")
+        metrics.backspaces_sent.inc(amount=result.num_backspace)
+        metrics.characters_written.inc(amount=result.num_written)
+
+        if result.cancelled:
+            metrics.outputs_cancelled.inc()
+            logger.info("Output cancelled after %d of %d backspaces and %d of %d characters",
+                        result.num_backspace, job.edit.num_backspace,
+                        result.num_written, len(job.edit.text))
+
+        self.last_result = result
+        if self.on_result:
+            self.on_result(result)
+
+    def _writer_thread(self):
+        while True:
+            job = self.jobs.get()
+            result = OutputResult(job, time.perf_counter())
+
+            try:
+                self._write(job, result)
+            except Exception as e:
+                logger.exception("Failed to write %r", job.edit.text)
+                result.error = f"{type(e).__name__}: {e}"
+            finally:
+                result.end = time.perf_counter()
+
+            try:
+                self._report(result)
+            except Exception:
+                logger.exception("Failed to report the output of %r", job.edit.text)
+            finally:
+                self.jobs.task_done()
@@ -0,0 +1,77 @@
+"""
+Pacing of keystrokes without busy-waiting for the whole delay.
+Most of each interval is slept with a high-resolution timer (clock_nanosleep on Linux,
+a high-resolution waitable timer on Windows since Python 3.11), and only the final
+few tens of microseconds are spun to hit the deadline accurately.
+"""
+
+import ctypes
+import os
+import sys
+import threading
+import time
+from typing import Final
+
+# Remaining time that is spun rather than slept. Before Python 3.11, time.sleep on Windows
+# only has the ~15.6 ms resolution of the system timer
+SPIN_THRESHOLD: Final[float] = 0.016 if os.name == "nt" and sys.version_info < (3, 11) else 50e-6
+
+_PR_SET_TIMERSLACK: Final[int] = 29
+_thread_state = threading.local()
+
+
+def _reduce_timer_slack():
+    """
+    Linux delays timer wakeups by up to 50 µs by default to coalesce them, which would
+    otherwise push most sleeps past the spin threshold. This only affects the calling thread.
+    """
+    _thread_state.slack_reduced = True
+
+    if sys.platform.startswith("linux"):
+        try:
+            ctypes.CDLL(None).prctl(_PR_SET_TIMERSLACK, 1, 0, 0, 0)
+        except (OSError, AttributeError):
+            pass
+
+
+def sleep_until(deadline: float, spin_threshold: float = SPIN_THRESHOLD):
+    """
+    Returns once `time.perf_counter()` reaches `deadline`
+    """
+    if not getattr(_thread_state, "slack_reduced", False):
+        _reduce_timer_slack()
+
+    remaining = deadline - time.perf_counter()
+    if remaining > spin_threshold:
+        time.sleep(remaining - spin_threshold)
+
+    while time.perf_counter() < deadline:
+        pass
+
+
+def precise_sleep(delay: float, spin_threshold: float = SPIN_THRESHOLD):
+    if delay > 0:
+        sleep_until(time.perf_counter() + delay, spin_threshold)
+
+
+class PacingScheduler:
+    """
+    Spaces out a series of events at least `interval` seconds apart. Deadlines are absolute,
+    so the time spent sending each event is part of the interval rather than added on top of it.
+    """
+    def __init__(self, interval: float, spin_threshold: float = SPIN_THRESHOLD):
+        self.interval = interval
+        self.spin_threshold = spin_threshold
+        self.next_deadline = time.perf_counter() + interval
+
+    def wait(self):
+        """
+        Call after sending each event
+        """
+        if self.interval <= 0:
+            return
+
+        sleep_until(self.next_deadline, self.spin_threshold)
+
+        # Don't burst to catch up if sending took longer than the interval
+        self.next_deadline = max(self.next_deadline, time.perf_counter()) + self.interval
@@ -0,0 +1,135 @@
+"""
+Keystroke delays per target application, keyed by the class of the active window.
+Profiles are cached on disk, and can be found automatically by probing each application
+with increasingly slower delays until it reliably receives everything that was typed.
+"""
+
+from latex_input.paths import user_cache_dir
+
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Callable, Final, Protocol
+
+logger = logging.getLogger(__name__)
+
+PACING_PROFILES_FILE: Final[str] = "pacing_profiles.json"
+
+# Delays tried when tuning, ordered from fastest to slowest
+TUNING_DELAYS: Final[tuple[float, ...]] = (0.0, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02)
+# Every probe of the chosen delay has to succeed
+TUNING_TRIALS: Final[int] = 2
+# Mixes ASCII with characters outside the BMP, which some applications handle slower
+PROBE_TEXT: Final[str] = "a1𝑥ᵇ∮b2𝒚c3"
+# Time for the application to put the selection on the clipboard when reading back
+READ_BACK_SETTLE_TIME: Final[float] = 0.1
+# Reading back copies with Ctrl+C, which interrupts the running program in a terminal.
+# Lowercase classes of common terminal emulators' windows, these are never tuned.
+TERMINAL_WINDOW_CLASSES: Final[frozenset[str]] = frozenset({
+    "xterm", "urxvt", "gnome-terminal", "gnome-terminal-server", "konsole", "xfce4-terminal",
+    "terminator", "tilix", "alacritty", "kitty", "org.wezfurlong.wezterm", "foot", "st-256color",
+    "consolewindowclass", "cascadia_hosting_window_class", "mintty",
+})
+
+
+class ProbeClient(Protocol):
+    def write(self, text: str, delay: float = 0.0): ...
+
+    def send_backspace(self, num_backspace: int, delay: float = 0.0): ...
+
+    def read_line_before_cursor(self) -> str | None: ...
+
+
+class PacingProfiles:
+    def __init__(self, path: Path | None = None):
+        self.path = path or user_cache_dir() / PACING_PROFILES_FILE
+        self.delays = dict[str, float]()
+        self.lock = threading.Lock()
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.delays = {str(k): float(v) for k, v in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning("Ignoring unreadable pacing profiles in %s: %s", self.path, e)
+
+    def __contains__(self, window_class: str) -> bool:
+        return window_class in self.delays
+
+    def delay_for(self, window_class: str | None, default: float) -> float:
+        if window_class is None:
+            return default
+
+        return self.delays.get(window_class, default)
+
+    def set_delay(self, window_class: str, delay: float):
+        """
+        Kept in memory for this run even if the profiles can't be saved
+        """
+        with self.lock:
+            self.delays[window_class] = delay
+
+            try:
+                # Write atomically, so a crash never leaves a truncated file behind
+                temp_path = self.path.with_suffix(".tmp")
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.delays, f, indent=2, sort_keys=True)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.warning("Failed to save pacing profiles to %s: %s", self.path, e)
+
+
+def is_terminal(window_class: str) -> bool:
+    return window_class.lower() in TERMINAL_WINDOW_CLASSES
+
+
+def tune_delay(probe: Callable[[float], bool], delays: tuple[float, ...] = TUNING_DELAYS,
+               trials: int = TUNING_TRIALS) -> float | None:
+    """
+    Binary search for the fastest delay for which every probe succeeds, assuming that slower
+    delays are at least as reliable as faster ones. Returns None if even the slowest fails.
+    """
+    low, high = 0, len(delays)
+
+    while low < high:
+        middle = (low + high) // 2
+
+        if all(probe(delays[middle]) for _ in range(trials)):
+            high = middle
+        else:
+            low = middle + 1
+
+    return delays[low] if low < len(delays) else None
+
+
+def probe_delay(client: ProbeClient, delay: float) -> bool:
+    """
+    Types a probe into the focused text field with the given delay and erases it again,
+    reading the line back after each step. Uses the clipboard to read back, so this
+    overwrites its contents.
+    """
+    before = client.read_line_before_cursor()
+    if before is None:
+        return False
+
+    client.write(PROBE_TEXT, delay)
+    time.sleep(READ_BACK_SETTLE_TIME)
+    typed = client.read_line_before_cursor()
+
+    # Erase what the application actually received, so the field is left as it was
+    if typed is not None and typed.startswith(before):
+        num_received = len(typed) - len(before)
+    else:
+        num_received = len(PROBE_TEXT)
+    client.send_backspace(num_received, delay)
+    time.sleep(READ_BACK_SETTLE_TIME)
+    erased = client.read_line_before_cursor()
+
+    is_reliable = typed == before + PROBE_TEXT and erased == before
+    logger.debug("Probe with %.1f ms delay %s", delay * 1e3, "succeeded" if is_reliable else "failed")
+
+    return is_reliable
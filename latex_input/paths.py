@@ -0,0 +1,22 @@
+import os
+import sys
+from pathlib import Path
+
+APP_DIR_NAME = "latex_input"
+
+
+def user_cache_dir() -> Path:
+    """
+    Per-user cache directory following each platform's conventions, created if missing
+    """
+    if os.name == "nt":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+        path = base / APP_DIR_NAME / "Cache"
+    elif sys.platform == "darwin":
+        path = Path.home() / "Library" / "Caches" / APP_DIR_NAME
+    else:
+        path = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / APP_DIR_NAME
+
+    path.mkdir(parents=True, exist_ok=True)
+
+    return path
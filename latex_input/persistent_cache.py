@@ -0,0 +1,203 @@
+"""
+Conversions and how often each was used, kept across runs in an SQLite database in the user cache
+directory. At startup the most used ones are loaded into the in-memory conversion cache, and the
+symbols in them rank first in completions.
+Entries are only valid for the converter and symbol tables that produced them, the database is
+emptied whenever those change.
+"""
+
+from latex_input.completion import SymbolCompleter, symbol_completer
+from latex_input.conversion_cache import CacheKey, ConversionCache, conversion_cache
+from latex_input.paths import user_cache_dir
+
+import atexit
+import hashlib
+from importlib.resources import files
+import logging
+from pathlib import Path
+import re
+import sqlite3
+import threading
+import time
+from typing import Final
+
+logger = logging.getLogger(__name__)
+
+PERSISTENT_CACHE_FILE: Final[str] = "conversions.sqlite3"
+# Uses are counted in memory and written in a single transaction at most this often
+FLUSH_INTERVAL: Final[float] = 30.0
+# Least used entries beyond this many are dropped at startup
+MAX_PERSISTENT_ENTRIES: Final[int] = 100_000
+
+# Sources whose changes can change translations
+CONVERTER_SOURCES: Final[tuple[str, ...]] = (
+    "latex_converter.py", "unicode_data.py", "cached_unicode_data.py", "unicode_structs.py")
+
+SYMBOL_NAME_REGEX: Final[re.Pattern] = re.compile(r"\\([A-Za-z]+)")
+
+SCHEMA: Final[str] = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS conversions (
+    tex TEXT NOT NULL,
+    formatting INTEGER NOT NULL,
+    is_subscript INTEGER NOT NULL,
+    is_superscript INTEGER NOT NULL,
+    is_easy_mode INTEGER NOT NULL,
+    translation TEXT NOT NULL,
+    uses INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (tex, formatting, is_subscript, is_superscript, is_easy_mode)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS conversions_by_uses ON conversions (uses DESC);
+"""
+
+
+def converter_version() -> str:
+    digest = hashlib.sha256()
+    for name in CONVERTER_SOURCES:
+        digest.update(files("latex_input").joinpath(name).read_bytes())
+
+    return digest.hexdigest()
+
+
+class PersistentCache:
+    """
+    `record_use` only updates a dict in memory, `flush` writes the counts to the database.
+    Failed conversions aren't stored, only what was actually typed out matters for warming up.
+    """
+    def __init__(self, path: Path | None = None, version: str | None = None):
+        self.path = path or user_cache_dir() / PERSISTENT_CACHE_FILE
+        self.lock = threading.Lock()
+        self.pending = dict[CacheKey, tuple[str, int]]()
+
+        # Only used while holding the lock, from whichever thread flushes
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")  # Durable enough for a cache, and much faster
+        self.connection.executescript(SCHEMA)
+
+        self._check_version(version or converter_version())
+
+    def _check_version(self, version: str):
+        with self.connection:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+
+            if row and row[0] == version:
+                return
+
+            if row:
+                logger.info("Converter changed, discarding the persistent conversion cache")
+
+            self.connection.execute("DELETE FROM conversions")
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+
+    def record_use(self, key: CacheKey, translation: str):
+        with self.lock:
+            _, uses = self.pending.get(key, (translation, 0))
+            self.pending[key] = (translation, uses + 1)
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, dict[CacheKey, tuple[str, int]]()
+
+            if not pending:
+                return
+
+            now = time.time()
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT INTO conversions VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    # The conflict target is required before SQLite 3.35
+                    "ON CONFLICT (tex, formatting, is_subscript, is_superscript, is_easy_mode) "
+                    "DO UPDATE SET translation = excluded.translation, "
+                    "uses = uses + excluded.uses, last_used = excluded.last_used",
+                    [(*key, translation, uses, now) for key, (translation, uses) in pending.items()])
+
+        logger.debug("Saved %d conversions to the persistent cache", len(pending))
+
+    def hottest(self, limit: int) -> list[tuple[CacheKey, str, int]]:
+        """
+        Most used entries first, as key, translation and number of uses
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT tex, formatting, is_subscript, is_superscript, is_easy_mode, translation, uses "
+                "FROM conversions ORDER BY uses DESC LIMIT ?", (limit,)).fetchall()
+
+        return [((tex, formatting, bool(sub), bool(sup), bool(easy)), translation, uses)
+                for tex, formatting, sub, sup, easy, translation, uses in rows]
+
+    def prune(self, max_entries: int = MAX_PERSISTENT_ENTRIES):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM conversions WHERE (tex, formatting, is_subscript, is_superscript, is_easy_mode) NOT IN "
+                "(SELECT tex, formatting, is_subscript, is_superscript, is_easy_mode FROM conversions "
+                "ORDER BY uses DESC LIMIT ?)", (max_entries,))
+
+    def start_flushing(self, interval: float = FLUSH_INTERVAL):
+        """
+        Flushes from a background thread every `interval` seconds and when the process exits
+        """
+        def flush_thread():
+            while True:
+                time.sleep(interval)
+                self._flush_logging_errors()
+
+        threading.Thread(target=flush_thread, daemon=True).start()
+        atexit.register(self._flush_logging_errors)
+
+    def _flush_logging_errors(self):
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            logger.warning("Failed to save the persistent conversion cache: %s", e)
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.connection.close()
+
+
+def symbol_names(key: CacheKey) -> list[str]:
+    tex, _, _, _, is_easy_mode = key
+    names = SYMBOL_NAME_REGEX.findall(tex)
+
+    if is_easy_mode:
+        names.append(tex)  # Possibly a symbol without its backslash, other text is ignored by the completer
+
+    return names
+
+
+def warm_up(store: PersistentCache, cache: ConversionCache, completer: SymbolCompleter):
+    """
+    Fills the conversion cache with the most used conversions and ranks their symbols first in
+    completions, then has the cache count further uses in the store
+    """
+    entries = store.hottest(cache.max_size)
+
+    # Least used first, so the most used are the last to be evicted
+    for key, translation, _ in reversed(entries):
+        cache.put(key, translation)
+
+    for key, _, uses in entries:
+        for name in symbol_names(key):
+            completer.record_usage(name, uses)
+
+    cache.store = store
+    logger.info("Loaded %d conversions from the persistent cache", len(entries))
+
+
+def enable_persistent_cache() -> PersistentCache | None:
+    """
+    Warms up the shared conversion cache and symbol completer from the default store, and keeps it updated
+    """
+    try:
+        store = PersistentCache()
+        store.prune()
+        warm_up(store, conversion_cache, symbol_completer)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Continuing without the persistent conversion cache: %s", e)
+        return None
+
+    store.start_flushing()
+    return store
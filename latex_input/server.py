@@ -0,0 +1,152 @@
+"""
+Long-running conversion server listening on a Unix domain socket, so that editor plugins
+don't pay for interpreter startup and table loading on every conversion.
+
+Every message is framed as a 4-byte big-endian length followed by the payload.
+- Request payload:  1 flags byte (REQUEST_MATH_MODE | REQUEST_EASY_MODE), then the UTF-8 LaTeX
+- Response payload: 1 status byte (RESPONSE_OK | RESPONSE_FAILED), then the UTF-8 translation
+Requests may be pipelined, responses on a connection are sent in request order.
+"""
+
+from latex_input.conversion_cache import conversion_cache
+from latex_input.latex_converter import FontContext
+from latex_input.unicode_structs import FontVariantType
+
+import asyncio
+import logging
+import os
+import struct
+from typing import Final
+
+logger = logging.getLogger(__name__)
+
+FRAME_HEADER: Final[struct.Struct] = struct.Struct("!I")
+MAX_FRAME_SIZE: Final[int] = 1 << 20
+
+REQUEST_MATH_MODE: Final[int] = 1 << 0
+REQUEST_EASY_MODE: Final[int] = 1 << 1
+
+RESPONSE_OK: Final[int] = 0
+RESPONSE_FAILED: Final[int] = 1
+
+
+def encode_frame(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """
+    Raises asyncio.IncompleteReadError once the peer closes the connection
+    """
+    (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame of {length} bytes exceeds the maximum of {MAX_FRAME_SIZE}")
+
+    return await reader.readexactly(length)
+
+
+def encode_request(tex: str, is_math_mode: bool = False, is_easy_mode: bool = True) -> bytes:
+    flags = REQUEST_MATH_MODE * is_math_mode | REQUEST_EASY_MODE * is_easy_mode
+    return encode_frame(bytes((flags,)) + tex.encode("utf-8"))
+
+
+def decode_response(payload: bytes) -> str | None:
+    if payload[0] != RESPONSE_OK:
+        return None
+
+    return payload[1:].decode("utf-8")
+
+
+def handle_request(payload: bytes) -> bytes:
+    """
+    Converts a request payload, returning the framed response
+    """
+    if not payload:
+        return encode_frame(bytes((RESPONSE_FAILED,)))
+
+    flags = payload[0]
+    context = FontContext(
+        formatting=FontVariantType.ITALIC if flags & REQUEST_MATH_MODE else FontVariantType.NONE
+    )
+
+    try:
+        tex = payload[1:].decode("utf-8")
+    except UnicodeDecodeError:
+        return encode_frame(bytes((RESPONSE_FAILED,)))
+
+    # Previews of partial input, like those of the JSON-RPC interface, aren't counted as uses
+    translation = conversion_cache.convert(tex, context, bool(flags & REQUEST_EASY_MODE), count_use=False)
+
+    if translation is None:
+        return encode_frame(bytes((RESPONSE_FAILED,)))
+
+    return encode_frame(bytes((RESPONSE_OK,)) + translation.encode("utf-8"))
+
+
+async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            writer.write(handle_request(await read_frame(reader)))
+            await writer.drain()
+    except asyncio.IncompleteReadError:
+        pass  # Client disconnected
+    except (ValueError, ConnectionError) as e:
+        logger.warning("Dropping client: %s", e)
+    finally:
+        writer.close()
+
+
+async def serve(socket_path: str):
+    # Remove a stale socket left behind by a previous server
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    server = await asyncio.start_unix_server(handle_client, socket_path)
+    os.chmod(socket_path, 0o600)
+
+    logger.info("Serving conversions on %s", socket_path)
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def run_server(socket_path: str):
+    try:
+        asyncio.run(serve(socket_path))
+    except KeyboardInterrupt:
+        pass
+
+
+class ConversionClient:
+    """
+    Minimal asyncio client for the conversion server
+    Use `send` and `receive` directly to pipeline requests
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, socket_path: str) -> "ConversionClient":
+        return cls(*await asyncio.open_unix_connection(socket_path))
+
+    def send(self, tex: str, is_math_mode: bool = False, is_easy_mode: bool = True):
+        self.writer.write(encode_request(tex, is_math_mode, is_easy_mode))
+
+    async def receive(self) -> str | None:
+        return decode_response(await read_frame(self.reader))
+
+    async def convert(self, tex: str, is_math_mode: bool = False, is_easy_mode: bool = True) -> str | None:
+        self.send(tex, is_math_mode, is_easy_mode)
+        await self.writer.drain()
+
+        return await self.receive()
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
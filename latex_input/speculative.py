@@ -0,0 +1,152 @@
+"""
+Speculative conversion of the text being typed, so that the translation is usually ready
+by the time Space is pressed and conversion doesn't add to the perceived latency.
+"""
+
+from latex_input import metrics
+
+import logging
+import threading
+import time
+from typing import Callable, Final, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Conversion only starts once typing pauses for this long, so bursts of keys convert once
+SPECULATION_DEBOUNCE: Final[float] = 0.015
+
+Converter = Callable[[str], str | None]
+
+
+class Speculation(NamedTuple):
+    version: int
+    text: str
+    convert: Converter
+
+
+class SpeculativeResult(NamedTuple):
+    text: str
+    translation: str | None
+    duration: float  # Time taken by the conversion
+
+
+class SpeculativeConverter:
+    """
+    Call `begin` once per activation, `update` whenever the captured text changes and `take`
+    for the final text. Every call to `update` or `take` bumps the version, and results for
+    an older version are discarded, which cancels stale conversions.
+    """
+    def __init__(self, debounce: float = SPECULATION_DEBOUNCE):
+        self.debounce = debounce
+        self.condition = threading.Condition()
+        self.version = 0
+        self.convert: Converter | None = None
+        self.pending: Speculation | None = None
+        self.pending_time = 0.0
+        self.in_flight: Speculation | None = None
+        self.result: SpeculativeResult | None = None
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+
+        threading.Thread(target=self._worker_thread, daemon=True).start()
+
+    def begin(self, convert: Converter):
+        """
+        Starts speculating for a new activation, converting with `convert`
+        """
+        with self.condition:
+            self.version += 1
+            self.convert = convert
+            self.pending = None
+            self.result = None
+
+    def update(self, text: str):
+        with self.condition:
+            if self.convert is None:
+                return
+
+            self.version += 1
+            self.pending = Speculation(self.version, text, self.convert)
+            self.pending_time = time.perf_counter()
+            self.condition.notify_all()
+
+    def take(self, text: str) -> str | None:
+        """
+        Translation of the final text, precomputed when possible.
+        Ends the speculation, `begin` must be called again for the next activation.
+        """
+        with self.condition:
+            convert = self.convert
+            assert convert, "`begin` wasn't called"
+
+            self.pending = None
+            self.convert = None
+
+            # Finishing a conversion of the same text is quicker than starting over
+            wait_start = time.perf_counter()
+            while self.in_flight and self.in_flight.version == self.version and self.in_flight.text == text:
+                self.condition.wait()
+            waited = time.perf_counter() - wait_start
+
+            result = self.result
+            self.result = None
+            self.version += 1
+
+        if result and result.text == text:
+            self.hits += 1
+            metrics.speculations.inc("hit")
+            self.time_saved += max(result.duration - waited, 0.0)
+            logger.debug("Speculative hit for %r, saved %.3f ms", text, (result.duration - waited) * 1e3)
+
+            return result.translation
+
+        self.misses += 1
+        metrics.speculations.inc("miss")
+        logger.debug("Speculative miss for %r", text)
+
+        return convert(text)
+
+    def hit_rate(self) -> float | None:
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+    def _next_speculation(self) -> Speculation:
+        with self.condition:
+            while True:
+                if self.pending is None:
+                    self.condition.wait()
+                    continue
+
+                remaining = self.pending_time + self.debounce - time.perf_counter()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+
+                speculation = self.pending
+                self.pending = None
+                self.in_flight = speculation
+
+                return speculation
+
+    def _worker_thread(self):
+        while True:
+            speculation = self._next_speculation()
+
+            start = time.perf_counter()
+            try:
+                translation = speculation.convert(speculation.text)
+            except Exception:
+                logger.exception("Speculative conversion of %r failed", speculation.text)
+                translation = None
+            duration = time.perf_counter() - start
+
+            with self.condition:
+                self.in_flight = None
+
+                if speculation.version == self.version:
+                    self.result = SpeculativeResult(speculation.text, translation, duration)
+
+                self.condition.notify_all()
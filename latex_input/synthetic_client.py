@@ -0,0 +1,126 @@
+"""
+In-memory InputClient generating synthetic activations, for load-testing `input_thread`
+without a keyboard or display. Every stage of each activation is timestamped.
+"""
+
+from latex_input.output_writer import OutputResult
+from latex_input.pacing import sleep_until
+
+from collections import deque
+from dataclasses import dataclass
+import itertools
+import time
+from typing import Callable
+
+
+@dataclass(slots=True)
+class Activation:
+    """
+    Times are `time.perf_counter` values, 0.0 for stages that weren't reached
+    """
+    text: str
+    hotkey: float = 0.0        # When the hotkey was (synthetically) pressed
+    activated: float = 0.0     # `wait_for_hotkey` returned
+    captured: float = 0.0      # `listen` returned the complete input
+    output_start: float = 0.0  # The output writer started on it
+    output_end: float = 0.0    # The output writer finished it
+    num_retries: int = 0       # Failed translations, each followed by a `listen`
+    num_backspace: int = 0
+    written: str = ""
+    cancelled: bool = False
+
+
+class SyntheticClient:
+    """
+    Activates `num_activations` times at `rate` activations per second, or back to back with a rate of 0,
+    typing the expressions in turn. Failed translations are cancelled, as retrying would never succeed.
+    With a `key_interval`, expressions are typed one key at a time, otherwise they are captured instantly.
+    With `simulate_output_time`, output takes as long as typing it with the requested delay would.
+
+    Output may be written from another thread while the next activation is captured, it's attributed
+    to activations in order from the output writer's results.
+    """
+    filters_own_output = True
+
+    def __init__(self, expressions: list[str], num_activations: int, rate: float = 0.0, key_interval: float = 0.0,
+                 simulate_output_time: bool = False):
+        self.expressions = itertools.cycle(expressions)
+        self.num_activations = num_activations
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.key_interval = key_interval
+        self.simulate_output_time = simulate_output_time
+        self.activations = list[Activation]()
+        self.start_time = time.perf_counter()
+
+        # Captured activations whose output hasn't been written yet
+        self.awaiting_output = deque[Activation]()
+
+    @property
+    def current(self) -> Activation:
+        return self.activations[-1]
+
+    def wait_for_hotkey(self):
+        """
+        Raises EOFError once every activation has been made
+        """
+        if len(self.activations) >= self.num_activations:
+            raise EOFError("All synthetic activations made")
+
+        if self.interval:
+            # Activations keep their schedule when `input_thread` falls behind, so that queueing shows up as latency
+            hotkey = self.start_time + len(self.activations) * self.interval
+            sleep_until(hotkey)
+        else:
+            hotkey = time.perf_counter()
+
+        self.activations.append(Activation(next(self.expressions), hotkey=hotkey))
+        self.current.activated = time.perf_counter()
+
+    def listen(self, starting_text: str, on_change: Callable[[str], None] | None = None) -> str | None:
+        activation = self.current
+
+        if starting_text:
+            activation.num_retries += 1
+            self.awaiting_output.pop()  # Always the last one captured
+            return None
+
+        if self.key_interval:
+            deadline = time.perf_counter()
+            for i in range(1, len(activation.text) + 1):
+                deadline += self.key_interval
+                sleep_until(deadline)
+
+                if on_change:
+                    on_change(activation.text[:i])
+
+            sleep_until(deadline + self.key_interval)  # Space
+
+        activation.captured = time.perf_counter()
+        self.awaiting_output.append(activation)
+
+        return activation.text
+
+    def output_done(self, result: OutputResult):
+        activation = self.awaiting_output.popleft()
+
+        activation.output_start = result.start
+        activation.output_end = result.end
+        activation.num_backspace = result.num_backspace
+        activation.written = result.job.edit.text[:result.num_written]
+        activation.cancelled = result.cancelled
+
+    def _simulate_typing(self, num_keys: int, delay: float):
+        if self.simulate_output_time:
+            sleep_until(time.perf_counter() + num_keys * delay)
+
+    def send_backspace(self, num_backspace: int, delay: float = 0.0):
+        self._simulate_typing(num_backspace, delay)
+
+    def write(self, text: str, delay: float = 0.0):
+        self._simulate_typing(len(text), delay)
+
+    def active_window_class(self) -> str | None:
+        return None
+
+    def read_line_before_cursor(self) -> str | None:
+        return None
@@ -0,0 +1,226 @@
+"""
+Recording and replay of keystroke traces, so that sessions can be reproduced without
+a display or a live keyboard.
+
+A trace starts with TRACE_HEADER, followed by one record per event:
+- u32 microseconds since the previous event, u8 event kind, u8 key length
+- the key as UTF-8, either a single character or a key name such as `space`, `backspace` or `esc`
+All integers are little-endian.
+"""
+
+from latex_input.capture_buffer import CaptureAction, CaptureBuffer, EDIT_ACTIONS
+from latex_input.minimal_edit import common_prefix_length
+from latex_input.pacing import sleep_until
+
+import atexit
+from dataclasses import dataclass
+from enum import IntEnum
+import struct
+import threading
+import time
+from typing import BinaryIO, Callable, Final, NamedTuple
+
+TRACE_HEADER: Final[bytes] = b"LITRACE\x01"
+TRACE_RECORD: Final[struct.Struct] = struct.Struct("<IBB")
+MAX_DELTA_US: Final[int] = 0xFFFFFFFF
+
+
+class TraceEventKind(IntEnum):
+    KEY = 1     # A key press while the client was listening
+    HOTKEY = 2  # The activation hotkey
+
+
+class TraceEvent(NamedTuple):
+    time: float  # Seconds since the start of the trace
+    kind: TraceEventKind
+    key: str
+
+
+class TraceWriter:
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self.lock = threading.Lock()
+        self.last_time: float | None = None
+
+        self.file.write(TRACE_HEADER)
+
+    @classmethod
+    def open(cls, path: str) -> "TraceWriter":
+        writer = cls(open(path, "wb"))
+        atexit.register(writer.close)
+
+        return writer
+
+    def record(self, kind: TraceEventKind, key: str = ""):
+        now = time.perf_counter()
+        key_bytes = key.encode("utf-8")[:255]
+
+        with self.lock:
+            delta_us = 0 if self.last_time is None else round((now - self.last_time) * 1e6)
+            self.last_time = now
+
+            self.file.write(TRACE_RECORD.pack(min(delta_us, MAX_DELTA_US), kind, len(key_bytes)))
+            self.file.write(key_bytes)
+
+            # Activations are rare, make sure a killed daemon still leaves a useful trace
+            if kind == TraceEventKind.HOTKEY:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+def read_trace(file: BinaryIO) -> list[TraceEvent]:
+    if file.read(len(TRACE_HEADER)) != TRACE_HEADER:
+        raise ValueError("Not a keystroke trace, or an unsupported version")
+
+    events = []
+    elapsed_us = 0
+
+    while header := file.read(TRACE_RECORD.size):
+        if len(header) < TRACE_RECORD.size:
+            break  # Truncated by an interrupted recording
+
+        delta_us, kind, key_length = TRACE_RECORD.unpack(header)
+        key = file.read(key_length)
+        if len(key) < key_length:
+            break
+
+        elapsed_us += delta_us
+        events.append(TraceEvent(elapsed_us / 1e6, TraceEventKind(kind), key.decode("utf-8")))
+
+    return events
+
+
+class RecordingClient:
+    """
+    Wraps an InputClient to record a trace of its activations and captured text.
+    Used for clients that can't report individual key presses, so timing within
+    a single `listen` call is lost.
+    """
+    def __init__(self, client, writer: TraceWriter):
+        self.client = client
+        self.writer = writer
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+    def wait_for_hotkey(self):
+        self.client.wait_for_hotkey()
+        self.writer.record(TraceEventKind.HOTKEY)
+
+    def listen(self, starting_text: str, on_change: Callable[[str], None] | None = None) -> str | None:
+        text = self.client.listen(starting_text, on_change)
+
+        if text is None:
+            self.writer.record(TraceEventKind.KEY, "esc")
+            return None
+
+        # Replay starts from the same starting text, only record what changed
+        common = common_prefix_length(starting_text, text)
+
+        for _ in range(len(starting_text) - common):
+            self.writer.record(TraceEventKind.KEY, "backspace")
+        for c in text[common:]:
+            self.writer.record(TraceEventKind.KEY, c)
+        self.writer.record(TraceEventKind.KEY, "space")
+
+        return text
+
+
+@dataclass
+class OutputEvent:
+    time: float  # Seconds since the replay started
+    kind: str  # `backspace` or `write`
+    count: int
+    text: str = ""
+
+
+class ReplayClient:
+    """
+    InputClient replaying a recorded trace, at the original speed multiplied by `speed`
+    or as fast as possible with a speed of 0.
+    Besides recording the output, it simulates the text field being typed into, see `screen`.
+    """
+    def __init__(self, events: list[TraceEvent], speed: float = 1.0):
+        self.events = events
+        self.speed = speed
+        self.position = 0
+        self.start_time = time.perf_counter()
+        self.output = list[OutputEvent]()
+        # Includes the text field's cursor, which the arrow keys move
+        self.screen_buffer = CaptureBuffer(clamp_cursor=True)
+
+    @classmethod
+    def open(cls, path: str, speed: float = 1.0) -> "ReplayClient":
+        with open(path, "rb") as f:
+            return cls(read_trace(f), speed)
+
+    def _next_event(self) -> TraceEvent | None:
+        if self.position >= len(self.events):
+            return None
+
+        event = self.events[self.position]
+        self.position += 1
+
+        if self.speed > 0:
+            sleep_until(self.start_time + event.time / self.speed)
+
+        return event
+
+    @property
+    def screen(self) -> str:
+        return self.screen_buffer.text
+
+    def _type_key(self, key: str):
+        if self.screen_buffer.apply(key) is CaptureAction.FINISH:
+            self.screen_buffer.insert(" ")  # Space is only special while capturing
+
+    def wait_for_hotkey(self):
+        """
+        Raises EOFError once the trace is exhausted
+        """
+        while event := self._next_event():
+            if event.kind == TraceEventKind.HOTKEY:
+                return
+
+            self._type_key(event.key)
+
+        raise EOFError("End of keystroke trace")
+
+    def listen(self, starting_text: str, on_change: Callable[[str], None] | None = None) -> str | None:
+        buffer = CaptureBuffer(starting_text)
+
+        while self.position < len(self.events):
+            if self.events[self.position].kind == TraceEventKind.HOTKEY:
+                return None  # Left for the next `wait_for_hotkey`
+
+            event = self._next_event()
+            assert event
+            self._type_key(event.key)
+            action = buffer.apply(event.key)
+
+            if action is CaptureAction.FINISH:
+                return buffer.text
+            elif action is CaptureAction.CANCEL:
+                return None
+            elif on_change and action in EDIT_ACTIONS:
+                on_change(buffer.text)
+
+        return None
+
+    def write(self, text: str, delay: float = 0.0):
+        self.output.append(OutputEvent(time.perf_counter() - self.start_time, "write", len(text), text))
+        self.screen_buffer.insert(text)
+
+    def send_backspace(self, num_backspace: int, delay: float = 0.0):
+        self.output.append(OutputEvent(time.perf_counter() - self.start_time, "backspace", num_backspace))
+        self.screen_buffer.backspace(num_backspace)
+
+    def active_window_class(self) -> str | None:
+        return None
+
+    def read_line_before_cursor(self) -> str | None:
+        return self.screen_buffer.text_before_cursor.rpartition("\n")[2]
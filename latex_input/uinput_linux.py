@@ -0,0 +1,263 @@
+"""
+Keyboard input and output through the kernel, without going through X11:
+- UinputKeyboard writes key events to a virtual device created through /dev/uinput,
+  queueing a whole burst and submitting it with a single write() and one SYN report
+- EvdevKeyReader reads key presses from the keyboards in /dev/input for hotkey detection
+  and capture
+This works on Wayland as well as X11, but requires write access to /dev/uinput and read
+access to /dev/input/event* (usually membership of the `input` group).
+Characters are mapped for the US keyboard layout.
+"""
+
+from latex_input.pacing import PacingScheduler
+
+import fcntl
+import glob
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from typing import Callable, Final
+
+logger = logging.getLogger(__name__)
+
+UINPUT_PATH: Final[str] = "/dev/uinput"
+VIRTUAL_DEVICE_NAME: Final[str] = "latex_input virtual keyboard"
+# Time for the compositor or X server to pick up a newly created device
+DEVICE_SETTLE_TIME: Final[float] = 0.2
+
+# From linux/input-event-codes.h
+EV_SYN: Final[int] = 0x00
+EV_KEY: Final[int] = 0x01
+SYN_REPORT: Final[int] = 0
+BUS_VIRTUAL: Final[int] = 0x06
+
+KEY_RELEASE: Final[int] = 0
+KEY_PRESS: Final[int] = 1
+KEY_REPEAT: Final[int] = 2
+
+# From linux/uinput.h and linux/input.h
+UI_SET_EVBIT: Final[int] = 0x40045564
+UI_SET_KEYBIT: Final[int] = 0x40045565
+UI_DEV_CREATE: Final[int] = 0x5501
+UI_DEV_DESTROY: Final[int] = 0x5502
+
+
+def _eviocgname(length: int) -> int:
+    return (2 << 30) | (length << 16) | (ord("E") << 8) | 0x06
+
+
+def _eviocgbit(event_type: int, length: int) -> int:
+    return (2 << 30) | (length << 16) | (ord("E") << 8) | (0x20 + event_type)
+
+
+INPUT_EVENT: Final[struct.Struct] = struct.Struct("llHHi")  # struct input_event
+UINPUT_USER_DEV: Final[struct.Struct] = struct.Struct("80sHHHHi256i")  # struct uinput_user_dev
+
+# Key codes for the keysym names used by the input client
+KEY_CODES: Final[dict[str, int]] = {
+    "Escape": 1, "BackSpace": 14, "Tab": 15, "Return": 28, "Control_L": 29, "Shift_L": 42,
+    "Alt_L": 56, "space": 57, "Control_R": 97, "Alt_R": 100, "Home": 102, "Up": 103,
+    "Left": 105, "Right": 106, "End": 107, "Down": 108, "Delete": 111, "Shift_R": 54,
+    **{c: code for code, c in enumerate("1234567890", start=2)},
+    **{c: code for code, c in enumerate("qwertyuiop", start=16)},
+    **{c: code for code, c in enumerate("asdfghjkl", start=30)},
+    **{c: code for code, c in enumerate("zxcvbnm", start=44)},
+}
+
+# US layout characters for key codes, without and with shift
+_CHARACTERS: Final[dict[int, tuple[str, str]]] = {
+    **{code: (c, s) for code, (c, s) in enumerate(zip("1234567890-=", "!@#$%^&*()_+"), start=2)},
+    **{code: (c, s) for code, (c, s) in enumerate(zip("qwertyuiop[]", "QWERTYUIOP{}"), start=16)},
+    **{code: (c, s) for code, (c, s) in enumerate(zip("asdfghjkl;'`", 'ASDFGHJKL:"~'), start=30)},
+    43: ("\\", "|"),
+    **{code: (c, s) for code, (c, s) in enumerate(zip("zxcvbnm,./", "ZXCVBNM<>?"), start=44)},
+}
+
+# Names of non-character keys, matching pynput's `Key` names
+_KEY_NAMES: Final[dict[int, str]] = {
+    1: "esc", 14: "backspace", 15: "tab", 28: "enter", 57: "space", 102: "home", 103: "up",
+    104: "page_up", 105: "left", 106: "right", 107: "end", 108: "down", 109: "page_down", 111: "delete",
+}
+
+_SHIFT_CODES: Final[frozenset[int]] = frozenset((42, 54))
+_CTRL_CODES: Final[frozenset[int]] = frozenset((29, 97))
+_ALT_CODES: Final[frozenset[int]] = frozenset((56, 100))
+
+
+def is_available() -> bool:
+    return os.access(UINPUT_PATH, os.W_OK) and any(
+        os.access(path, os.R_OK) for path in glob.glob("/dev/input/event*"))
+
+
+class UinputKeyboard:
+    """
+    Same interface as XTestKeyboard, keys are X keysym names
+    """
+    def __init__(self, path: str = UINPUT_PATH, name: str = VIRTUAL_DEVICE_NAME):
+        self.fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+        self.pending = bytearray()
+
+        try:
+            fcntl.ioctl(self.fd, UI_SET_EVBIT, EV_KEY)
+            fcntl.ioctl(self.fd, UI_SET_EVBIT, EV_SYN)
+            for code in KEY_CODES.values():
+                fcntl.ioctl(self.fd, UI_SET_KEYBIT, code)
+
+            os.write(self.fd, UINPUT_USER_DEV.pack(name.encode("utf-8"), BUS_VIRTUAL, 1, 1, 1, 0, *[0] * 256))
+            fcntl.ioctl(self.fd, UI_DEV_CREATE)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+        time.sleep(DEVICE_SETTLE_TIME)
+
+    def _queue(self, event_type: int, code: int, value: int):
+        self.pending += INPUT_EVENT.pack(0, 0, event_type, code, value)
+
+    def press(self, key: str, delay: float = 0.0):
+        self._queue(EV_KEY, KEY_CODES[key], KEY_PRESS)
+
+    def release(self, key: str):
+        self._queue(EV_KEY, KEY_CODES[key], KEY_RELEASE)
+
+    def tap(self, key: str, count: int = 1, delay: float = 0.0):
+        # Pacing needs the kernel to see each key on its own, so paced taps are flushed one by one
+        pacer = PacingScheduler(delay) if delay > 0 else None
+
+        for _ in range(count):
+            self.press(key)
+            self.release(key)
+
+            if pacer:
+                self.flush()
+                pacer.wait()
+
+    def chord(self, *keys: str):
+        for key in keys:
+            self.press(key)
+        for key in reversed(keys):
+            self.release(key)
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        self._queue(EV_SYN, SYN_REPORT, 0)
+        written = 0
+        # The device is non-blocking, so a full buffer fails the write or makes it short
+        while True:
+            try:
+                written += os.write(self.fd, self.pending[written:])
+            except BlockingIOError:
+                pass
+
+            if written >= len(self.pending):
+                break
+
+            select.select([], [self.fd], [])
+
+        self.pending.clear()
+
+    def close(self):
+        fcntl.ioctl(self.fd, UI_DEV_DESTROY)
+        os.close(self.fd)
+
+
+def _device_name(fd: int) -> str:
+    buffer = bytearray(256)
+    fcntl.ioctl(fd, _eviocgname(len(buffer)), buffer)
+
+    return buffer.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+
+
+def _is_keyboard(fd: int) -> bool:
+    key_bits = bytearray(96)  # KEY_MAX / 8
+    fcntl.ioctl(fd, _eviocgbit(EV_KEY, len(key_bits)), key_bits)
+
+    def has_key(code: int) -> bool:
+        return bool(key_bits[code // 8] & (1 << (code % 8)))
+
+    return all(has_key(KEY_CODES[c]) for c in "qaz") and has_key(KEY_CODES["space"])
+
+
+class EvdevKeyReader:
+    """
+    Reads key presses from every keyboard on a background thread, ignoring our own virtual device.
+    `on_key` receives a character or a key name such as `space`, `backspace` or `esc`.
+    `on_hotkey` is called instead of `on_key` when Ctrl+Shift+I is pressed.
+    """
+    def __init__(self, on_key: Callable[[str], None], on_hotkey: Callable[[], None],
+                 device_paths: list[str] | None = None):
+        self.on_key = on_key
+        self.on_hotkey = on_hotkey
+        self.device_paths = device_paths
+        self.fds = list[int]()
+        self.held = set[int]()
+
+        self._open_devices()
+        threading.Thread(target=self._read_thread, daemon=True).start()
+
+    def _open_devices(self):
+        for path in self.device_paths or sorted(glob.glob("/dev/input/event*")):
+            try:
+                fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+            except OSError:
+                continue
+
+            try:
+                if self.device_paths or (_device_name(fd) != VIRTUAL_DEVICE_NAME and _is_keyboard(fd)):
+                    self.fds.append(fd)
+                    continue
+            except OSError:
+                pass
+
+            os.close(fd)
+
+        if not self.fds:
+            raise OSError("No readable keyboard devices found in /dev/input")
+
+    def _read_thread(self):
+        while True:
+            readable, _, _ = select.select(self.fds, [], [])
+
+            for fd in readable:
+                try:
+                    data = os.read(fd, INPUT_EVENT.size * 64)
+                except BlockingIOError:
+                    continue
+                except OSError as e:  # Device unplugged
+                    logger.info("Stopped reading a keyboard: %s", e)
+                    self.fds.remove(fd)
+                    os.close(fd)
+                    continue
+
+                for _, _, event_type, code, value in INPUT_EVENT.iter_unpack(data):
+                    if event_type == EV_KEY:
+                        self._handle_key(code, value)
+
+    def _handle_key(self, code: int, value: int):
+        if value == KEY_RELEASE:
+            self.held.discard(code)
+            return
+
+        if value == KEY_PRESS:
+            self.held.add(code)
+
+        is_shift = not self.held.isdisjoint(_SHIFT_CODES)
+        is_ctrl = not self.held.isdisjoint(_CTRL_CODES)
+
+        if code == KEY_CODES["i"] and is_ctrl and is_shift:
+            if value == KEY_PRESS:
+                self.on_hotkey()
+            return
+
+        if is_ctrl or not self.held.isdisjoint(_ALT_CODES):
+            return  # Shortcuts don't type anything
+
+        if code in _KEY_NAMES:
+            self.on_key(_KEY_NAMES[code])
+        elif code in _CHARACTERS:
+            self.on_key(_CHARACTERS[code][is_shift])
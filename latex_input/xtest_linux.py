@@ -0,0 +1,299 @@
+"""
+Keyboard output through the XTEST extension. Fake key events are queued in python-xlib's
+request buffer and only sent on `flush`, which waits for a single round trip to the X server
+instead of one per event as pynput's Controller does.
+KeysymRemapWriter types any unicode text by temporarily mapping the characters it needs onto
+unused keycodes, without going through the clipboard, so it also works in terminals.
+"""
+
+import atexit
+from collections import Counter
+import threading
+import time
+from typing import Callable, Final
+
+# Upper bound on the keycodes remapped at once, keeping the mapping requests small
+MAX_REMAPPED_KEYCODES: Final[int] = 32
+# Time for clients to handle the keys typed with a mapping before it changes, see KeysymRemapWriter
+REMAP_SETTLE_TIME: Final[float] = 0.05
+# The remapped keycodes are emptied once nothing was typed with them for this long
+REMAP_RESTORE_DELAY: Final[float] = 0.5
+# Keysyms for unicode characters, see the X11 protocol's appendix on keysym encoding
+UNICODE_KEYSYM_OFFSET: Final[int] = 0x01000000
+
+# pynput equivalents of the keysym names used by the input client, for the fallback keyboard
+_PYNPUT_KEYS: Final[dict[str, str]] = {
+    "BackSpace": "backspace",
+    "Control_L": "ctrl",
+    "Shift_L": "shift",
+    "Return": "enter",
+    "Escape": "esc",
+    "Left": "left",
+    "Right": "right",
+    "Home": "home",
+    "End": "end",
+    "Delete": "delete",
+    "space": "space",
+}
+
+
+class XTestKeyboard:
+    """
+    Keys are X keysym names, e.g. `BackSpace`, `Control_L` or `v`
+    """
+    def __init__(self):
+        from Xlib import X, XK, display
+        from Xlib.ext import xtest
+
+        self.X = X
+        self.XK = XK
+        self.xtest = xtest
+        self.display = display.Display()
+        self.keycodes = dict[str, int]()
+        # Called with the keycode of every key press before it's sent, to tell it apart from the user's
+        self.on_press_keycode: Callable[[int], None] | None = None
+
+        if not self.display.has_extension("XTEST"):
+            raise RuntimeError("X server doesn't support the XTEST extension")
+
+    def keycode(self, key: str) -> int:
+        if key not in self.keycodes:
+            keycode = self.display.keysym_to_keycode(self.XK.string_to_keysym(key))
+            if not keycode:
+                raise ValueError(f"No keycode is mapped to {key}")
+
+            self.keycodes[key] = keycode
+
+        return self.keycodes[key]
+
+    def press(self, key: str, delay: float = 0.0):
+        """
+        `delay` is paced by the X server, which waits that long before processing the event
+        """
+        self.press_keycode(self.keycode(key), delay)
+
+    def release(self, key: str):
+        self.release_keycode(self.keycode(key))
+
+    def press_keycode(self, keycode: int, delay: float = 0.0):
+        if self.on_press_keycode:
+            self.on_press_keycode(keycode)
+
+        self.xtest.fake_input(self.display, self.X.KeyPress, keycode, time=round(delay * 1000))
+
+    def release_keycode(self, keycode: int):
+        self.xtest.fake_input(self.display, self.X.KeyRelease, keycode)
+
+    def tap(self, key: str, count: int = 1, delay: float = 0.0):
+        for _ in range(count):
+            self.press(key, delay)
+            self.release(key)
+
+    def chord(self, *keys: str):
+        for key in keys:
+            self.press(key)
+        for key in reversed(keys):
+            self.release(key)
+
+    def flush(self):
+        # The sync reply guarantees every queued event has been processed
+        self.display.sync()
+
+
+class InjectedKeys:
+    """
+    Counts the key presses sent through XTEST by keycode until a listener sees them, which it does in
+    the order they were sent, so it can tell each of them apart from the user's key presses.
+    A press of the same key by the user may be taken for ours instead, what is captured is the same.
+    """
+    def __init__(self):
+        self.pending = Counter[int]()
+        self.lock = threading.Lock()
+
+    def expect(self, keycode: int):
+        # Called before the press is sent, so the listener can't see it first
+        with self.lock:
+            self.pending[keycode] += 1
+
+    def take(self, keycode: int) -> bool:
+        """
+        Whether a key press seen by the listener was sent by us
+        """
+        with self.lock:
+            if not self.pending[keycode]:
+                return False
+
+            self.pending[keycode] -= 1
+            return True
+
+
+def keysym_for(char: str) -> int:
+    code_point = ord(char)
+
+    # Latin-1 keysyms match their code points, everything else uses the unicode range
+    if 0x20 <= code_point <= 0x7E or 0xA0 <= code_point <= 0xFF:
+        return code_point
+
+    return UNICODE_KEYSYM_OFFSET + code_point
+
+
+def split_remap_batches(text: str, max_keysyms: int) -> list[str]:
+    """
+    Splits text into consecutive parts that each contain at most `max_keysyms` distinct characters,
+    so every part can be typed with a single keyboard remapping
+    """
+    batches = list[str]()
+    start = 0
+    distinct = set[str]()
+
+    for i, c in enumerate(text):
+        if c not in distinct and len(distinct) == max_keysyms:
+            batches.append(text[start:i])
+            start = i
+            distinct.clear()
+
+        distinct.add(c)
+
+    if start < len(text):
+        batches.append(text[start:])
+
+    return batches
+
+
+def longest_unused_range(mapping: list[tuple[int, ...]], first_keycode: int) -> tuple[int, int]:
+    """
+    First keycode and length of the longest run of keycodes without any keysyms
+    """
+    best_start, best_length = first_keycode, 0
+    start, length = first_keycode, 0
+
+    for keycode, keysyms in enumerate(mapping, start=first_keycode):
+        if any(keysyms):
+            length = 0
+            continue
+
+        if length == 0:
+            start = keycode
+        length += 1
+
+        if length > best_length:
+            best_start, best_length = start, length
+
+    return best_start, best_length
+
+
+class KeysymRemapWriter:
+    """
+    Types text through an XTestKeyboard. The characters of each batch are mapped onto a range
+    of unused keycodes with a single ChangeKeyboardMapping request, then typed.
+    Clients translate keycodes with the server's mapping as of when they handle MappingNotify,
+    not as of when a key was typed, so a mapping is only changed once the keys typed with it had
+    `settle_time` to be handled. Mappings are kept between writes, text using the characters
+    already mapped is typed right away, and the range is emptied after `restore_delay` without
+    writes.
+    """
+    def __init__(self, keyboard: XTestKeyboard, settle_time: float = REMAP_SETTLE_TIME,
+                 restore_delay: float = REMAP_RESTORE_DELAY):
+        self.keyboard = keyboard
+        self.display = keyboard.display
+        self.settle_time = settle_time
+        self.restore_delay = restore_delay
+
+        self.mapped = dict[str, int]()  # Keycodes of the characters currently mapped
+        self.lock = threading.Lock()
+        self.restore_timer: threading.Timer | None = None
+
+        info = self.display.display.info
+        mapping = self.display.get_keyboard_mapping(info.min_keycode, info.max_keycode - info.min_keycode + 1)
+        self.keysyms_per_keycode = len(mapping[0]) if mapping else 2
+
+        self.first_keycode, num_unused = longest_unused_range(mapping, info.min_keycode)
+        self.num_keycodes = min(num_unused, MAX_REMAPPED_KEYCODES)
+
+        if self.num_keycodes == 0:
+            raise RuntimeError("No unused keycodes to map characters onto")
+
+        atexit.register(self.restore)
+
+    def _change_mapping(self, chars: list[str]):
+        if self.mapped:
+            # Wait until every key typed with the current mapping was processed, then give clients time to handle it
+            self.keyboard.flush()
+            time.sleep(self.settle_time)
+
+        keysyms = [(keysym_for(c),) * self.keysyms_per_keycode for c in chars]
+        # Keycodes left over from a larger batch are emptied as well
+        keysyms += [(0,) * self.keysyms_per_keycode] * (self.num_keycodes - len(chars))
+
+        self.display.change_keyboard_mapping(self.first_keycode, keysyms)
+        self.mapped = {c: self.first_keycode + i for i, c in enumerate(chars)}
+
+    def write(self, text: str, delay: float = 0.0):
+        with self.lock:
+            if self.restore_timer:
+                self.restore_timer.cancel()
+
+            # Paced by the X server like XTestKeyboard.tap, so each batch is sent in one go
+            for batch in split_remap_batches(text, self.num_keycodes):
+                if not all(c in self.mapped for c in batch):
+                    self._change_mapping(list(dict.fromkeys(batch)))
+
+                for c in batch:
+                    self.keyboard.press_keycode(self.mapped[c], delay)
+                    self.keyboard.release_keycode(self.mapped[c])
+
+            self.keyboard.flush()
+
+            self.restore_timer = threading.Timer(self.restore_delay, self.restore)
+            self.restore_timer.daemon = True
+            self.restore_timer.start()
+
+    def restore(self):
+        """
+        Empties the remapped keycodes, once the keys typed with them had time to be handled
+        """
+        with self.lock:
+            if self.restore_timer:
+                self.restore_timer.cancel()
+                self.restore_timer = None
+
+            if self.mapped:
+                self._change_mapping([])
+                self.keyboard.flush()
+
+
+class PynputKeyboard:
+    """
+    Fallback with the same interface as XTestKeyboard, sending every event immediately
+    """
+    def __init__(self, controller):
+        from pynput import keyboard as pkeyboard
+
+        self.pkeyboard = pkeyboard
+        self.controller = controller
+
+    def _key(self, key: str):
+        if key in _PYNPUT_KEYS:
+            return getattr(self.pkeyboard.Key, _PYNPUT_KEYS[key])
+
+        return key
+
+    def press(self, key: str, delay: float = 0.0):
+        self.controller.press(self._key(key))
+
+    def release(self, key: str):
+        self.controller.release(self._key(key))
+
+    def tap(self, key: str, count: int = 1, delay: float = 0.0):
+        for _ in range(count):
+            self.press(key, delay)
+            self.release(key)
+
+    def chord(self, *keys: str):
+        for key in keys:
+            self.press(key)
+        for key in reversed(keys):
+            self.release(key)
+
+    def flush(self):
+        pass
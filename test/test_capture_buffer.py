@@ -0,0 +1,77 @@
+from latex_input.capture_buffer import CaptureAction, CaptureBuffer, action_for
+
+import unittest
+
+
+def apply_all(buffer: CaptureBuffer, keys: list[str]) -> list[CaptureAction]:
+    return [buffer.apply(key) for key in keys]
+
+
+class TestCaptureBuffer(unittest.TestCase):
+    def test_action_for(self):
+        self.assertIs(action_for("a"), CaptureAction.INSERT)
+        self.assertIs(action_for("α"), CaptureAction.INSERT)
+        self.assertIs(action_for("left"), CaptureAction.LEFT)
+        self.assertIs(action_for("esc"), CaptureAction.CANCEL)
+        self.assertIs(action_for("shift"), CaptureAction.IGNORE)
+
+    def test_typing(self):
+        buffer = CaptureBuffer("\\al")
+        apply_all(buffer, ["p", "a", "backspace", "h", "a"])
+
+        self.assertEqual(buffer.text, "\\alpha")
+        self.assertTrue(buffer.at_end)
+        self.assertIs(buffer.apply("space"), CaptureAction.FINISH)
+        self.assertEqual(buffer.text, "\\alpha")
+
+    def test_editing_in_the_middle(self):
+        buffer = CaptureBuffer("\\frac12")
+        apply_all(buffer, ["left", "left", "{", "right", "}", "{", "right", "}"])
+        self.assertEqual(buffer.text, "\\frac{1}{2}")
+
+        apply_all(buffer, ["left"] * 11 + ["delete", "right", "backspace"])
+        self.assertEqual(buffer.text, "rac{1}{2}")
+        self.assertEqual(buffer.cursor, 0)
+
+        # Space is typed in the middle of the text and only converts at its end
+        apply_all(buffer, ["right", "right", "right"])
+        self.assertIs(buffer.apply("space"), CaptureAction.INSERT)
+        self.assertEqual(buffer.text, "rac {1}{2}")
+        self.assertEqual(buffer.text_before_cursor, "rac ")
+
+    def test_leaving_the_text_cancels(self):
+        # The text field already holds "x = " before the activation point, which isn't captured
+        field = CaptureBuffer("x = ", clamp_cursor=True)
+        buffer = CaptureBuffer()
+        keys = ["\\", "a", "left", "left", "left", "b"]
+
+        self.assertEqual(apply_all(field, keys)[-1], CaptureAction.INSERT)
+        self.assertEqual(field.text, "x =b \\a")
+        self.assertEqual(apply_all(buffer, keys)[-2:], [CaptureAction.CANCEL, CaptureAction.INSERT])
+
+        # Nor is what may follow the captured text, or other lines
+        for keys in (["backspace"] * 3, ["home"], ["end"], ["up"], ["page_down"], ["right"],
+                     ["left", "delete", "delete"]):
+            with self.subTest(keys=keys):
+                actions = apply_all(CaptureBuffer(), ["\\", "a"] + keys)
+                self.assertEqual(actions[-1], CaptureAction.CANCEL)
+                self.assertNotIn(CaptureAction.CANCEL, actions[:-1])
+
+    def test_clamped_cursor_stays_within_the_text(self):
+        buffer = CaptureBuffer("ab", clamp_cursor=True)
+
+        self.assertIs(buffer.apply("right"), CaptureAction.IGNORE)
+        self.assertIs(buffer.apply("delete"), CaptureAction.IGNORE)
+        apply_all(buffer, ["left", "left"])
+        self.assertIs(buffer.apply("left"), CaptureAction.IGNORE)
+        self.assertIs(buffer.apply("backspace"), CaptureAction.IGNORE)
+        self.assertEqual((buffer.text, buffer.cursor), ("ab", 0))
+
+        buffer.insert("xy")
+        buffer.backspace(5)
+        self.assertEqual((buffer.text, buffer.cursor), ("ab", 0))
+
+        self.assertIs(buffer.apply("end"), CaptureAction.END)
+        self.assertIs(buffer.apply("up"), CaptureAction.IGNORE)
+        self.assertIs(buffer.apply("home"), CaptureAction.HOME)
+        self.assertEqual(buffer.cursor, 0)
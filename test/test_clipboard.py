@@ -0,0 +1,118 @@
+from latex_input.clipboard_linux import (
+    PreservingClipboard, WaylandClipboard, XclipClipboard, XSelectionClipboard, make_clipboard
+)
+from xvfb import HAS_XVFB, start_xvfb
+
+import os
+import time
+import unittest
+from unittest import mock
+
+
+class MemoryClipboard:
+    def __init__(self, text: str | None = None):
+        self.text = text
+
+    def set_text(self, text: str):
+        self.text = text
+
+    def get_text(self) -> str | None:
+        return self.text
+
+
+class TestPreservingClipboard(unittest.TestCase):
+    def test_overlapping_pastes(self):
+        backend = MemoryClipboard("user")
+        clipboard = PreservingClipboard(backend)
+
+        clipboard.save_async()
+        clipboard.set_text("α")
+        clipboard.restore_later(0.05)
+
+        # The next activation starts before the first paste was restored
+        clipboard.save_async()
+        clipboard.set_text("β")
+        self.assertEqual(backend.text, "β")
+        clipboard.restore_later(0.05)
+
+        time.sleep(0.2)
+        self.assertEqual(backend.text, "user")
+        self.assertFalse(clipboard.owns_clipboard)
+
+    def test_cancelled_activation(self):
+        backend = MemoryClipboard("user")
+        clipboard = PreservingClipboard(backend)
+
+        clipboard.save_async()
+        clipboard.set_text("α")
+        clipboard.restore_later(0.05)
+
+        # Activated again and cancelled without pasting, the first paste is still restored
+        clipboard.save_async()
+
+        time.sleep(0.2)
+        self.assertEqual(backend.text, "user")
+
+    def test_borrowed(self):
+        backend = MemoryClipboard("user")
+        clipboard = PreservingClipboard(backend)
+
+        clipboard.save_async()
+        clipboard.set_text("α")
+        clipboard.restore_later(0.05)
+
+        # The pending restore waits until the clipboard is given back
+        with clipboard.borrowed() as borrowed:
+            borrowed.set_text("probe")
+            time.sleep(0.1)
+            self.assertEqual(backend.text, "probe")
+
+        time.sleep(0.6)
+        self.assertEqual(backend.text, "user")
+
+        # Without a paste to restore, the user's contents are saved first
+        with clipboard.borrowed() as borrowed:
+            borrowed.set_text("probe")
+
+        time.sleep(0.6)
+        self.assertEqual(backend.text, "user")
+
+
+class TestClipboardBackends(unittest.TestCase):
+    def test_make_clipboard(self):
+        with mock.patch.dict(os.environ, {"WAYLAND_DISPLAY": "wayland-0"}):
+            self.assertIsInstance(make_clipboard(), WaylandClipboard)
+
+        # Without an X connection, xclip is spawned instead
+        with mock.patch.dict(os.environ, {"WAYLAND_DISPLAY": ""}), \
+                mock.patch("latex_input.clipboard_linux.XSelectionClipboard", side_effect=OSError("No display")), \
+                self.assertLogs("latex_input.clipboard_linux", "WARNING"):
+            self.assertIsInstance(make_clipboard(), XclipClipboard)
+
+    def test_missing_command(self):
+        with mock.patch("latex_input.clipboard_linux.run", side_effect=FileNotFoundError("xclip")):
+            self.assertIsNone(XclipClipboard().get_text())
+            self.assertIsNone(WaylandClipboard().get_text())
+
+
+@unittest.skipUnless(HAS_XVFB, "Requires Xvfb")
+class TestXSelectionClipboard(unittest.TestCase):
+    def setUp(self):
+        start_xvfb(self)
+
+    def test_ownership(self):
+        ours = XSelectionClipboard()
+        other = XSelectionClipboard()
+        self.assertIsNone(ours.get_text())
+
+        # Other applications read our text from the event thread
+        ours.set_text("α + β")
+        self.assertEqual(other.get_text(), "α + β")
+
+        # Until another application takes the selection over
+        other.set_text("copied")
+        deadline = time.monotonic() + 1
+        while ours.text is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(ours.get_text(), "copied")
@@ -0,0 +1,30 @@
+import subprocess
+import sys
+import unittest
+
+
+class TestConvertCommand(unittest.TestCase):
+    def run_convert(self, text: str, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, "-m", "latex_input", "convert", *args],
+            input=text.encode("utf-8"),
+            capture_output=True
+        )
+
+    def test_convert(self):
+        result = self.run_convert("x^2\n\\alpha + \\beta\nlambda\n")
+
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout.decode("utf-8"), "x²\nα + β\nλ\n")
+
+    def test_failed_lines_are_kept(self):
+        result = self.run_convert("a^b\n\\invalid\nx_2\n")
+
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stdout.decode("utf-8"), "aᵇ\n\\invalid\nx₂\n")
+
+    def test_modes_and_workers(self):
+        result = self.run_convert("lambda\nx\n", "--no-easy-mode", "--math-mode", "-j", "2")
+
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout.decode("utf-8"), "𝑙𝑎𝑚𝑏𝑑𝑎\n𝑥\n")
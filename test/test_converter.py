@@ -1,4 +1,5 @@
-from latex_input.latex_converter import latex_to_unicode
+from latex_input.latex_converter import ConversionVariant, FontContext, latex_to_unicode, latex_to_unicode_variants
+from latex_input.unicode_structs import FontVariantType
 
 import unittest
 
@@ -99,3 +100,23 @@ class TestConverter(unittest.TestCase):
                 self.assertEqual(latex_to_unicode(k), v, f"Failed on test for {k, v}")
             except AssertionError as e:
                 self.fail(f"Exception raised on test for {k, v}: {e}")
+
+    def test_variants(self):
+        upright = FontContext()
+        italic = FontContext(formatting=FontVariantType.ITALIC)
+        variants = [ConversionVariant(context, is_easy_mode)
+                    for context in (upright, italic) for is_easy_mode in (False, True)]
+
+        tests = {
+            "lambda":               ["lambda", "λ", "𝑙𝑎𝑚𝑏𝑑𝑎", "𝜆"],
+            "x^2 + \\vec{v}_0":     ["x² + v⃗₀", "x² + v⃗₀", "𝑥² + 𝑣⃗₀", "𝑥² + 𝑣⃗₀"],
+            "\\mathbb{R}\\b{x}":    ["ℝ𝐱", "ℝ𝐱", "ℝ𝒙", "ℝ𝒙"],
+            "\\invalid":            [None, None, None, None],
+        }
+
+        for tex, expected in tests.items():
+            self.assertEqual(latex_to_unicode_variants(tex, variants), expected, tex)
+            self.assertEqual(latex_to_unicode_variants(tex, variants),
+                             [latex_to_unicode(tex, context, is_easy_mode) for context, is_easy_mode in variants])
+
+        self.assertEqual(latex_to_unicode_variants("x", []), [])
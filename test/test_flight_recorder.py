@@ -0,0 +1,59 @@
+from latex_input import app
+from latex_input.flight_recorder import FlightRecorder, flight_recorder
+from latex_input.minimal_edit import Edit
+from latex_input.output_writer import OutputJob, OutputResult
+from latex_input.synthetic_client import SyntheticClient
+
+import io
+import json
+import unittest
+
+
+class TestFlightRecorder(unittest.TestCase):
+    def test_ring_buffer(self):
+        recorder = FlightRecorder(capacity=3)
+        slots = list(recorder.slots)
+
+        for i in range(5):
+            recorder.begin(f"x_{i}", False, True).translation = f"x{i}"
+
+        # Records are overwritten in place, oldest first
+        self.assertTrue(all(a is b for a, b in zip(recorder.slots, slots)))
+        self.assertEqual([(r.sequence, r.text) for r in recorder.records()], [(2, "x_2"), (3, "x_3"), (4, "x_4")])
+
+        # Output of an overwritten record is ignored
+        job = OutputJob(0, "x_1 ", Edit(3, "₁"), 0.0, submitted=1.0, record_sequence=1)
+        recorder.record_output(OutputResult(job, start=1.5, end=2.0, num_written=1), "keystrokes")
+        self.assertTrue(all(r.backend is None for r in recorder.records()))
+
+        job = OutputJob(1, "x_4 ", Edit(3, "₄"), 0.0, submitted=1.0, record_sequence=4)
+        recorder.record_output(OutputResult(job, start=1.5, end=2.0, num_backspace=3, num_written=1), "keystrokes")
+
+        record = recorder.records()[-1]
+        self.assertEqual((record.written, record.num_backspace, record.backend), ("₄", 3, "keystrokes"))
+        self.assertEqual((record.output_wait, record.output_time), (0.5, 0.5))
+
+    def test_dump(self):
+        recorder = FlightRecorder(capacity=4)
+        recorder.begin("\\alpha", False, False).translation = "α"
+        recorder.begin("\\frac{1}", False, False)
+
+        file = io.StringIO()
+        recorder.dump(file)
+        success, failure = [json.loads(line) for line in file.getvalue().splitlines()]
+
+        self.assertEqual(success["translation"], "α")
+        self.assertIn("alpha", success["ast"])
+        self.assertIsNone(success["conversion_error"])
+        self.assertIsNone(failure["translation"])
+        self.assertIsNotNone(failure["conversion_error"])
+
+    def test_input_thread(self):
+        client = SyntheticClient(["\\beta", "\\notacommand"], num_activations=2)
+        first = flight_recorder.next_sequence
+        app.input_thread(client)
+
+        records = [r for r in flight_recorder.records() if r.sequence >= first]
+        self.assertEqual([(r.text, r.translation) for r in records],
+                         [("\\beta", "β"), ("\\notacommand", None)])
+        self.assertEqual((records[0].written, records[0].num_backspace), ("β", 6))
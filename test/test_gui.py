@@ -0,0 +1,42 @@
+import os
+import threading
+import unittest
+
+try:
+    from PyQt6 import QtWidgets
+except ImportError:
+    QtWidgets = None
+
+
+@unittest.skipIf(QtWidgets is None, "Requires PyQt6")
+class TestTrayIcon(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        cls.qt_app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    def test_state_changes_from_another_thread(self):
+        from latex_input.gui import SystemTrayIcon
+
+        icon = SystemTrayIcon()
+        icons_set = list[bool]()
+        icon.setIcon = lambda qicon: icons_set.append(qicon is icon.icons[True])
+
+        def toggle():
+            for i in range(1001):
+                icon.set_activated(i % 2 == 0)
+
+        thread = threading.Thread(target=toggle)
+        thread.start()
+        thread.join()
+
+        # Only the latest state is shown, the other changes were coalesced
+        self.qt_app.processEvents()
+        self.assertEqual(icons_set, [True])
+        self.assertFalse(icon.update_pending)
+
+        icon.set_activated(False)
+        icon.set_activated(False)
+        self.qt_app.processEvents()
+        self.assertEqual(icons_set, [True, False])
+        self.assertFalse(icon.shown_state)
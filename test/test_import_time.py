@@ -0,0 +1,39 @@
+import subprocess
+import sys
+import unittest
+
+# Only imported when the GUI or keyboard input are actually used
+DEFERRED_MODULES = ("PyQt6", "keyboard", "pynput", "ahk", "Xlib", "evdev", "http")
+
+
+def import_times(module: str) -> dict[str, float]:
+    """
+    Cumulative import time in seconds of every module imported by `module`, from `-X importtime`
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+
+    times = dict[str, float]()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def assert_no_deferred_imports(self, module: str):
+        times = import_times(module)
+        self.assertIn(module, times)
+
+        imported = sorted(name for name in times if name.split(".")[0] in DEFERRED_MODULES)
+        self.assertEqual(imported, [], f"{module} imported in {times[module] * 1e3:.1f} ms")
+
+    def test_app(self):
+        self.assert_no_deferred_imports("latex_input.app")
+
+    def test_main(self):
+        self.assert_no_deferred_imports("latex_input.__main__")
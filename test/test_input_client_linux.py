@@ -0,0 +1,86 @@
+import sys
+import threading
+import unittest
+from unittest import mock
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "Linux only")
+class TestCaptureStates(unittest.TestCase):
+    def setUp(self):
+        from latex_input.input_client_linux import InputClient
+
+        # Keys are fed to the listener callbacks directly, without an X display
+        for patch in (mock.patch("latex_input.input_client_linux.make_clipboard"),
+                      mock.patch.object(InputClient, "_init_x11")):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.client = InputClient(use_uinput=False)
+        self.interrupts = 0
+        self.client.set_interrupt_handler(self.on_interrupt)
+
+    def on_interrupt(self):
+        self.interrupts += 1
+
+    def activate(self):
+        waiter = threading.Thread(target=self.client.wait_for_hotkey)
+        waiter.start()
+        self.client._on_hotkey()
+        waiter.join(timeout=1)
+        self.assertFalse(waiter.is_alive())
+
+    def type(self, *keys: str):
+        for key in keys:
+            self.client._on_key(key)
+
+    def test_activation(self):
+        from latex_input.input_client_linux import CaptureState
+
+        client = self.client
+        self.type("x")  # Typed while idle, not captured
+        self.assertIs(client.state, CaptureState.IDLE)
+
+        self.activate()
+        self.assertIs(client.state, CaptureState.CAPTURING)
+        self.assertEqual(self.interrupts, 1)  # The hotkey stops output that is still being written
+
+        # Typed right after the hotkey, before `listen` runs
+        self.type("\\", "a", "l")
+        activation_time = client.activation_time
+        client._on_hotkey()  # Already capturing
+        self.assertEqual(client.activation_time, activation_time)
+
+        self.type("space", "y")
+        self.assertEqual(client.listen(""), "\\al")
+        self.assertIs(client.state, CaptureState.CONVERTING)
+
+        # Our own output while converting
+        self.type("backspace", "α")
+        self.assertEqual(client.num_ignored_keys, 2)
+
+        # Keys left over from the previous activation are dropped
+        self.activate()
+        self.type("b", "space")
+        self.assertEqual(client.listen(""), "b")
+
+    def test_cancel(self):
+        from latex_input.input_client_linux import CaptureState
+
+        self.activate()
+        self.type("a", "esc")
+
+        self.assertIsNone(self.client.listen("\\"))
+        self.assertIs(self.client.state, CaptureState.CONVERTING)
+        self.assertEqual(self.interrupts, 2)  # Esc stops output as well
+
+    def test_activation_latencies(self):
+        self.assertIsNone(self.client.activation_latency_percentiles())
+
+        for _ in range(3):
+            self.activate()
+            self.type("space")
+            self.client.listen("")
+
+        percentiles = self.client.activation_latency_percentiles()
+        self.assertEqual(list(percentiles), [50, 90, 99])
+        self.assertLessEqual(percentiles[50], percentiles[99])
@@ -0,0 +1,30 @@
+from latex_input import app
+from latex_input.synthetic_client import SyntheticClient
+
+import unittest
+
+
+class TestInputThread(unittest.TestCase):
+    def test_synthetic_activations(self):
+        client = SyntheticClient(["\\alpha", "x_1 + y_1", "\\notacommand"], num_activations=6)
+        app.input_thread(client)
+
+        self.assertEqual(len(client.activations), 6)
+        self.assertEqual([a.written for a in client.activations], ["α", "₁ + y₁", "", "α", "₁ + y₁", ""])
+        self.assertEqual([a.num_backspace for a in client.activations], [7, 9, 0, 7, 9, 0])
+        self.assertEqual([a.num_retries for a in client.activations], [0, 0, 1, 0, 0, 1])
+
+        for a in client.activations:
+            self.assertLessEqual(a.hotkey, a.activated)
+            self.assertLessEqual(a.activated, a.captured)
+            if a.written:
+                self.assertLessEqual(a.captured, a.output_start)
+                self.assertLessEqual(a.output_start, a.output_end)
+
+    def test_pipelined_output(self):
+        client = SyntheticClient(["\\alpha", "\\beta"], num_activations=4, simulate_output_time=True)
+        app.input_thread(client)
+
+        # Written in order, while the following activation was already being captured
+        self.assertEqual([a.written for a in client.activations], ["α", "β", "α", "β"])
+        self.assertTrue(all(a.output_end > b.activated for a, b in zip(client.activations, client.activations[1:])))
@@ -0,0 +1,100 @@
+from latex_input.jsonrpc import (
+    JsonRpcServer, cancelled_ids, handle_message, INTERNAL_ERROR, INVALID_REQUEST, METHOD_NOT_FOUND, PARSE_ERROR,
+    REQUEST_CANCELLED
+)
+
+import io
+import json
+import unittest
+from unittest import mock
+
+
+class TestJsonRpc(unittest.TestCase):
+    def serve(self, *messages: str) -> list:
+        output = io.StringIO()
+        JsonRpcServer(io.StringIO("\n".join(messages) + "\n"), output).serve()
+
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_convert(self):
+        response = handle_message({"jsonrpc": "2.0", "id": 1, "method": "convert", "params": {"text": "x^2"}})
+        self.assertEqual(response, {"jsonrpc": "2.0", "id": 1, "result": "x²"})
+
+        response = handle_message({"jsonrpc": "2.0", "id": 2, "method": "convert",
+                                   "params": {"text": "x", "mathMode": True}})
+        self.assertEqual(response["result"], "𝑥")
+
+        response = handle_message({"jsonrpc": "2.0", "id": 3, "method": "convert", "params": ["\\invalid"]})
+        self.assertIsNone(response["result"])
+
+    def test_convert_variants(self):
+        response = handle_message({"jsonrpc": "2.0", "id": 1, "method": "convertVariants",
+                                   "params": {"text": "lambda"}})
+
+        self.assertEqual(response["result"], [
+            {"mathMode": False, "easyMode": False, "result": "lambda"},
+            {"mathMode": False, "easyMode": True, "result": "λ"},
+            {"mathMode": True, "easyMode": False, "result": "𝑙𝑎𝑚𝑏𝑑𝑎"},
+            {"mathMode": True, "easyMode": True, "result": "𝜆"},
+        ])
+
+    def test_complete(self):
+        response = handle_message({"jsonrpc": "2.0", "id": 1, "method": "complete",
+                                   "params": {"prefix": "\\alp"}})
+        self.assertEqual(response["result"], [{"name": "alpha", "symbol": "α"}])
+
+    def test_batch(self):
+        response = handle_message([
+            {"jsonrpc": "2.0", "id": 1, "method": "convert", "params": {"text": "\\alpha"}},
+            {"jsonrpc": "2.0", "method": "convert", "params": {"text": "\\beta"}},  # Notification
+            {"jsonrpc": "2.0", "id": 2, "method": "nonexistent"},
+        ])
+
+        self.assertEqual(len(response), 2)
+        self.assertEqual(response[0]["result"], "α")
+        self.assertEqual(response[1]["error"]["code"], METHOD_NOT_FOUND)
+
+        self.assertEqual(handle_message([])["error"]["code"], INVALID_REQUEST)
+
+    def test_cancellation(self):
+        backlog = [
+            {"jsonrpc": "2.0", "id": 1, "method": "convert", "params": {"text": "\\a"}},
+            [{"jsonrpc": "2.0", "id": 2, "method": "convert", "params": {"text": "\\al"}}],
+            {"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": 1}},
+            [{"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": 2}}],
+            {"jsonrpc": "2.0", "id": 3, "method": "convert", "params": {"text": "\\alpha"}},
+        ]
+        cancelled = cancelled_ids(backlog)
+        self.assertEqual(cancelled, {1, 2})
+
+        responses = [handle_message(m, cancelled) for m in backlog]
+
+        self.assertEqual(responses[0]["error"]["code"], REQUEST_CANCELLED)
+        self.assertEqual(responses[1][0]["error"]["code"], REQUEST_CANCELLED)
+        self.assertIsNone(responses[2])
+        self.assertIsNone(responses[3])
+        self.assertEqual(responses[4]["result"], "α")
+
+    def test_ids(self):
+        response = handle_message({"jsonrpc": "2.0", "id": 1.5, "method": "convert", "params": ["a"]})
+        self.assertEqual(response, {"jsonrpc": "2.0", "id": 1.5, "result": "a"})
+
+        for id in (True, [1], {"a": 1}):
+            with self.subTest(id=id):
+                response = handle_message({"jsonrpc": "2.0", "id": id, "method": "convert", "params": ["a"]})
+                self.assertEqual(response["error"]["code"], INVALID_REQUEST)
+
+    def test_internal_error(self):
+        with mock.patch("latex_input.jsonrpc.conversion_cache.convert", side_effect=ValueError("bug")), \
+                self.assertLogs("latex_input.jsonrpc", "ERROR"):
+            responses = self.serve('{"jsonrpc": "2.0", "id": 1, "method": "convert", "params": ["a"]}',
+                                   '{"jsonrpc": "2.0", "id": 2, "method": "complete", "params": ["\\\\alp"]}')
+
+        self.assertEqual(responses[0]["error"]["code"], INTERNAL_ERROR)
+        self.assertEqual(responses[1]["result"], [{"name": "alpha", "symbol": "α"}])
+
+    def test_parse_error(self):
+        responses = self.serve("{not json", '{"jsonrpc": "2.0", "id": 1, "method": "convert", "params": ["a"]}')
+
+        self.assertEqual(responses[0]["error"]["code"], PARSE_ERROR)
+        self.assertEqual(responses[1]["result"], "a")
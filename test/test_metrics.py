@@ -0,0 +1,92 @@
+from latex_input.metrics import Counter, Gauge, Histogram, MetricsRegistry, start_exporter
+
+import http.client
+import os
+import socket
+import tempfile
+import threading
+import unittest
+import urllib.request
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_from_several_threads(self):
+        counter = Counter("test_total", "Test counter", labels=("kind",), registry=self.registry)
+
+        def count():
+            for _ in range(1000):
+                counter.inc("a")
+            counter.inc("b", amount=2.5)
+
+        threads = [threading.Thread(target=count) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counter.value("a"), 4000)
+        self.assertEqual(self.registry.render(), (
+            "# HELP test_total Test counter\n"
+            "# TYPE test_total counter\n"
+            'test_total{kind="a"} 4000.0\n'
+            'test_total{kind="b"} 10.0\n'))
+
+        with self.assertRaises(ValueError):
+            Counter("test_total", "Duplicate", registry=self.registry)
+
+    def test_histogram_and_gauge(self):
+        histogram = Histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0), registry=self.registry)
+        Gauge("test_ratio", "Test gauge", lambda: 0.5, registry=self.registry)
+        Gauge("test_missing", "Test gauge without a value", lambda: None, registry=self.registry)
+
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        self.assertEqual(self.registry.render(), (
+            "# HELP test_seconds Test histogram\n"
+            "# TYPE test_seconds histogram\n"
+            'test_seconds_bucket{le="0.1"} 2.0\n'
+            'test_seconds_bucket{le="1.0"} 3.0\n'
+            'test_seconds_bucket{le="+Inf"} 4.0\n'
+            "test_seconds_count 4.0\n"
+            "test_seconds_sum 2.65\n"
+            "# HELP test_ratio Test gauge\n"
+            "# TYPE test_ratio gauge\n"
+            "test_ratio 0.5\n"
+            "# HELP test_missing Test gauge without a value\n"
+            "# TYPE test_missing gauge\n"))
+
+    def test_label_escaping(self):
+        counter = Counter("test_total", "Test counter", labels=("kind",), registry=self.registry)
+        counter.inc('a"b\\c\nd')
+
+        self.assertIn('test_total{kind="a\\"b\\\\c\\nd"} 1.0', self.registry.render())
+
+    def test_exporter(self):
+        Counter("test_total", "Test counter", registry=self.registry).inc()
+
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, "metrics.sock")
+            servers = start_exporter(0, socket_path, registry=self.registry)
+            for server in servers:
+                self.addCleanup(server.server_close)
+                self.addCleanup(server.shutdown)
+
+            port = servers[0].server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+                self.assertIn("text/plain", response.headers["Content-Type"])
+                self.assertIn("test_total 1.0", response.read().decode())
+
+            connection = http.client.HTTPConnection("localhost")
+            connection.sock = socket.socket(socket.AF_UNIX)
+            connection.sock.connect(socket_path)
+            connection.request("GET", "/metrics")
+            self.assertIn("test_total 1.0", connection.getresponse().read().decode())
+            connection.close()
+
+            servers[1].shutdown()
+            servers[1].server_close()
+            self.assertFalse(os.path.exists(socket_path))
@@ -0,0 +1,19 @@
+from latex_input.minimal_edit import Edit, minimal_edit
+
+import unittest
+
+
+class TestMinimalEdit(unittest.TestCase):
+    def test_minimal_edit(self):
+        tests = {
+            ("x_1 + y_1 ", "x₁ + y₁"):     Edit(9, "₁ + y₁"),
+            ("\\alpha ", "α"):              Edit(7, "α"),
+            ("abc ", "abc"):                Edit(1, ""),
+            ("", "α"):                      Edit(0, "α"),
+            ("ab\\vec{c} ", "abc⃗"):   Edit(8, "c⃗"),
+            # The combining overline is retyped together with the `b` it belongs to
+            ("ab ", "ab\u0305"):            Edit(2, "b\u0305"),
+        }
+
+        for (typed, translation), edit in tests.items():
+            self.assertEqual(minimal_edit(typed, translation), edit, f"Failed on test for {typed, translation}")
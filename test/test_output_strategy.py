@@ -0,0 +1,63 @@
+from latex_input.output_strategy import SAVE_INTERVAL, CostModel, OutputStrategy, StrategySelector
+
+from pathlib import Path
+import tempfile
+import unittest
+
+
+class TestOutputStrategy(unittest.TestCase):
+    def test_cost_model(self):
+        model = CostModel(fixed=0.02, per_char=0.002)
+
+        for _ in range(30):
+            for num_chars in (1, 5, 20):
+                model.observe(num_chars, 0.01 + 0.001 * num_chars)
+
+        fixed, per_char = model.coefficients()
+        self.assertAlmostEqual(fixed, 0.01, places=2)
+        self.assertAlmostEqual(per_char, 0.001, places=3)
+
+        # Known pacing delays are added on top of the fit
+        paced = CostModel(fixed=0.0, per_char=0.001, keys_per_char=2)
+        self.assertAlmostEqual(paced.estimate(10, delay=0.002), 10 * (0.001 + 2 * 0.002))
+
+        # A slope can't be fitted from a single length, the prior's is kept
+        single = CostModel(fixed=0.0, per_char=0.002, decay=0.5)
+        for _ in range(100):
+            single.observe(3, 0.03)
+        self.assertEqual(single.coefficients()[1], 0.002)
+        self.assertAlmostEqual(single.estimate(3), 0.03)
+
+    def test_selector(self):
+        written = list[tuple[str, str]]()
+
+        def strategy(name: str, model: CostModel, **kwargs) -> OutputStrategy:
+            return OutputStrategy(name, lambda text, delay: written.append((name, text)), model, **kwargs)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "costs.json"
+            strategies = [
+                strategy("paste", CostModel(0.01, 0.0)),
+                strategy("type", CostModel(0.0, 0.002), supports=lambda text: "̅" not in text),
+            ]
+            selector = StrategySelector(strategies, path)
+
+            selector.write("α")
+            selector.write("α" * 10)
+            selector.write("b̅")
+            self.assertEqual([name for name, _ in written], ["type", "paste", "paste"])
+
+            with selector.forcing("type"):
+                selector.write("α" * 10)
+            self.assertEqual(written[-1], ("type", "α" * 10))
+            selector.write("α" * 10)
+            self.assertEqual(written[-1], ("paste", "α" * 10))
+
+            for _ in range(SAVE_INTERVAL - len(written)):
+                selector.write("α")
+            self.assertTrue(path.exists())
+
+            # Fitted models are loaded back
+            reloaded = StrategySelector(
+                [strategy("paste", CostModel(0.01, 0.0)), strategy("type", CostModel(0.0, 0.002))], path)
+            self.assertEqual(reloaded.strategies["type"].model.to_json(), selector.strategies["type"].model.to_json())
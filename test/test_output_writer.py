@@ -0,0 +1,93 @@
+from latex_input.minimal_edit import Edit
+from latex_input.output_strategy import CostModel, OutputStrategy, StrategySelector
+from latex_input.output_writer import OUTPUT_CHUNK_SIZE, OutputResult, OutputWriter
+
+from pathlib import Path
+import tempfile
+import unittest
+
+
+class RecordingClient:
+    def __init__(self):
+        self.calls = list[tuple[str, int | str]]()
+        self.on_call = lambda: None
+
+    def send_backspace(self, num_backspace: int, delay: float = 0.0):
+        self.calls.append(("backspace", num_backspace))
+        self.on_call()
+
+    def write(self, text: str, delay: float = 0.0):
+        self.calls.append(("write", text))
+        self.on_call()
+
+
+class TestOutputWriter(unittest.TestCase):
+    def test_chunks(self):
+        client = RecordingClient()
+        results = list[OutputResult]()
+        writer = OutputWriter(client, on_result=results.append)
+
+        writer.submit("x" * 10, Edit(10, "α" * 10))
+        writer.wait_until_idle()
+
+        self.assertEqual(client.calls, [
+            ("backspace", OUTPUT_CHUNK_SIZE), ("backspace", 10 - OUTPUT_CHUNK_SIZE),
+            ("write", "α" * OUTPUT_CHUNK_SIZE), ("write", "α" * (10 - OUTPUT_CHUNK_SIZE)),
+        ])
+        self.assertFalse(results[0].cancelled)
+        self.assertEqual(results[0].undo_edit(), Edit(10, "x" * 10))
+
+    def test_cancel(self):
+        client = RecordingClient()
+        results = list[OutputResult]()
+        writer = OutputWriter(client, on_result=results.append)
+
+        # Esc is pressed during the first chunk, the rest of the job and the queued job are dropped
+        client.on_call = writer.cancel
+        typed = "\\alpha\\alpha\\alpha "
+        writer.submit(typed, Edit(len(typed), "ααα"))
+        writer.submit("\\beta ", Edit(6, "β"))
+        writer.wait_until_idle()
+
+        self.assertEqual(client.calls, [("backspace", OUTPUT_CHUNK_SIZE)])
+        self.assertEqual([r.cancelled for r in results], [True, True])
+        self.assertEqual(results[0].num_backspace, OUTPUT_CHUNK_SIZE)
+        self.assertEqual(results[0].undo_edit(), Edit(0, typed[-OUTPUT_CHUNK_SIZE:]))
+
+        # Later jobs are unaffected
+        client.on_call = lambda: None
+        writer.submit("\\beta ", Edit(6, "β"))
+        writer.wait_until_idle()
+        self.assertFalse(results[-1].cancelled)
+        self.assertEqual(client.calls[-1], ("write", "β"))
+
+    def test_strategy_per_job(self):
+        client = RecordingClient()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        def write_with_fresh_models(text: str):
+            def strategy(name: str, model: CostModel, interruptible: bool) -> OutputStrategy:
+                return OutputStrategy(name, lambda text, delay: client.calls.append((name, text)), model,
+                                      interruptible=interruptible)
+
+            client.calls.clear()
+            client.output = StrategySelector([
+                strategy("paste", CostModel(0.03, 0.0), interruptible=False),
+                strategy("type", CostModel(0.0, 0.002), interruptible=True),
+            ], Path(directory.name) / "costs.json")
+            client.write = client.output.write
+
+            writer = OutputWriter(client)
+            writer.submit("", Edit(0, text))
+            writer.wait_until_idle()
+
+        # Typing each chunk would look cheaper, the whole text is cheaper to paste
+        long_text = "α" * (3 * OUTPUT_CHUNK_SIZE)
+        write_with_fresh_models(long_text)
+        self.assertEqual(client.calls, [("paste", long_text)])
+
+        # Short text is typed, in chunks that can be interrupted
+        short_text = "β" * (OUTPUT_CHUNK_SIZE + 2)
+        write_with_fresh_models(short_text)
+        self.assertEqual(client.calls, [("type", "β" * OUTPUT_CHUNK_SIZE), ("type", "ββ")])
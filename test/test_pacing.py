@@ -0,0 +1,77 @@
+from latex_input import pacing
+from latex_input.pacing import PacingScheduler, precise_sleep, sleep_until
+
+import time
+import unittest
+from unittest import mock
+
+
+class TestPacing(unittest.TestCase):
+    def test_deadline_spacing(self):
+        scheduler = PacingScheduler(0.01)
+        start = time.perf_counter()
+        times = list[float]()
+
+        for _ in range(5):
+            scheduler.wait()
+            times.append(time.perf_counter())
+
+        # Deadlines are absolute, spaced exactly one interval apart from the start
+        for i, t in enumerate(times, start=1):
+            self.assertGreaterEqual(t - start, i * 0.01)
+        self.assertLess(times[-1] - start, 0.1)
+
+    def test_no_burst_after_a_stall(self):
+        scheduler = PacingScheduler(0.01)
+        scheduler.wait()
+        time.sleep(0.05)  # Sending took several intervals
+
+        stalled = time.perf_counter()
+        scheduler.wait()  # Already past its deadline
+        self.assertLess(time.perf_counter() - stalled, 0.009)
+
+        # The next deadline is a whole interval after the late event, not the missed deadline
+        scheduler.wait()
+        self.assertGreaterEqual(time.perf_counter() - stalled, 0.01)
+
+    def test_no_interval(self):
+        for interval in (0.0, -1.0):
+            with self.subTest(interval=interval), mock.patch("latex_input.pacing.sleep_until") as sleep:
+                scheduler = PacingScheduler(interval)
+                for _ in range(3):
+                    scheduler.wait()
+
+                sleep.assert_not_called()
+
+    def test_sleep_then_spin(self):
+        with mock.patch("time.sleep", wraps=time.sleep) as sleep:
+            deadline = time.perf_counter() + 0.02
+            sleep_until(deadline, spin_threshold=0.005)
+
+            self.assertGreaterEqual(time.perf_counter(), deadline)
+            # Everything but the spin threshold is slept
+            sleep.assert_called_once()
+            self.assertLessEqual(sleep.call_args.args[0], 0.015)
+
+            # Below the threshold, only spins
+            sleep.reset_mock()
+            deadline = time.perf_counter() + 0.002
+            sleep_until(deadline, spin_threshold=0.005)
+
+            self.assertGreaterEqual(time.perf_counter(), deadline)
+            sleep.assert_not_called()
+
+            precise_sleep(0.0)
+            precise_sleep(-1.0)
+            sleep.assert_not_called()
+
+    def test_timer_slack(self):
+        for platform, is_reduced in (("linux", True), ("win32", False), ("darwin", False)):
+            with self.subTest(platform=platform), mock.patch("sys.platform", platform), \
+                    mock.patch("ctypes.CDLL") as cdll:
+                pacing._reduce_timer_slack()
+
+                if is_reduced:
+                    cdll.return_value.prctl.assert_called_once_with(pacing._PR_SET_TIMERSLACK, 1, 0, 0, 0)
+                else:
+                    cdll.assert_not_called()
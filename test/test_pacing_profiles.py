@@ -0,0 +1,103 @@
+from latex_input.pacing_profiles import PacingProfiles, probe_delay, tune_delay
+
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+
+
+class FakeTextField:
+    """
+    Drops every other character typed faster than `min_delay`
+    """
+    def __init__(self, min_delay: float, text: str = "x = "):
+        self.min_delay = min_delay
+        self.text = text
+
+    def write(self, text: str, delay: float = 0.0):
+        self.text += text if delay >= self.min_delay else text[::2]
+
+    def send_backspace(self, num_backspace: int, delay: float = 0.0):
+        self.text = self.text[:len(self.text) - num_backspace]
+
+    def read_line_before_cursor(self) -> str | None:
+        return self.text
+
+
+class TestPacingProfiles(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "pacing_profiles.json"
+
+    def test_round_trip(self):
+        profiles = PacingProfiles(self.path)
+        self.assertNotIn("kate", profiles)
+        self.assertEqual(profiles.delay_for("kate", 0.001), 0.001)
+
+        profiles.set_delay("kate", 0.005)
+        profiles.set_delay("firefox", 0.0)
+
+        profiles = PacingProfiles(self.path)
+        self.assertIn("kate", profiles)
+        self.assertEqual(profiles.delay_for("kate", 0.001), 0.005)
+        self.assertEqual(profiles.delay_for("firefox", 0.001), 0.0)
+        self.assertEqual(profiles.delay_for(None, 0.001), 0.001)
+
+    def test_missing_or_corrupt_file(self):
+        self.assertEqual(PacingProfiles(self.path).delays, {})
+
+        for contents in ("{not json", "[1, 2]", '{"kate": null}', '{"kate": "slow"}'):
+            with self.subTest(contents=contents):
+                self.path.write_text(contents, encoding="utf-8")
+
+                with self.assertLogs("latex_input.pacing_profiles", "WARNING"):
+                    profiles = PacingProfiles(self.path)
+                self.assertEqual(profiles.delays, {})
+
+    def test_unwritable_file(self):
+        profiles = PacingProfiles(self.path.parent / "missing" / "pacing_profiles.json")
+
+        with self.assertLogs("latex_input.pacing_profiles", "WARNING"):
+            profiles.set_delay("kate", 0.005)
+
+        # Still used for the rest of the run
+        self.assertEqual(profiles.delay_for("kate", 0.001), 0.005)
+
+
+class TestTuning(unittest.TestCase):
+    def test_tune_delay(self):
+        delays = (0.0, 0.001, 0.002, 0.005, 0.01)
+
+        for min_delay in delays:
+            with self.subTest(min_delay=min_delay):
+                probed = list[float]()
+
+                def probe(delay: float) -> bool:
+                    probed.append(delay)
+                    return delay >= min_delay
+
+                self.assertEqual(tune_delay(probe, delays, trials=2), min_delay)
+                # Binary search over the delays
+                self.assertLessEqual(len(set(probed)), 3)
+
+    def test_tune_delay_unreliable(self):
+        probe = mock.Mock(return_value=False)
+
+        self.assertIsNone(tune_delay(probe, (0.0, 0.001, 0.002, 0.005), trials=2))
+        # Only gives up once the slowest delay failed
+        probe.assert_called_with(0.005)
+
+    def test_probe_delay(self):
+        field = FakeTextField(min_delay=0.002)
+
+        with mock.patch("latex_input.pacing_profiles.READ_BACK_SETTLE_TIME", 0.0):
+            self.assertTrue(probe_delay(field, 0.002))
+            self.assertEqual(field.text, "x = ")
+
+            # What was received is erased again even when characters were dropped
+            self.assertFalse(probe_delay(field, 0.001))
+            self.assertEqual(field.text, "x = ")
+
+            field.read_line_before_cursor = lambda: None
+            self.assertFalse(probe_delay(field, 0.002))
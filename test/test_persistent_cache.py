@@ -0,0 +1,79 @@
+from latex_input.completion import SymbolCompleter
+from latex_input.conversion_cache import ConversionCache, conversion_cache
+from latex_input import jsonrpc, server
+from latex_input.latex_converter import FontContext
+from latex_input.persistent_cache import PersistentCache, warm_up
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+class TestPersistentCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "conversions.sqlite3"
+
+    def open(self, version: str = "1") -> PersistentCache:
+        store = PersistentCache(self.path, version)
+        self.addCleanup(store.close)
+        return store
+
+    def test_warm_up_across_runs(self):
+        store = self.open()
+        cache = ConversionCache()
+        cache.store = store
+
+        for tex in ["\\alpha", "\\alpha", "\\beta", "\\notacommand", "beta"]:
+            cache.convert(tex, is_easy_mode=True)
+        cache.convert("\\gamma", count_use=False)
+        store.close()
+
+        # A new run starts out with the previous run's conversions, most used first
+        store = self.open()
+        self.assertEqual([(key[0], translation, uses) for key, translation, uses in store.hottest(10)],
+                         [("\\alpha", "α", 2), ("\\beta", "β", 1), ("beta", "β", 1)])
+
+        cache = ConversionCache()
+        completer = SymbolCompleter()
+        warm_up(store, cache, completer)
+
+        self.assertEqual(cache.convert("\\alpha", FontContext(), True), "α")
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertEqual(completer.usage_counts["beta"], 2)
+        self.assertEqual(completer.complete("be", limit=1), [("beta", "β")])
+
+        # Uses add up
+        cache.convert("\\alpha", FontContext(), True)
+        store.flush()
+        self.assertEqual(store.hottest(1)[0][2], 4)
+
+    def test_version_change_discards_entries(self):
+        store = self.open("1")
+        store.record_use(("x^2", 0, False, False, True), "x²")
+        store.close()
+
+        self.assertEqual(len(self.open("1").hottest(10)), 1)
+        self.assertEqual(self.open("2").hottest(10), [])
+
+    def test_prune(self):
+        store = self.open()
+        for i in range(5):
+            for _ in range(i + 1):
+                store.record_use((f"x_{i}", 0, False, False, True), f"x{i}")
+        store.flush()
+
+        store.prune(2)
+        self.assertEqual([key[0] for key, _, _ in store.hottest(10)], ["x_4", "x_3"])
+
+    def test_previews_are_not_uses(self):
+        store = self.open()
+
+        with mock.patch.object(conversion_cache, "store", store):
+            jsonrpc.handle_message({"jsonrpc": "2.0", "id": 1, "method": "convert", "params": {"text": "x^2"}})
+            server.handle_request(bytes((server.REQUEST_EASY_MODE,)) + b"\\alpha")
+
+        store.flush()
+        self.assertEqual(store.hottest(10), [])
@@ -0,0 +1,56 @@
+from latex_input.server import ConversionClient, handle_client
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+
+@unittest.skipUnless(hasattr(asyncio, "start_unix_server"), "Unix domain sockets are unavailable")
+class TestConversionServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tempdir.name, "latex_input.sock")
+        self.server = await asyncio.start_unix_server(handle_client, self.socket_path)
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.tempdir.cleanup()
+
+    async def test_convert(self):
+        client = await ConversionClient.connect(self.socket_path)
+
+        self.assertEqual(await client.convert("x^2"), "x²")
+        self.assertEqual(await client.convert("lambda"), "λ")
+        self.assertEqual(await client.convert("lambda", is_easy_mode=False), "lambda")
+        self.assertEqual(await client.convert("x", is_math_mode=True), "𝑥")
+        self.assertIsNone(await client.convert("\\invalid"))
+
+        await client.close()
+
+    async def test_pipelined_requests_keep_order(self):
+        client = await ConversionClient.connect(self.socket_path)
+
+        for i in range(100):
+            client.send(f"x^{{{i}}}")
+        await client.writer.drain()
+
+        superscripts = str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹")
+        for i in range(100):
+            self.assertEqual(await client.receive(), "x" + str(i).translate(superscripts))
+
+        await client.close()
+
+    async def test_concurrent_clients(self):
+        async def convert_many(tex: str) -> list[str | None]:
+            client = await ConversionClient.connect(self.socket_path)
+            results = [await client.convert(tex) for _ in range(20)]
+            await client.close()
+
+            return results
+
+        results = await asyncio.gather(*(convert_many(f"\\alpha_{i}") for i in range(10)))
+
+        for i, result in enumerate(results):
+            self.assertEqual(result, [f"α{'₀₁₂₃₄₅₆₇₈₉'[i]}"] * 20)
@@ -0,0 +1,37 @@
+from latex_input.latex_converter import latex_to_unicode
+from latex_input.speculative import SpeculativeConverter
+
+import threading
+import time
+import unittest
+
+
+class TestSpeculativeConverter(unittest.TestCase):
+    def test_speculation(self):
+        converter = SpeculativeConverter(debounce=0.001)
+        converted = threading.Event()
+
+        def convert(text: str) -> str | None:
+            converted.set()
+            return latex_to_unicode(text)
+
+        # Hit, the final text was converted while typing
+        converter.begin(convert)
+        converter.update("\\alph")
+        converter.update("\\alpha")
+        self.assertTrue(converted.wait(1))
+        time.sleep(0.01)
+        self.assertEqual(converter.take("\\alpha"), "α")
+        self.assertEqual((converter.hits, converter.misses), (1, 0))
+
+        # Miss, the final text differs from the last update
+        converter.begin(convert)
+        converter.update("\\bet")
+        self.assertEqual(converter.take("\\beta"), "β")
+        self.assertEqual((converter.hits, converter.misses), (1, 1))
+
+        # Results from a previous activation are never used
+        converter.begin(convert)
+        self.assertEqual(converter.take("\\alpha"), "α")
+        self.assertEqual((converter.hits, converter.misses), (1, 2))
+        self.assertEqual(converter.hit_rate(), 1 / 3)
@@ -0,0 +1,66 @@
+from latex_input.trace import ReplayClient, TraceEvent, TraceEventKind, TraceWriter, read_trace
+
+import io
+import unittest
+
+
+def make_trace(keys: str) -> list[TraceEvent]:
+    """
+    `^` stands for the hotkey, `_` for space, `<` for backspace and arrows for the arrow keys
+    """
+    names = {"^": "", "_": "space", "<": "backspace", "←": "left", "→": "right"}
+    return [
+        TraceEvent(i * 0.01, TraceEventKind.HOTKEY if c == "^" else TraceEventKind.KEY, names.get(c, c))
+        for i, c in enumerate(keys)
+    ]
+
+
+class TestTrace(unittest.TestCase):
+    def test_round_trip(self):
+        file = io.BytesIO()
+        writer = TraceWriter(file)
+        for event in make_trace("ab^\\alpha_<β_"):
+            writer.record(event.kind, event.key)
+
+        events = read_trace(io.BytesIO(file.getvalue()))
+        self.assertEqual([(e.kind, e.key) for e in events], [(e.kind, e.key) for e in make_trace("ab^\\alpha_<β_")])
+        self.assertEqual(events[0].time, 0.0)
+        self.assertEqual(events, sorted(events, key=lambda e: e.time))
+
+        # An interrupted recording keeps every complete event
+        self.assertEqual(len(read_trace(io.BytesIO(file.getvalue()[:-1]))), len(events) - 1)
+
+        with self.assertRaises(ValueError):
+            read_trace(io.BytesIO(b"not a trace"))
+
+    def test_replay(self):
+        client = ReplayClient(make_trace("x_^\\alpa<ha_^b_"), speed=0)
+
+        client.wait_for_hotkey()
+        self.assertEqual(client.screen, "x ")
+        self.assertEqual(client.listen(""), "\\alpha")
+
+        client.send_backspace(7)
+        client.write("α")
+        self.assertEqual(client.screen, "x α")
+
+        # The next activation is left for `wait_for_hotkey`
+        self.assertIsNone(client.listen(""))
+        client.wait_for_hotkey()
+        self.assertEqual(client.listen(""), "b")
+        self.assertEqual(client.read_line_before_cursor(), "x αb ")
+
+        with self.assertRaises(EOFError):
+            client.wait_for_hotkey()
+
+    def test_replay_cursor_movement(self):
+        client = ReplayClient(make_trace("ab^\\fac←←r_→→_"), speed=0)
+
+        client.wait_for_hotkey()
+        self.assertEqual(client.listen(""), "\\fr ac")
+        self.assertEqual(client.screen, "ab\\fr ac ")
+
+        client.send_backspace(len("\\fr ac "))
+        client.write("x")
+        self.assertEqual(client.screen, "abx")
+        self.assertEqual(client.read_line_before_cursor(), "abx")
@@ -0,0 +1,108 @@
+import glob
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "Linux only")
+class TestBackendSelection(unittest.TestCase):
+    def test_x11_is_preferred(self):
+        from latex_input.input_client_linux import is_wayland_session
+
+        with mock.patch.dict(os.environ, {"DISPLAY": ":0", "XDG_SESSION_TYPE": "x11"}, clear=True):
+            self.assertFalse(is_wayland_session())
+
+        # Xwayland sets DISPLAY as well
+        with mock.patch.dict(os.environ, {"DISPLAY": ":0", "WAYLAND_DISPLAY": "wayland-0"}, clear=True):
+            self.assertTrue(is_wayland_session())
+
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertTrue(is_wayland_session())
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "Linux only")
+class TestUinputKeyboard(unittest.TestCase):
+    def test_flush_waits_for_a_full_buffer(self):
+        from latex_input.uinput_linux import INPUT_EVENT, UinputKeyboard
+
+        # A non-blocking pipe stands in for the device
+        read_fd, write_fd = os.pipe2(os.O_NONBLOCK)
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        os.set_blocking(read_fd, True)
+
+        # Fills the pipe, so the first write can't write anything
+        filler = 0
+        try:
+            while True:
+                filler += os.write(write_fd, bytes(4096))
+        except BlockingIOError:
+            pass
+
+        keyboard = UinputKeyboard.__new__(UinputKeyboard)
+        keyboard.fd = write_fd
+        keyboard.pending = bytearray()
+        keyboard.tap("a", 1000)
+        expected = filler + len(keyboard.pending) + INPUT_EVENT.size  # Followed by a SYN_REPORT
+
+        received = bytearray()
+
+        def read():
+            time.sleep(0.05)
+            while len(received) < expected and (data := os.read(read_fd, 4096)):
+                received.extend(data)
+
+        thread = threading.Thread(target=read, daemon=True)
+        thread.start()
+        keyboard.flush()
+        thread.join()
+
+        self.assertEqual(len(received), expected)
+        self.assertEqual(keyboard.pending, bytearray())
+
+
+@unittest.skipUnless(sys.platform.startswith("linux") and os.access("/dev/uinput", os.W_OK),
+                     "Requires write access to /dev/uinput")
+class TestUinput(unittest.TestCase):
+    def test_virtual_device_round_trip(self):
+        from latex_input.uinput_linux import EvdevKeyReader, UinputKeyboard, _device_name
+
+        name = f"latex_input test keyboard {os.getpid()}"
+        keyboard = UinputKeyboard(name=name)
+        self.addCleanup(keyboard.close)
+
+        def find_device() -> str:
+            for path in glob.glob("/dev/input/event*"):
+                fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+                try:
+                    if _device_name(fd) == name:
+                        return path
+                finally:
+                    os.close(fd)
+
+            self.skipTest("Virtual device isn't readable")
+
+        keys = list[str]()
+        finished = threading.Event()
+        hotkeys = list[bool]()
+
+        def on_key(key: str):
+            keys.append(key)
+            if key == "space":
+                finished.set()
+
+        EvdevKeyReader(on_key, lambda: hotkeys.append(True), device_paths=[find_device()])
+
+        keyboard.chord("Control_L", "Shift_L", "i")
+        keyboard.tap("a")
+        keyboard.chord("Shift_L", "b")
+        keyboard.tap("BackSpace", 2)
+        keyboard.tap("space")
+        keyboard.flush()
+
+        self.assertTrue(finished.wait(2))
+        self.assertEqual(hotkeys, [True])
+        self.assertEqual(keys, ["a", "B", "backspace", "backspace", "space"])
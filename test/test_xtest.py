@@ -0,0 +1,166 @@
+from latex_input.xtest_linux import (
+    InjectedKeys, PynputKeyboard, XTestKeyboard, keysym_for, longest_unused_range, split_remap_batches
+)
+from xvfb import HAS_XVFB, start_xvfb
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+
+class TestKeysymRemap(unittest.TestCase):
+    def test_keysym_for(self):
+        self.assertEqual(keysym_for("a"), ord("a"))
+        self.assertEqual(keysym_for("é"), 0xE9)
+        self.assertEqual(keysym_for("α"), 0x010003B1)
+        self.assertEqual(keysym_for("𝔽"), 0x0101D53D)
+
+    def test_split_remap_batches(self):
+        self.assertEqual(split_remap_batches("", 2), [])
+        self.assertEqual(split_remap_batches("abab", 2), ["abab"])
+        self.assertEqual(split_remap_batches("ababcab", 2), ["abab", "ca", "b"])
+
+        text = "αβγ αβγ δε"
+        batches = split_remap_batches(text, 3)
+        self.assertEqual("".join(batches), text)
+        self.assertTrue(all(len(set(b)) <= 3 for b in batches))
+
+    def test_longest_unused_range(self):
+        unused = (0, 0)
+        mapping = [(97, 65), unused, unused, (98, 66), unused, unused, unused]
+        self.assertEqual(longest_unused_range(mapping, 8), (12, 3))
+        self.assertEqual(longest_unused_range([(97, 65)], 8), (8, 0))
+
+
+class TestInjectedKeys(unittest.TestCase):
+    def test_user_keys_pass_while_injecting(self):
+        injected = InjectedKeys()
+        backspace, a = 22, 38
+
+        injected.expect(backspace)
+        injected.expect(backspace)
+
+        # The user types while our backspaces are on their way
+        self.assertTrue(injected.take(backspace))
+        self.assertFalse(injected.take(a))
+        self.assertTrue(injected.take(backspace))
+        self.assertFalse(injected.take(backspace))
+
+
+class TestXTestKeyboard(unittest.TestCase):
+    def setUp(self):
+        self.display = mock.Mock()
+        self.display.has_extension.return_value = True
+        self.display.keysym_to_keycode.side_effect = lambda keysym: {0xFF08: 22, 0xFFE3: 37, ord("v"): 55}[keysym]
+
+        for patch in (mock.patch("Xlib.display.Display", return_value=self.display),
+                      mock.patch("Xlib.ext.xtest.fake_input")):
+            self.addCleanup(patch.stop)
+            self.fake_input = patch.start()
+
+    def test_batched_events(self):
+        from Xlib import X
+
+        keyboard = XTestKeyboard()
+        keyboard.tap("BackSpace", 3, delay=0.002)
+        keyboard.chord("Control_L", "v")
+
+        # Every event is queued, with pacing left to the server, and sent with a single round trip
+        self.assertEqual(self.fake_input.call_args_list, [
+            *[mock.call(self.display, X.KeyPress, 22, time=2), mock.call(self.display, X.KeyRelease, 22)] * 3,
+            mock.call(self.display, X.KeyPress, 37, time=0), mock.call(self.display, X.KeyPress, 55, time=0),
+            mock.call(self.display, X.KeyRelease, 55), mock.call(self.display, X.KeyRelease, 37),
+        ])
+        self.display.sync.assert_not_called()
+
+        keyboard.flush()
+        self.display.sync.assert_called_once()
+        self.assertEqual(self.display.keysym_to_keycode.call_count, 3)  # Looked up once per key
+
+    def test_errors(self):
+        self.display.keysym_to_keycode.side_effect = None
+        self.display.keysym_to_keycode.return_value = 0
+
+        with self.assertRaises(ValueError):
+            XTestKeyboard().tap("BackSpace")
+
+        self.display.has_extension.return_value = False
+        with self.assertRaises(RuntimeError):
+            XTestKeyboard()
+
+
+class TestPynputKeyboard(unittest.TestCase):
+    def test_keys(self):
+        key = mock.Mock()
+        # Only the `Key` names are used, pynput itself needs an X display to import
+        with mock.patch.dict("sys.modules", {"pynput": mock.Mock(keyboard=mock.Mock(Key=key))}):
+            controller = mock.Mock()
+            keyboard = PynputKeyboard(controller)
+
+        keyboard.tap("BackSpace", 2)
+        keyboard.chord("Control_L", "v")
+        keyboard.flush()
+
+        self.assertEqual(controller.mock_calls, [
+            mock.call.press(key.backspace), mock.call.release(key.backspace),
+            mock.call.press(key.backspace), mock.call.release(key.backspace),
+            mock.call.press(key.ctrl), mock.call.press("v"), mock.call.release("v"), mock.call.release(key.ctrl),
+        ])
+
+
+@unittest.skipUnless(HAS_XVFB, "Requires Xvfb")
+class TestKeysymRemapWriter(unittest.TestCase):
+    def setUp(self):
+        self.display_name = start_xvfb(self)
+
+    def test_received_text(self):
+        from Xlib import X, display
+        from latex_input.xtest_linux import KeysymRemapWriter, XTestKeyboard
+
+        # A client translating keycodes like Xlib clients do, refreshing its mapping on MappingNotify
+        receiver = display.Display(self.display_name)
+        self.addCleanup(receiver.close)
+        screen = receiver.screen()
+        window = screen.root.create_window(0, 0, 100, 100, 0, screen.root_depth, event_mask=X.KeyPressMask)
+        window.map()
+        window.set_input_focus(X.RevertToParent, X.CurrentTime)
+        receiver.sync()
+
+        received = list[int]()
+        stop = threading.Event()
+
+        def receive():
+            while not stop.is_set():
+                while receiver.pending_events():
+                    event = receiver.next_event()
+                    if event.type == X.MappingNotify:
+                        receiver.refresh_keyboard_mapping(event)
+                    elif event.type == X.KeyPress:
+                        received.append(receiver.keycode_to_keysym(event.detail, 0))
+                time.sleep(0.001)
+
+        thread = threading.Thread(target=receive, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(stop.set)
+
+        writer = KeysymRemapWriter(XTestKeyboard(), restore_delay=0.1)
+        writer.num_keycodes = 4  # Several batches, each remapping the keycodes typed with just before
+
+        text = "αβγδεζ αβγ ηθικλ"
+        writer.write(text[:7])
+        writer.write(text[7:])  # Reuses the mapping where it can
+        time.sleep(0.2)  # Restored meanwhile
+        writer.write("μ")
+        text += "μ"
+
+        deadline = time.monotonic() + 5
+        while len(received) < len(text) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(received, [keysym_for(c) for c in text])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import os
+import shutil
+import subprocess
+import unittest
+from unittest import mock
+
+HAS_XVFB = shutil.which("Xvfb") is not None
+
+
+def start_xvfb(test: unittest.TestCase) -> str:
+    """
+    Starts an X server for the duration of the test and points DISPLAY at it, returning the display name
+    """
+    read_fd, write_fd = os.pipe()
+    xvfb = subprocess.Popen(["Xvfb", "-displayfd", str(write_fd), "-nolisten", "tcp"], pass_fds=(write_fd,),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    test.addCleanup(xvfb.wait)
+    test.addCleanup(xvfb.terminate)
+    os.close(write_fd)
+
+    # Xvfb writes the display number once it accepts connections
+    with os.fdopen(read_fd) as f:
+        display_name = ":" + f.readline().strip()
+
+    patch = mock.patch.dict(os.environ, {"DISPLAY": display_name})
+    patch.start()
+    test.addCleanup(patch.stop)
+
+    return display_name